@@ -0,0 +1,237 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import abc
+import asyncio
+import itertools
+import time
+
+import numpy as np
+
+from galileo_reference_tree import constants, metrics, statehub
+
+
+class Layer(abc.ABC):
+    """
+    Base class for the layers stacked by the Compositor. Each frame, the layers render into the frame buffer in order
+    of increasing priority, so a layer overwrites the pixels set by the layers below it and leaves all other pixels
+    untouched. Layers implement render(), which is abstract so that an incomplete layer already fails when created.
+
+    Attributes:
+        priority (int): The priority of the layer. Layers with a higher priority are drawn on top.
+    """
+
+    def __init__(self, priority):
+        """
+        Initializes the layer.
+
+        Parameters:
+            priority (int): The priority of the layer. Layers with a higher priority are drawn on top.
+        """
+        self.priority = priority
+
+    @abc.abstractmethod
+    def render(self, frame, elapsed):
+        """
+        Renders the layer into the frame buffer.
+
+        Parameters:
+            frame (np.ndarray): The frame buffer, containing the 24-bit color of each LED.
+            elapsed (float): The time in seconds since the compositor started.
+        """
+
+
+class Compositor(object):
+    """
+    Owns the frame buffer of the LED strip and is its only writer. Every frame, it stacks the layers by priority and
+    compares the result with the frame shown last. Only the changed pixels are written to the strip, followed by
+    exactly one show() call; when nothing changed, the costly show() is skipped altogether. As the state of the LEDs is
+    unknown before the first frame, e.g. left lit by a previous run, the first frame is written in full, even if it is
+    dark. Frames are rendered at a fixed frame rate, and the timing of every frame is recorded in the metrics registry.
+
+    Frames are only rendered at the frame rate while they change. After an unchanged frame, nothing is animating, so
+    the compositor waits for the satellites to be propagated or an ephemeris to change, which it receives from the
+    state hub, and renders the next frame right away. As the layers may still change slowly over time, e.g. the timed
+    plane animation, it does not wait longer than COMPOSITOR_IDLE_INTERVAL. Every shown frame is published to the hub.
+
+    Attributes:
+        ledstrip (StripBackend): The LED output to write the frames to.
+        fps (float): The frame rate in frames per second.
+        layers (list[Layer]): The layers to stack, sorted by increasing priority.
+        frame (np.ndarray): The frame shown last, containing the 24-bit color of each LED.
+        first_frame (bool): Whether no frame was shown yet, so the next frame is written in full.
+        start_time (float): The time.monotonic() value at which the compositor started.
+        frames_shown (Counter): Counter of the frames pushed to the strip with show().
+        frames_skipped (Counter): Counter of the frames identical to the previous one, for which show() was skipped.
+        pixels_written (Counter): Counter of the pixels written to the strip.
+        pixels_skipped (Counter): Counter of the unchanged pixels which were not written to the strip.
+        compose_time (Histogram): Time in seconds spent composing and diffing a frame.
+        show_time (Histogram): Time in seconds spent writing the changed pixels and showing a frame.
+        jitter (Histogram): Time in seconds by which frames started after their deadline.
+        frame_rate (Meter): The achieved number of frames per second.
+        deadlines_missed (Counter): Counter of the frames which did not finish before the next deadline.
+        idle_waits (Counter): Counter of the waits for a state change after an unchanged frame.
+        hub (StateHub): The hub to receive the state changes from and to publish the shown frames to.
+    """
+
+    def __init__(self, ledstrip, fps, registry=None, hub=None):
+        """
+        Initializes the compositor.
+
+        Parameters:
+            ledstrip (StripBackend): The LED output to write the frames to.
+            fps (float): The frame rate in frames per second.
+            registry (MetricsRegistry, optional): The registry to record the output counters and frame timing in.
+                Defaults to the application-wide registry.
+            hub (StateHub, optional): The hub to receive the state changes from and to publish the shown frames to.
+                Defaults to the application-wide hub.
+        """
+        self.ledstrip = ledstrip
+        self.fps = fps
+        self.layers = []
+        self.frame = np.zeros(ledstrip.numPixels(), dtype=np.uint32)
+        self.first_frame = True
+        self.start_time = time.monotonic()
+
+        registry = registry if registry is not None else metrics.registry
+        self.frames_shown = registry.counter("led_frames_shown_total")
+        self.frames_skipped = registry.counter("led_frames_skipped_total")
+        self.pixels_written = registry.counter("led_pixels_written_total")
+        self.pixels_skipped = registry.counter("led_pixels_skipped_total")
+        self.compose_time = registry.histogram("led_compose_time_seconds")
+        self.show_time = registry.histogram("led_show_time_seconds")
+        self.jitter = registry.histogram("led_frame_jitter_seconds")
+        self.frame_rate = registry.meter("led_frames_per_second")
+        self.deadlines_missed = registry.counter("led_deadlines_missed_total")
+        self.idle_waits = registry.counter("led_idle_waits_total")
+        self.hub = hub if hub is not None else statehub.hub
+
+    def add_layer(self, layer):
+        """
+        Adds a layer to the stack, keeping the layers sorted by priority. Layers with equal priority are drawn in the
+        order in which they were added.
+
+        Parameters:
+            layer (Layer): The layer to add.
+        """
+        self.layers.append(layer)
+        self.layers.sort(key=lambda stacked_layer: stacked_layer.priority)
+
+    def compose(self, elapsed):
+        """
+        Composes a frame by rendering all layers on top of a dark background.
+
+        Parameters:
+            elapsed (float): The time in seconds since the compositor started.
+
+        Returns:
+            np.ndarray: The composed frame, containing the 24-bit color of each LED.
+        """
+        frame = np.zeros_like(self.frame)
+        for layer in self.layers:
+            layer.render(frame, elapsed)
+        return frame
+
+    def render_frame(self, elapsed):
+        """
+        Composes a frame and writes the pixels which changed since the last shown frame to the LED strip, after which
+        the frame is shown. If no pixel changed, nothing is written and the frame is not shown. The first frame is
+        always written in full.
+
+        Parameters:
+            elapsed (float): The time in seconds since the compositor started.
+
+        Returns:
+            bool: Whether the frame was shown.
+        """
+        compose_start = time.perf_counter()
+        frame = self.compose(elapsed)
+        changed = np.arange(len(frame)) if self.first_frame else np.flatnonzero(frame != self.frame)
+        show_start = time.perf_counter()
+        self.compose_time.observe(show_start - compose_start)
+        self.pixels_skipped.inc(len(frame) - len(changed))
+        if not len(changed):
+            self.frames_skipped.inc()
+            return False
+
+        self.ledstrip.set_pixels(changed, frame[changed])
+        self.ledstrip.show()
+        self.show_time.observe(time.perf_counter() - show_start)
+        self.frame = frame
+        self.first_frame = False
+        self.pixels_written.inc(len(changed))
+        self.frames_shown.inc()
+        self.hub.publish(statehub.TOPIC_FRAME)
+        return True
+
+    async def run(self, executor=None):
+        """
+        Renders frames indefinitely at the configured frame rate while they change. The frames are scheduled on fixed
+        deadlines, so the time spent composing and showing a frame does not make the animation drift. After an
+        unchanged frame, the next frame is rendered as soon as the state changes, or after the idle interval.
+
+        If showing a frame blocks until the LED output took it, the frames are rendered in the given executor, leaving
+        the event loop free for the other tasks in the meantime. Frames for outputs which return right away are
+        rendered on the event loop itself, avoiding the handover to another thread.
+
+        Parameters:
+            executor (concurrent.futures.Executor, optional): The executor to render the frames in for blocking
+                outputs. Defaults to the default executor of the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        frame_interval = 1 / self.fps
+        subscription = self.hub.subscribe_async(statehub.TOPIC_EPHEMERIS, statehub.TOPIC_AZELEV)
+        woken = False
+        next_deadline = time.monotonic()
+        try:
+            for _ in itertools.count():
+                frame_start = time.monotonic()
+                self.jitter.observe(frame_start - next_deadline)
+                self.frame_rate.mark()
+
+                # The first frame after a state change may be unchanged as the change only starts a fade, so the
+                # frame after it is always rendered as well
+                if self.ledstrip.blocking:
+                    shown = await loop.run_in_executor(executor, self.render_frame, frame_start - self.start_time)
+                else:
+                    shown = self.render_frame(frame_start - self.start_time)
+                if not shown and not woken:
+                    self.idle_waits.inc()
+                    woken = bool(await subscription.wait(constants.COMPOSITOR_IDLE_INTERVAL))
+                    next_deadline = time.monotonic()
+                    continue
+                woken = False
+
+                # Sleep until the next deadline, skipping deadlines which have already passed
+                next_deadline += frame_interval
+                now = time.monotonic()
+                if next_deadline < now:
+                    self.deadlines_missed.inc()
+                    next_deadline = now
+                await asyncio.sleep(next_deadline - now)
+        finally:
+            subscription.close()
+
+    def timing_summary(self):
+        """
+        Summarizes the frame timing since the compositor started, e.g. to print on shutdown.
+
+        Returns:
+            str: The summary of the achieved frame rate, the frame timing and the output counters.
+        """
+        run_time = time.monotonic() - self.start_time
+        frames = self.frame_rate.total
+        return '\n'.join([
+            'LED frames: %d rendered, %d shown, %d unchanged, %d missed deadlines, %d idle waits' %
+            (frames, self.frames_shown.value, self.frames_skipped.value, self.deadlines_missed.value,
+             self.idle_waits.value),
+            'LED frame rate: %.1f FPS achieved, %.1f FPS configured' % (frames / run_time if run_time else 0, self.fps),
+            'LED compose time: mean %.3f ms, p99 <= %.3f ms' %
+            (self.compose_time.sample()['mean'] * 1e3, self.compose_time.quantile(0.99) * 1e3),
+            'LED show time: mean %.3f ms, p99 <= %.3f ms' %
+            (self.show_time.sample()['mean'] * 1e3, self.show_time.quantile(0.99) * 1e3),
+            'LED frame jitter: p50 <= %.3f ms, p99 <= %.3f ms' %
+            (self.jitter.quantile(0.5) * 1e3, self.jitter.quantile(0.99) * 1e3),
+            'LED pixels: %d written, %d unchanged' % (self.pixels_written.value, self.pixels_skipped.value)])
@@ -20,6 +20,8 @@ class Location:
 class General:
     simulation_speed: int = 1  # Simulation speed (1 = realtime)
     plotting: bool = True  # Plot LEDs and skyplot
+    trail_minutes: float = 0.0  # Minutes of recent track shown behind each satellite in the skyplot (0 to disable)
+    prediction_minutes: float = 0.0  # Minutes of predicted track shown ahead of each satellite in the skyplot (0 to disable)
     location: Location = Location  # The location to compute the visibilities for
 
 
@@ -34,6 +36,39 @@ class Ntrip:
     ntrip_v2: bool = False  # Make a NTRIP V2 Connection
     include_host_header: bool = False  # Include host header, should be on for IBSS
     username_password: str = 'anonymous:password'  # The username and password to connect with
+    unix_socket: str = ''  # Path of a Unix socket to connect to (e.g. of a local relay) instead of the address and port
+
+
+# Settings related to the local RTCM relay
+@dataclass
+class Relay:
+    enabled: bool = False  # Run as relay, sharing one caster connection with local clients instead of driving a tree
+    address: str = '127.0.0.1'  # Address to listen on for local clients
+    port: int = 2102  # Port to listen on for local clients
+    unix_socket: str = ''  # Path of a Unix socket to listen on instead of the address and port
+    max_client_frames: int = 256  # Maximum number of frames queued per client before the oldest ones are dropped
+    message_types: List[int] = (1019, 1020, 1042, 1044, 1045, 1046)  # RTCM message types to relay (ephemerides)
+
+
+# Settings related to the web dashboard
+@dataclass
+class Dashboard:
+    enabled: bool = False  # Serve the web dashboard showing the skyplot and the LEDs
+    address: str = '127.0.0.1'  # Address to listen on for browsers, '0.0.0.0' to allow other devices
+    port: int = 8080  # Port to listen on for browsers
+    max_update_rate: float = 10.0  # Maximum number of updates per second sent to each browser
+
+
+# Settings related to the offline rendering of the skyplot and LED view
+@dataclass
+class Render:
+    enabled: bool = False  # Render a simulated time range to images instead of driving a tree
+    start: str = ''  # Start of the time range in UTC (e.g. "2025-01-01T00:00:00"), empty for the current time
+    duration_hours: float = 24.0  # Length of the time range in hours
+    step: float = 60.0  # Simulated time in seconds between two frames
+    workers: int = 0  # Number of worker processes, each rendering a slice of the time range (0 for one per CPU)
+    output_dir: str = 'frames'  # Directory to write the frames to
+    width: int = 10  # Number of LEDs per row in the LED view
 
 
 # General settings related to the LED strip
@@ -47,7 +82,9 @@ class GeneralLEDSettings:
     invert_signal: bool = False  # True to invert the signal (when using NPN transistor level shift)
     channel: int = 0  # set to '1' for GPIOs 13, 19, 41, 45 or 53
     led_strip_type: str = "WS2811_STRIP_RGB"  # The type of LED strip, see https://github.com/HarmvZ/rpi_ws281x_mock/blob/master/rpi_ws281x/rpi_ws281x_mock.py#L128
-    update_interval: float = 1.0  # Update interval of the satellite LEDs in seconds
+    backend: str = "pixelstrip"  # LED output: "pixelstrip" for the GPIO pins, "network" for DDP/E1.31 or "virtual"
+    recording: str = ""  # File to record the frames shown on the virtual strip to (empty to disable)
+    frame_rate: float = 30.0  # Frame rate of the LED output in frames per second
     plane_interval: float = 1.0  # Interval for the plane LEDs
 
 
@@ -63,11 +100,36 @@ class SatellitesLEDSettings:
     min_elev_brightness: int = 127  # Brightness corresponding to the minimum elevation
     max_elev: float = 90  # Maximum elevation
     max_elev_brightness: int = 255  # Brightness corresponding to the maximum elevation
+    gamma: float = 1.0  # Gamma correction applied to the satellite brightness (1.0 to disable)
     orbit_plane_a: List[int] = (41, 42, 43, 44, 45)  # LED numbers corresponding to orbital plane A
     orbit_plane_b: List[int] = (51, 52, 53, 54, 55)  # LED numbers corresponding to orbital plane B
     orbit_plane_c: List[int] = (61, 62, 63, 64, 65)  # LED numbers corresponding to orbital plane C
     map_prns: List[int] = (1, 2, 3)
     map_leds: List[int] = (0, 1, 2)
+    geometry_file: str = ""  # CSV file with the 3D LED coordinates, to map satellites by sky position instead
+
+
+# Settings for the network LED output, sending the frames to an LED controller over UDP
+@dataclass
+class NetworkLEDSettings:
+    protocol: str = "ddp"  # Protocol of the network LED output: "ddp" or "e131" (sACN)
+    address: str = "127.0.0.1"  # Address of the LED controller (e.g. WLED) receiving the frames
+    port: int = 0  # UDP port of the LED controller, 0 for the default port of the protocol
+    start_universe: int = 1  # First E1.31 universe, every universe holds 170 LEDs
+    max_frame_rate: float = 40.0  # Maximum number of frames per second sent to the LED controller
+
+
+@dataclass
+class Segment:
+    led_count: int = 0  # Number of LEDs of the segment, which follow the LEDs of the previous segments
+    backend: str = "pixelstrip"  # LED output of the segment: "pixelstrip", "network" or "virtual"
+    gpio_pin: int = 18  # GPIO pin connected to the pixels of the segment (pixelstrip output)
+    dma_channel: int = 10  # DMA channel to use for the segment (pixelstrip output)
+    channel: int = 0  # PWM channel of the segment, '1' for GPIOs 13, 19, 41, 45 or 53 (pixelstrip output)
+    address: str = "127.0.0.1"  # Address of the LED controller of the segment (network output)
+    port: int = 0  # UDP port of the LED controller, 0 for the default port of the protocol (network output)
+    start_universe: int = 1  # First E1.31 universe of the segment (network output)
+    recording: str = ""  # File to record the frames of the segment to, empty to disable (virtual output)
 
 
 # Settings related to the LED strip
@@ -75,6 +137,8 @@ class SatellitesLEDSettings:
 class LEDs:
     general: GeneralLEDSettings = GeneralLEDSettings  # General settings related to the LED strip
     satellites: SatellitesLEDSettings = SatellitesLEDSettings  # Settings for the LEDs related to the satellites
+    network: NetworkLEDSettings = NetworkLEDSettings  # Settings for the network LED output
+    segments: List[Segment] = ()  # Segments of the LEDs driven by separate outputs, empty to use the general output
 
 
 # Class containing the complete configuration
@@ -82,4 +146,7 @@ class LEDs:
 class Config:
     general: General = General  # General settings
     ntrip: Ntrip = Ntrip  # Settings related to the NTRIP Client and Caster
+    relay: Relay = Relay  # Settings related to the local RTCM relay
+    dashboard: Dashboard = Dashboard  # Settings related to the web dashboard
+    render: Render = Render  # Settings related to the offline rendering
     leds: LEDs = LEDs  # Settings related to the LED strip
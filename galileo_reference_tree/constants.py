@@ -6,8 +6,28 @@
 from math import pi
 
 # Loop intervals
-PROPAGATION_INTERVAL = 0.1  # Update interval in seconds for the satellite coordinates
+PROPAGATION_INTERVAL = 1.0  # Update interval in seconds for the satellite coordinates, the LEDs extrapolate in between
 PLOTTING_INTERVAL = 0.1  # Update interval in seconds for the skyplot and LED plot
+SKYPLOT_PROPAGATION_INTERVAL = 10.0  # Update interval in seconds for satellites only shown in the skyplots
+LED_PROPAGATION_MAX_INTERVAL = 60.0  # Maximum interval in seconds between the updates of a satellite on the LEDs
+COMPOSITOR_IDLE_INTERVAL = 0.25  # Maximum time in seconds the LEDs wait for a state change after an unchanged frame
+LOOP_LAG_INTERVAL = 0.5  # Interval in seconds at which the scheduling latency of the event loop is sampled
+
+# Plotting
+SKYPLOT_LABEL_STEP = 0.5  # Movement in degrees of azimuth or elevation after which the skyplot labels are redrawn
+TRACK_SAMPLE_INTERVAL = 30  # Interval in seconds between the samples of the satellite trails and predicted tracks
+SHARED_STATE_READ_RETRIES = 100  # Attempts of the plotting process to read a consistent snapshot of the shared state
+
+# LED layer priorities, layers with a higher priority are drawn on top
+PLANE_LAYER_PRIORITY = 10  # Orbital plane animations
+SATELLITE_LAYER_PRIORITY = 20  # Satellites
+OVERLAY_LAYER_PRIORITY = 30  # Overlays drawn on top of everything else
+
+# LED color lookup tables
+ELEV_LUT_STEPS_PER_DEG = 10  # Number of brightness lookup table entries per degree of elevation
+HEALTH_FADE_DURATION = 1.0  # Time in seconds to cross-fade a satellite LED to the color of its new signal health
+GEOMETRY_GRID_STEPS_PER_DEG = 1  # Number of cells per degree of azimuth and elevation of the LED geometry lookup grid
+PLANE_LUT_STEPS_PER_DEG = 10  # Number of orbital plane lookup table entries per degree of argument of latitude
 
 # Natural & WGS84 Constants
 MU_EARTH = 3.986004418e14  # Standard gravitational parameter in m^3/s^2
@@ -16,6 +36,9 @@ SEC_IN_HOUR = 3600  # Number of seconds in an hour
 HOURS_IN_DAY = 24  # Number of hours in a day
 DAYS_IN_WEEK = 7  # Number of days in a week
 SEC_IN_WEEK = DAYS_IN_WEEK * HOURS_IN_DAY * SEC_IN_HOUR  # Number of seconds in a week
+SEC_IN_DAY = HOURS_IN_DAY * SEC_IN_HOUR  # Number of seconds in a day
+MIN_IN_DAY = HOURS_IN_DAY * 60  # Number of minutes in a day
+GPS_EPOCH_JD = 2444244.5  # Julian date of the GPS epoch (1980-01-06 00:00:00)
 SPEED_OF_LIGHT = 2.99792458e8  # Speed of light in m/s
 WGS84_SEMI_MAJOR_AXIS = 6378137  # Semi-major axis of the WGS84 ellipsoid
 WGS84_FIRST_ECCENTRICITY_SQUARED = 6.69437999014e-3  # First eccentricity squared of the WGS84 ellipsoid
@@ -24,6 +47,14 @@ DEG_TO_RAD = pi / 180  # Degrees to radians
 
 # Constellation constants
 DF_GALILEO_EPH = 1046  # RTCM message number for Galileo Ephemeris data
+RTCM_PREAMBLE = 0xd3  # First byte of every RTCM3 frame
+RTCM_HEADER_SIZE = 3  # Preamble, 6 reserved bits and the 10-bit payload length
+RTCM_CRC_SIZE = 3  # Size of the CRC-24Q at the end of every frame
 MAX_SATS = 36  # Maximum number of satellites to mode
 GPS_WEEKS_ROLLOVER = 1024  # Number of weeks before a GPS rollover
-TLE_MAX_AGE = 10  # Maximum data age in days at which to check for new TLE data
+TLE_MAX_AGE = 10  # Maximum data age in days at which to check for new TLE data on startup
+TLE_REFRESH_INTERVAL = 12 * SEC_IN_HOUR  # Interval in seconds at which to check for new TLE data while running
+TLE_CHECK_INTERVAL = 60  # Interval in seconds at which the background refresh checks if a refresh is due
+GSAT_MAP_MAX_AGE = 30  # Maximum age in days of the cached GSAT to SVID mapping before refreshing it
+GSAT_MAP_RETRY_INTERVAL = 60  # Interval in seconds before retrying a failed refresh of the GSAT to SVID mapping
+GSAT_MAP_MAX_RETRY_INTERVAL = 6 * SEC_IN_HOUR  # Maximum retry interval in seconds, as it doubles after every failure
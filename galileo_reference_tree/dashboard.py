@@ -0,0 +1,404 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import time
+
+import numpy as np
+
+from galileo_reference_tree import constants, metrics, statehub
+from galileo_reference_tree.config import Dashboard as DashboardConfig
+
+DASHBOARD_PAGE = os.path.join(os.path.dirname(__file__), 'dashboard.html')  # Page served to the browsers
+WEBSOCKET_PATH = '/ws'  # Path on which the browsers open the WebSocket
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'  # Fixed GUID of the WebSocket handshake (RFC 6455)
+OPCODE_BINARY = 0x2  # WebSocket opcode of a binary message
+OPCODE_CLOSE = 0x8  # WebSocket opcode of a close message
+OPCODE_PING = 0x9  # WebSocket opcode of a ping message
+OPCODE_PONG = 0xa  # WebSocket opcode of a pong message
+MAX_REQUEST_SIZE = 8192  # Maximum size in bytes of the HTTP request headers
+MAX_FRAME_SIZE = 4096  # Maximum payload size in bytes of the WebSocket frames accepted from browsers
+CLOSE_MESSAGE_TOO_BIG = 1009  # WebSocket close status sent when a browser sends a frame above MAX_FRAME_SIZE
+MESSAGE_FULL = 1  # Message type of a complete state, sent to newly connected browsers
+MESSAGE_DELTA = 2  # Message type of the changes since the previous message
+MESSAGE_HEADER = struct.Struct('<BHH')  # Message type, number of satellite records and number of LED records
+SAT_RECORD = np.dtype([('idx', '<u1'), ('az', '<u2'), ('el', '<i2'), ('health', '<i1')])  # Az/elev in 0.01 degrees
+LED_RECORD = np.dtype([('idx', '<u2'), ('rgb', '<u1', (3,))])  # LED index and its red, green and blue values
+ELEV_UNKNOWN = -32768  # Elevation of a satellite which has not been propagated yet
+STATE_HISTORY = 64  # Number of recent states kept to compute the deltas for browsers which fell behind
+
+
+def websocket_accept(key):
+    """
+    Computes the accept value of the WebSocket handshake, proving to the browser that the server speaks WebSocket.
+
+    Parameters:
+        key (str): The Sec-WebSocket-Key header sent by the browser.
+
+    Returns:
+        str: The value of the Sec-WebSocket-Accept header.
+    """
+    return base64.b64encode(hashlib.sha1(key.encode() + WEBSOCKET_GUID).digest()).decode()
+
+
+def encode_websocket_frame(payload, opcode=OPCODE_BINARY):
+    """
+    Encodes a single unmasked WebSocket frame, as sent from server to browser.
+
+    Parameters:
+        payload (bytes): The payload of the frame.
+        opcode (int, optional): The opcode of the frame. Defaults to a binary message.
+
+    Returns:
+        bytes: The encoded frame.
+    """
+    if len(payload) < 126:
+        header = struct.pack('!BB', 0x80 | opcode, len(payload))
+    elif len(payload) < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, len(payload))
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, len(payload))
+    return header + payload
+
+
+async def read_websocket_frame(reader, max_size=MAX_FRAME_SIZE):
+    """
+    Reads a single WebSocket frame sent by a browser, which are always masked. The size of the payload is checked
+    before reading it, so a client cannot make the dashboard allocate an arbitrary amount of memory.
+
+    Parameters:
+        reader (asyncio.StreamReader): The stream to read from.
+        max_size (int, optional): The maximum size of the payload in bytes. Defaults to MAX_FRAME_SIZE.
+
+    Returns:
+        tuple[int, bytes]: The opcode and the unmasked payload of the frame.
+
+    Raises:
+        ValueError: If the payload is larger than the maximum size.
+    """
+    first, second = await reader.readexactly(2)
+    size = second & 0x7f
+    if size == 126:
+        size, = struct.unpack('!H', await reader.readexactly(2))
+    elif size == 127:
+        size, = struct.unpack('!Q', await reader.readexactly(8))
+    if size > max_size:
+        raise ValueError("WebSocket frame of {0} bytes exceeds the maximum of {1} bytes".format(size, max_size))
+    mask = await reader.readexactly(4) if second & 0x80 else b'\x00' * 4
+    payload = np.frombuffer(await reader.readexactly(size), dtype=np.uint8)
+    unmasked = payload ^ np.resize(np.frombuffer(mask, dtype=np.uint8), size)
+    return first & 0x0f, unmasked.tobytes()
+
+
+def encode_message(message_type, sats, sat_indices, leds, led_indices):
+    """
+    Encodes a message with the given satellite and LED records.
+
+    Parameters:
+        message_type (int): The type of the message, MESSAGE_FULL or MESSAGE_DELTA.
+        sats (np.ndarray): The SAT_RECORD of every satellite.
+        sat_indices (np.ndarray): The indices of the satellites to include.
+        leds (np.ndarray): The 24-bit color of every LED.
+        led_indices (np.ndarray): The indices of the LEDs to include.
+
+    Returns:
+        bytes: The encoded message.
+    """
+    led_records = np.empty(len(led_indices), dtype=LED_RECORD)
+    led_records['idx'] = led_indices
+    colors = leds[led_indices]
+    led_records['rgb'] = np.stack([colors >> 16, colors >> 8, colors], axis=-1) & 0xff
+    return MESSAGE_HEADER.pack(message_type, len(sat_indices), len(led_indices)) + sats[sat_indices].tobytes() + \
+        led_records.tobytes()
+
+
+class DashboardClient(object):
+    """
+    A browser connected to the dashboard over a WebSocket.
+
+    Attributes:
+        writer (asyncio.StreamWriter): The stream to send the messages to.
+        sequence (int | None): The sequence number of the state sent last, None if nothing was sent yet.
+        last_send (float): The time.monotonic() value at which the last message was sent.
+    """
+
+    def __init__(self, writer):
+        """
+        Initializes the DashboardClient.
+
+        Parameters:
+            writer (asyncio.StreamWriter): The stream to send the messages to.
+        """
+        self.writer = writer
+        self.sequence = None
+        self.last_send = -np.inf
+
+
+class Dashboard(object):
+    """
+    A small web server showing the state of the tree in the browser: a skyplot of the satellites and a view of the
+    LEDs, without the desktop session needed for the matplotlib plots.
+
+    The page opens a WebSocket, over which the server streams compact binary messages. A browser first receives the
+    complete state, followed by deltas containing only the satellites and LEDs which changed since its previous
+    message. The state is sampled once per update for all browsers, and browsers which received the same state share
+    the same encoded delta, so additional viewers hardly cost any computation. Every browser receives at most the
+    configured number of updates per second; a browser which cannot keep up skips states and receives the combined
+    changes in its next delta.
+
+    Message layout (little-endian): a header with the message type (1 for a complete state, 2 for a delta) and the
+    number of satellite and LED records, followed by the satellite records (index, azimuth and elevation in 0.01
+    degrees, signal health) and the LED records (index, red, green, blue).
+
+    Attributes:
+        ephemeris (list[SatEphemeris]): The ephemeris of the satellites, providing their signal health.
+        azelev (list[list[float]]): The azimuth and elevation of each satellite, empty if not propagated yet.
+        ledstrip (StripBackend): The LED output to show.
+        config (Dashboard config object): The settings of the dashboard.
+        clients (list[DashboardClient]): The connected browsers.
+        sequence (int): The sequence number of the latest sampled state.
+        sats (np.ndarray): The SAT_RECORD of every satellite in the latest state.
+        leds (np.ndarray): The 24-bit color of every LED in the latest state.
+        history (dict): The recent states by sequence number, to compute the deltas for browsers which fell behind.
+        messages (dict): The encoded messages to the latest state, by the sequence number they start from.
+        state_changed (asyncio.Condition): Notified when a new state is sampled.
+        server (asyncio.Server): The server listening for browsers. Initially set to None.
+        hub (StateHub): The hub announcing the changes of the satellites and the LEDs.
+        messages_sent (Counter): Counter of the messages sent to browsers.
+        bytes_sent (Counter): Counter of the bytes sent to browsers.
+        messages_encoded (Counter): Counter of the encoded messages, shared by all browsers starting from the same state.
+        demand (PropagationDemand | None): The demand to declare all satellites in while browsers are connected.
+        demand_interval (float): The interval in seconds at which the satellites are demanded.
+    """
+
+    def __init__(self, ephemeris, azelev, ledstrip, dashboard_config: DashboardConfig, registry=None, hub=None,
+                 demand=None, demand_interval=constants.SKYPLOT_PROPAGATION_INTERVAL):
+        """
+        Initializes the Dashboard.
+
+        Parameters:
+            ephemeris (list[SatEphemeris]): The ephemeris of the satellites, providing their signal health.
+            azelev (list[list[float]]): The azimuth and elevation of each satellite, empty if not propagated yet.
+            ledstrip (StripBackend): The LED output to show.
+            dashboard_config (Dashboard config object): The settings of the dashboard.
+            registry (MetricsRegistry, optional): The registry to record the dashboard telemetry in. Defaults to the
+                application-wide registry.
+            hub (StateHub, optional): The hub announcing the changes of the satellites and the LEDs. Defaults to the
+                application-wide hub.
+            demand (PropagationDemand, optional): The demand to declare all satellites in while browsers are
+                connected, so they are only propagated for the dashboard while it is viewed. Not declared if not given.
+            demand_interval (float, optional): The interval in seconds at which the satellites are demanded.
+        """
+        self.ephemeris = ephemeris
+        self.azelev = azelev
+        self.ledstrip = ledstrip
+        self.config = dashboard_config
+        self.clients = []
+        self.sequence = 0
+        self.sats = np.zeros(len(azelev), dtype=SAT_RECORD)
+        self.leds = np.zeros(ledstrip.numPixels(), dtype=np.uint32)
+        self.history = {}
+        self.messages = {}
+        self.state_changed = None
+        self.server = None
+        self.hub = hub if hub is not None else statehub.hub
+        self.demand = demand
+        self.demand_interval = demand_interval
+
+        registry = registry if registry is not None else metrics.registry
+        registry.gauge("dashboard_clients", callback=lambda: len(self.clients))
+        self.messages_sent = registry.counter("dashboard_messages_sent_total")
+        self.bytes_sent = registry.counter("dashboard_bytes_sent_total")
+        self.messages_encoded = registry.counter("dashboard_messages_encoded_total")
+        self.sample()
+
+    def sample(self):
+        """
+        Samples the state of the satellites and the LEDs. A new sequence number is only assigned when the state
+        changed.
+
+        Returns:
+            bool: Whether the state changed.
+        """
+        sats = np.zeros(len(self.azelev), dtype=SAT_RECORD)
+        sats['idx'] = np.arange(len(self.azelev))
+        coords = np.array([self.azelev[satIdx][:2] if len(self.azelev[satIdx]) else (np.nan, np.nan)
+                           for satIdx in range(len(self.azelev))], dtype=float).reshape(-1, 2)
+        known = ~np.isnan(coords[:, 1])
+        sats['az'] = np.where(known, np.rint(np.nan_to_num(coords[:, 0]) % 360 * 100), 0)
+        sats['el'] = np.where(known, np.rint(np.nan_to_num(coords[:, 1]) * 100), ELEV_UNKNOWN)
+        sats['health'] = np.clip([self.ephemeris[satIdx].signalHealth for satIdx in range(len(self.azelev))],
+                                 -1, 127)
+        leds = np.array(self.ledstrip.get_pixels(), dtype=np.uint32)
+        if self.sequence in self.history and np.array_equal(sats, self.sats) and np.array_equal(leds, self.leds):
+            return False
+
+        self.sequence += 1
+        self.sats = sats
+        self.leds = leds
+        self.history[self.sequence] = (sats, leds)
+        self.history.pop(self.sequence - STATE_HISTORY, None)
+        self.messages = {}
+        return True
+
+    def get_message(self, sequence):
+        """
+        Encodes the message bringing a browser from the given state to the latest state. The message is encoded once
+        and shared by all browsers starting from the same state.
+
+        Parameters:
+            sequence (int | None): The sequence number of the state the browser has, None if it has no state yet.
+
+        Returns:
+            bytes: The encoded message.
+        """
+        if sequence not in self.history:
+            sequence = None
+        if sequence not in self.messages:
+            if sequence is None:
+                message = encode_message(MESSAGE_FULL, self.sats, np.arange(len(self.sats)), self.leds,
+                                         np.arange(len(self.leds)))
+            else:
+                sats, leds = self.history[sequence]
+                message = encode_message(MESSAGE_DELTA, self.sats, np.flatnonzero(sats != self.sats), self.leds,
+                                         np.flatnonzero(leds != self.leds))
+            self.messages[sequence] = message
+            self.messages_encoded.inc()
+        return self.messages[sequence]
+
+    async def sample_loop(self):
+        """
+        Samples the state whenever the hub announces a change, at most at the maximum update rate, and notifies the
+        browsers when it changed.
+        """
+        subscription = self.hub.subscribe_async(statehub.TOPIC_EPHEMERIS, statehub.TOPIC_AZELEV, statehub.TOPIC_FRAME)
+        try:
+            while True:
+                await subscription.wait()
+                if self.sample():
+                    async with self.state_changed:
+                        self.state_changed.notify_all()
+                await asyncio.sleep(1 / self.config.max_update_rate)
+        finally:
+            subscription.close()
+
+    async def send_loop(self, client):
+        """
+        Sends the latest state to a browser whenever it changed, at most at the maximum update rate.
+
+        Parameters:
+            client (DashboardClient): The browser to send to.
+        """
+        min_interval = 1 / self.config.max_update_rate
+        while True:
+            async with self.state_changed:
+                await self.state_changed.wait_for(lambda: client.sequence != self.sequence)
+            wait = client.last_send + min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            sequence = self.sequence
+            message = self.get_message(client.sequence)
+            client.writer.write(encode_websocket_frame(message))
+            await client.writer.drain()
+            client.sequence = sequence
+            client.last_send = time.monotonic()
+            self.messages_sent.inc()
+            self.bytes_sent.inc(len(message))
+
+    async def receive_loop(self, reader, writer):
+        """
+        Handles the frames sent by a browser until it closes the WebSocket: pings are answered, everything else is
+        ignored. A browser sending a frame above MAX_FRAME_SIZE is disconnected with status 1009 (message too big).
+
+        Parameters:
+            reader (asyncio.StreamReader): The stream to read from.
+            writer (asyncio.StreamWriter): The stream to send the answers to.
+        """
+        while True:
+            try:
+                opcode, payload = await read_websocket_frame(reader)
+            except ValueError:
+                writer.write(encode_websocket_frame(struct.pack('!H', CLOSE_MESSAGE_TOO_BIG), OPCODE_CLOSE))
+                return
+            if opcode == OPCODE_CLOSE:
+                writer.write(encode_websocket_frame(payload[:2], OPCODE_CLOSE))
+                return
+            if opcode == OPCODE_PING:
+                writer.write(encode_websocket_frame(payload, OPCODE_PONG))
+
+    async def handle_websocket(self, reader, writer, headers):
+        """
+        Completes the WebSocket handshake and streams the state to the browser until it disconnects.
+
+        Parameters:
+            reader (asyncio.StreamReader): The stream to read from.
+            writer (asyncio.StreamWriter): The stream to write to.
+            headers (dict): The HTTP request headers, with lowercase names.
+        """
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     b'Sec-WebSocket-Accept: %s\r\n\r\n' % websocket_accept(headers['sec-websocket-key']).encode())
+        await writer.drain()
+
+        client = DashboardClient(writer)
+        self.clients.append(client)
+        if self.demand is not None and len(self.clients) == 1:
+            self.demand.declare('dashboard', range(len(self.azelev)), self.demand_interval)
+        sender = asyncio.create_task(self.send_loop(client))
+        receiver = asyncio.create_task(self.receive_loop(reader, writer))
+        try:
+            await asyncio.wait([sender, receiver], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Stop the other task as well, ignoring the errors of the disconnected WebSocket
+            sender.cancel()
+            receiver.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+            self.clients.remove(client)
+            if self.demand is not None and not self.clients:
+                self.demand.withdraw('dashboard')
+
+    async def handle_connection(self, reader, writer):
+        """
+        Handles an HTTP connection: serves the dashboard page, or upgrades the connection to a WebSocket.
+
+        Parameters:
+            reader (asyncio.StreamReader): The stream to read from.
+            writer (asyncio.StreamWriter): The stream to write to.
+        """
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            lines = request.decode('latin-1').split('\r\n')
+            method, path, _ = lines[0].split(' ', 2)
+            headers = {name.strip().lower(): value.strip() for name, _, value in
+                       (line.partition(':') for line in lines[1:] if line)}
+
+            if method == 'GET' and path == WEBSOCKET_PATH and 'sec-websocket-key' in headers:
+                await self.handle_websocket(reader, writer, headers)
+            elif method == 'GET' and path == '/':
+                with open(DASHBOARD_PAGE, 'rb') as page:
+                    body = page.read()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                             b'Content-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+            else:
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """
+        Serves the dashboard until cancelled.
+        """
+        self.state_changed = asyncio.Condition()
+        self.server = await asyncio.start_server(self.handle_connection, self.config.address, self.config.port,
+                                                 limit=MAX_REQUEST_SIZE)
+        async with self.server:
+            await asyncio.gather(self.server.serve_forever(), self.sample_loop())
@@ -0,0 +1,791 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import abc
+import gzip
+import socket
+import struct
+import threading
+import time
+import uuid
+from collections import namedtuple
+from dataclasses import replace
+
+import numpy as np
+from rpi_ws281x import PixelStrip
+
+from galileo_reference_tree import metrics
+from galileo_reference_tree.config import GeneralLEDSettings, LEDs, NetworkLEDSettings, Segment
+
+RECORDING_MAGIC = b'GRTLEDS1'  # Identifies a frame recording, including the version of its format
+RECORDING_HEADER = struct.Struct('<8sI')  # Magic and number of LEDs
+RECORDING_FRAME = struct.Struct('<dI')  # Time in seconds since the start of the recording and number of changed LEDs
+
+DDP_PORT = 4048  # Default UDP port of DDP receivers
+DDP_HEADER = struct.Struct('>BBBBIH')  # Flags, sequence number, data type, destination, data offset and data length
+DDP_VERSION_1 = 0x40  # Flags indicating version 1 of the protocol
+DDP_PUSH = 0x01  # Flag on the last packet of a frame, telling the receiver to show the frame
+DDP_TYPE_RGB24 = 0x0b  # Data type of 8-bit RGB pixels
+DDP_DESTINATION_DISPLAY = 0x01  # Destination ID of the default output device
+DDP_MAX_DATA = 1440  # Maximum number of data bytes per DDP packet (480 RGB pixels)
+
+E131_PORT = 5568  # Default UDP port of E1.31 receivers
+E131_HEADER = struct.Struct('>HH12sHI16sHI64sBHBBHHBBHHHB')  # Root, framing and DMP layer of an E1.31 data packet
+E131_ACN_IDENTIFIER = b'ASC-E1.17\x00\x00\x00'  # Packet identifier of the ACN root layer
+E131_PIXELS_PER_UNIVERSE = 170  # Number of RGB pixels in a universe of 512 channels
+E131_PRIORITY = 100  # Default priority of the data
+E131_SOURCE_NAME = b'galileo_reference_tree'  # Name of the source in the framing layer
+
+NETWORK_KEEPALIVE_INTERVAL = 1.0  # Time in seconds after which an unchanged frame is sent again
+
+RGB = namedtuple('RGB', ['r', 'g', 'b'])
+
+
+def colors_to_rgb_bytes(colors):
+    """
+    Converts 24-bit colors to a sequence of red, green and blue bytes.
+
+    Parameters:
+        colors (np.ndarray): The 24-bit colors.
+
+    Returns:
+        bytes: The red, green and blue bytes of every color.
+    """
+    return colors.astype('>u4').view(np.uint8).reshape(-1, 4)[:, 1:].tobytes()
+
+
+def strip_type_to_int(strip_type: str):
+    """
+    Converts a given strip type string to its corresponding integer value for the rpi_ws281x library.
+
+    This function maps a string representation of an LED strip type to its associated
+    integer constant based on predefined mappings.
+
+    Parameters:
+        strip_type (str): The string representation of the LED strip type. Must match one of the keys in the strip_dictionary.
+
+    Returns:
+        int: The corresponding integer value of the supplied strip type.
+
+    Raises:
+        KeyError: If the provided strip_type does not exist in the strip_dictionary.
+    """
+    strip_dictionary = {"SK6812_STRIP_RGBW": 0x18100800,
+                        "SK6812_STRIP_RBGW": 0x18100008,
+                        "SK6812_STRIP_GRBW": 0x18081000,
+                        "SK6812_STRIP_GBRW": 0x18080010,
+                        "SK6812_STRIP_BRGW": 0x18001008,
+                        "SK6812_STRIP_BGRW": 0x18000810,
+                        "SK6812_SHIFT_WMASK": 0xf0000000,
+                        "WS2811_STRIP_RGB": 0x00100800,
+                        "WS2811_STRIP_RBG": 0x00100008,
+                        "WS2811_STRIP_GRB": 0x00081000,
+                        "WS2811_STRIP_GBR": 0x00080010,
+                        "WS2811_STRIP_BRG": 0x00001008,
+                        "WS2811_STRIP_BGR": 0x00000810,
+                        "WS2812_STRIP": 0x00081000,
+                        "SK6812_STRIP": 0x00081000,
+                        "SK6812W_STRIP": 0x18081000}
+    return strip_dictionary[strip_type]
+
+
+class StripBackend(abc.ABC):
+    """
+    Interface of the LED outputs the compositor writes its frames to.
+
+    Frames are written in bulk: the compositor sets the colors of the changed LEDs with set_pixels() and then shows
+    them all at once with show(). For plotting, the backends also offer the numPixels(), getPixelColorRGB() and
+    getBrightness() methods of the rpi_ws281x PixelStrip. The backends implement the abstract methods, while the others
+    have defaults, e.g. close() does nothing for outputs without resources.
+
+    Attributes:
+        blocking (bool): Whether show() blocks until the output took the frame, e.g. during the transfer to a strip.
+            The compositor then shows the frames from the hardware executor instead of the event loop.
+    """
+
+    blocking = True
+
+    @abc.abstractmethod
+    def numPixels(self):
+        """
+        Returns:
+            int: The number of LEDs of the output.
+        """
+
+    @abc.abstractmethod
+    def set_pixels(self, led_indices, colors):
+        """
+        Sets the colors of LEDs, which become visible on the next call to show().
+
+        Parameters:
+            led_indices (np.ndarray): The indices of the LEDs to set.
+            colors (np.ndarray): The 24-bit colors of the LEDs, in the same order.
+        """
+
+    @abc.abstractmethod
+    def show(self):
+        """
+        Shows the colors set since the last call to show().
+        """
+
+    @abc.abstractmethod
+    def get_pixels(self):
+        """
+        Returns:
+            np.ndarray: The 24-bit colors of all LEDs.
+        """
+
+    def getBrightness(self):
+        """
+        Returns:
+            int: The global brightness of the output, from 0 to 255.
+        """
+        return 255
+
+    def getPixelColorRGB(self, led_idx):
+        """
+        Parameters:
+            led_idx (int): The index of the LED.
+
+        Returns:
+            RGB: The red, green and blue components of the color of the LED.
+        """
+        color = int(self.get_pixels()[led_idx])
+        return RGB(color >> 16 & 0xff, color >> 8 & 0xff, color & 0xff)
+
+    def close(self):
+        """
+        Releases the resources of the output.
+        """
+
+
+class PixelStripBackend(StripBackend):
+    """
+    Drives a WS281x or SK6812 LED strip connected to the GPIO pins through the rpi_ws281x library.
+
+    Attributes:
+        strip (PixelStrip): The initialized LED strip object.
+    """
+
+    def __init__(self, general_config: GeneralLEDSettings):
+        """
+        Creates and initializes the LED strip.
+
+        Parameters:
+            general_config (GeneralLEDSettings config object): The general LED settings, including the strip settings.
+        """
+        self.strip = PixelStrip(general_config.led_count, general_config.gpio_pin, general_config.led_freq_hz,
+                                general_config.dma_channel, general_config.invert_signal,
+                                general_config.led_max_brightness, general_config.channel,
+                                strip_type_to_int(general_config.led_strip_type))
+        self.strip.begin()
+
+    def numPixels(self):
+        return self.strip.numPixels()
+
+    def set_pixels(self, led_indices, colors):
+        for led_idx, color in zip(led_indices.tolist(), colors.tolist()):
+            self.strip.setPixelColor(led_idx, color)
+
+    def show(self):
+        self.strip.show()
+
+    def get_pixels(self):
+        # Copy the LED buffer of the strip in one go, instead of reading the LEDs one by one
+        return np.array(self.strip.getPixels()[:self.strip.numPixels()], dtype=np.uint32)
+
+    def getBrightness(self):
+        return self.strip.getBrightness()
+
+    def getPixelColorRGB(self, led_idx):
+        return self.strip.getPixelColorRGB(led_idx)
+
+
+class VirtualBackend(StripBackend):
+    """
+    In-memory LED strip for development without hardware. Every shown frame can be recorded to a file, to benchmark,
+    compare and replay the LED output of (long) simulations.
+
+    Attributes:
+        pixels (np.ndarray): The colors set on the strip, which become visible on the next show().
+        shown (np.ndarray): The colors currently shown on the strip.
+        frames_shown (int): The number of frames shown.
+        recorder (FrameRecorder | None): The recorder writing the shown frames to a file, None if not recording.
+    """
+
+    blocking = False
+
+    def __init__(self, led_count, recording_path=''):
+        """
+        Initializes the virtual strip with all LEDs off.
+
+        Parameters:
+            led_count (int): The number of LEDs of the strip.
+            recording_path (str, optional): The file to record the shown frames to. Not recording if empty.
+        """
+        self.pixels = np.zeros(led_count, dtype=np.uint32)
+        self.shown = self.pixels.copy()
+        self.frames_shown = 0
+        self.recorder = FrameRecorder(recording_path, led_count) if recording_path else None
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def set_pixels(self, led_indices, colors):
+        self.pixels[led_indices] = colors
+
+    def show(self):
+        if self.recorder is not None:
+            changed = np.flatnonzero(self.pixels != self.shown)
+            self.recorder.record(changed, self.pixels[changed])
+        self.shown = self.pixels.copy()
+        self.frames_shown += 1
+
+    def get_pixels(self):
+        return self.shown
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+
+
+class DdpEncoder(object):
+    """
+    Encodes frames as DDP (Distributed Display Protocol) packets. A frame is split over as many packets as needed, of
+    which the last one carries the push flag so the receiver shows the complete frame at once.
+
+    Attributes:
+        default_port (int): The default UDP port of DDP receivers.
+        sequence (int): The sequence number of the last frame, cycling from 1 to 15.
+    """
+
+    default_port = DDP_PORT
+
+    def __init__(self):
+        """
+        Initializes the encoder.
+        """
+        self.sequence = 0
+
+    def encode(self, colors):
+        """
+        Encodes a frame.
+
+        Parameters:
+            colors (np.ndarray): The 24-bit colors of all LEDs.
+
+        Returns:
+            list[bytes]: The packets of the frame.
+        """
+        self.sequence = self.sequence % 15 + 1
+        data = colors_to_rgb_bytes(colors)
+        packets = []
+        for offset in range(0, len(data), DDP_MAX_DATA):
+            chunk = data[offset:offset + DDP_MAX_DATA]
+            flags = DDP_VERSION_1 | (DDP_PUSH if offset + DDP_MAX_DATA >= len(data) else 0)
+            packets.append(DDP_HEADER.pack(flags, self.sequence, DDP_TYPE_RGB24, DDP_DESTINATION_DISPLAY, offset,
+                                           len(chunk)) + chunk)
+        return packets
+
+
+class E131Encoder(object):
+    """
+    Encodes frames as E1.31 (sACN) data packets, with 170 RGB pixels per universe. The universes of a frame are
+    numbered consecutively from the start universe.
+
+    Attributes:
+        default_port (int): The default UDP port of E1.31 receivers.
+        start_universe (int): The universe of the first LEDs.
+        cid (bytes): The component identifier of this source.
+        sequence (int): The sequence number of the last frame.
+    """
+
+    default_port = E131_PORT
+
+    def __init__(self, start_universe):
+        """
+        Initializes the encoder.
+
+        Parameters:
+            start_universe (int): The universe of the first LEDs.
+        """
+        self.start_universe = start_universe
+        self.cid = uuid.uuid4().bytes
+        self.sequence = 0
+
+    def encode(self, colors):
+        """
+        Encodes a frame.
+
+        Parameters:
+            colors (np.ndarray): The 24-bit colors of all LEDs.
+
+        Returns:
+            list[bytes]: The packets of the frame, one per universe.
+        """
+        self.sequence = (self.sequence + 1) % 256
+        data = colors_to_rgb_bytes(colors)
+        universe_size = 3 * E131_PIXELS_PER_UNIVERSE
+        packets = []
+        for universe_idx, offset in enumerate(range(0, len(data), universe_size)):
+            chunk = data[offset:offset + universe_size]
+            n = len(chunk)
+            packets.append(E131_HEADER.pack(0x0010, 0x0000, E131_ACN_IDENTIFIER, 0x7000 | (110 + n), 0x00000004,
+                                            self.cid,
+                                            0x7000 | (88 + n), 0x00000002, E131_SOURCE_NAME, E131_PRIORITY, 0,
+                                            self.sequence, 0, self.start_universe + universe_idx,
+                                            0x7000 | (11 + n), 0x02, 0xa1, 0x0000, 0x0001, n + 1, 0x00) + chunk)
+        return packets
+
+
+class NetworkBackend(StripBackend):
+    """
+    Sends the frames over UDP to an LED controller, such as WLED, using DDP or E1.31. This allows a central machine to
+    drive LED controllers over the network instead of a strip on its own GPIO pins.
+
+    The frames are sent by a separate thread, so a slow network never stalls the compositor. The thread sends at most
+    the configured number of frames per second: frames shown in between are combined and only the latest one is sent.
+    Unchanged frames are sent again every NETWORK_KEEPALIVE_INTERVAL, as E1.31 receivers drop sources which go silent.
+
+    Attributes:
+        config (NetworkLEDSettings config object): The settings of the network output.
+        pixels (np.ndarray): The colors set on the strip, which become visible on the next show().
+        shown (np.ndarray): The colors of the last shown frame.
+        encoder (DdpEncoder | E131Encoder): The encoder of the configured protocol.
+        socket (socket): The UDP socket to send the packets with.
+        destination (tuple[str, int]): The address and port of the LED controller.
+        condition (threading.Condition): Condition used to wake up the sender thread when a frame is shown.
+        pending (bool): Whether a shown frame is waiting to be sent.
+        closed (bool): Whether the backend is closed.
+    """
+
+    blocking = False
+
+    def __init__(self, led_count, network_config: NetworkLEDSettings, registry=None):
+        """
+        Initializes the network output and starts the sender thread.
+
+        Parameters:
+            led_count (int): The number of LEDs driven over the network.
+            network_config (NetworkLEDSettings config object): The settings of the network output.
+            registry (MetricsRegistry, optional): The registry to record the sent packets and frames in. Defaults to
+                the application-wide registry.
+
+        Raises:
+            KeyError: If the configured protocol does not exist.
+        """
+        self.config = network_config
+        self.pixels = np.zeros(led_count, dtype=np.uint32)
+        self.shown = self.pixels.copy()
+        encoders = {"ddp": DdpEncoder,
+                    "e131": lambda: E131Encoder(network_config.start_universe)}
+        self.encoder = encoders[network_config.protocol]()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.destination = (network_config.address, network_config.port or self.encoder.default_port)
+        self.condition = threading.Condition()
+        self.pending = False
+        self.closed = False
+
+        registry = registry if registry is not None else metrics.registry
+        self.frames_sent = registry.counter("led_network_frames_sent_total")
+        self.frames_combined = registry.counter("led_network_frames_combined_total")
+        self.packets_sent = registry.counter("led_network_packets_sent_total")
+        self.send_errors = registry.counter("led_network_send_errors_total")
+        self.bytes_sent = registry.meter("led_network_bytes_per_second")
+
+        threading.Thread(target=self.send_loop, daemon=True).start()
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def set_pixels(self, led_indices, colors):
+        self.pixels[led_indices] = colors
+
+    def show(self):
+        with self.condition:
+            if self.pending:
+                self.frames_combined.inc()
+            self.shown = self.pixels.copy()
+            self.pending = True
+            self.condition.notify()
+
+    def get_pixels(self):
+        return self.shown
+
+    def send_frame(self, colors):
+        """
+        Encodes a frame and sends all its packets to the LED controller.
+
+        Parameters:
+            colors (np.ndarray): The 24-bit colors of all LEDs.
+        """
+        for packet in self.encoder.encode(colors):
+            try:
+                self.socket.sendto(packet, self.destination)
+            except OSError:
+                self.send_errors.inc()
+                continue
+            self.packets_sent.inc()
+            self.bytes_sent.mark(len(packet))
+        self.frames_sent.inc()
+
+    def send_loop(self):
+        """
+        Sends the latest shown frame whenever a frame is shown, at most at the configured frame rate, and repeats the
+        last frame if nothing was shown for NETWORK_KEEPALIVE_INTERVAL. Runs until the backend is closed.
+        """
+        frame_interval = 1 / self.config.max_frame_rate
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.closed, timeout=NETWORK_KEEPALIVE_INTERVAL)
+                if self.closed:
+                    return
+                colors = self.shown
+                self.pending = False
+            self.send_frame(colors)
+            time.sleep(frame_interval)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.socket.close()
+
+
+class SegmentWorker(object):
+    """
+    Output worker of a single segment of a SegmentedBackend, pushing the frames of the segment to its backend in a
+    thread of its own.
+
+    Attributes:
+        backend (StripBackend): The LED output of the segment.
+        start (int): The index of the first LED of the segment in the logical address space.
+        end (int): The index after the last LED of the segment in the logical address space.
+        condition (threading.Condition): Condition used to wake up the worker when a frame is pushed.
+        changes (tuple[np.ndarray, np.ndarray] | None): The LED indices within the segment and colors of the pushed
+            frame, None if no frame is waiting.
+        done (threading.Event): Set when the last pushed frame has been shown.
+        error (Exception | None): The exception raised by the backend while showing the last pushed frame.
+        closed (bool): Whether the worker is stopped.
+        show_time (Histogram): Time in seconds the backend took to show a frame of the segment.
+    """
+
+    def __init__(self, backend: StripBackend, start, registry, segment_idx):
+        """
+        Initializes the worker and starts its thread.
+
+        Parameters:
+            backend (StripBackend): The LED output of the segment.
+            start (int): The index of the first LED of the segment in the logical address space.
+            registry (MetricsRegistry): The registry to record the show time of the segment in.
+            segment_idx (int): The number of the segment, used as label of its metrics.
+        """
+        self.backend = backend
+        self.start = start
+        self.end = start + backend.numPixels()
+        self.condition = threading.Condition()
+        self.changes = None
+        self.done = threading.Event()
+        self.done.set()
+        self.error = None
+        self.closed = False
+        self.show_time = registry.histogram("led_segment_show_time_seconds", segment=segment_idx)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def push(self, led_indices, colors):
+        """
+        Hands a frame to the worker to show.
+
+        Parameters:
+            led_indices (np.ndarray): The indices of the changed LEDs within the segment.
+            colors (np.ndarray): The 24-bit colors of the changed LEDs, in the same order.
+        """
+        with self.condition:
+            self.done.clear()
+            self.changes = (led_indices, colors)
+            self.condition.notify()
+
+    def wait(self):
+        """
+        Waits until the last pushed frame has been shown.
+
+        Raises:
+            Exception: The exception raised by the backend while showing the frame.
+        """
+        self.done.wait()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def run(self):
+        """
+        Shows the pushed frames on the backend of the segment until the worker is closed.
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.changes is not None or self.closed)
+                if self.closed:
+                    return
+                led_indices, colors = self.changes
+                self.changes = None
+            show_start = time.perf_counter()
+            try:
+                self.backend.set_pixels(led_indices, colors)
+                self.backend.show()
+            except Exception as error:
+                self.error = error
+            self.show_time.observe(time.perf_counter() - show_start)
+            self.done.set()
+
+    def close(self):
+        """
+        Stops the worker and closes the backend of the segment.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.backend.close()
+
+
+class SegmentedBackend(StripBackend):
+    """
+    Maps a single logical LED address space onto several LED outputs, such as strips on different PWM or SPI channels
+    or network LED controllers. The segments follow each other in the address space.
+
+    Every segment has its own output worker. On show(), the changed LEDs of every segment are pushed to the workers,
+    which show their part of the frame in parallel, after which show() waits until all segments are done. Segments
+    without changes are not shown at all. This keeps the frame rate up as the number of LEDs grows, as long as the
+    outputs can run concurrently (e.g. network outputs, or drivers releasing the GIL while showing).
+
+    Attributes:
+        workers (list[SegmentWorker]): The output workers of the segments, in order of the address space.
+        pixels (np.ndarray): The colors set on the LEDs, which become visible on the next show().
+        shown (np.ndarray): The colors of the last shown frame.
+        blocking (bool): Whether any of the segments blocks while showing.
+    """
+
+    def __init__(self, backends, registry=None):
+        """
+        Initializes the segmented output and starts the workers of the segments.
+
+        Parameters:
+            backends (list[StripBackend]): The LED outputs of the segments, in order of the address space.
+            registry (MetricsRegistry, optional): The registry to record the show time per segment in. Defaults to the
+                application-wide registry.
+        """
+        registry = registry if registry is not None else metrics.registry
+        self.workers = []
+        start = 0
+        for segment_idx, backend in enumerate(backends):
+            self.workers.append(SegmentWorker(backend, start, registry, segment_idx))
+            start += backend.numPixels()
+        self.pixels = np.zeros(start, dtype=np.uint32)
+        self.shown = self.pixels.copy()
+        self.blocking = any(backend.blocking for backend in backends)
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def set_pixels(self, led_indices, colors):
+        self.pixels[led_indices] = colors
+
+    def show(self):
+        changed = np.flatnonzero(self.pixels != self.shown)
+        pushed = []
+        for worker in self.workers:
+            first, last = np.searchsorted(changed, [worker.start, worker.end])
+            if first == last:
+                continue
+            segment_changed = changed[first:last]
+            worker.push(segment_changed - worker.start, self.pixels[segment_changed])
+            pushed.append(worker)
+        for worker in pushed:
+            worker.wait()
+        self.shown = self.pixels.copy()
+
+    def get_pixels(self):
+        return self.shown
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
+
+
+class FrameRecorder(object):
+    """
+    Records frames to a gzip-compressed file. Only the LEDs which changed since the previous frame are stored, so the
+    recordings of long simulations remain compact.
+
+    The file starts with a header containing RECORDING_MAGIC and the number of LEDs. Every frame consists of the time
+    since the start of the recording, the number of changed LEDs, the indices of the changed LEDs and their new 24-bit
+    colors, all little-endian.
+
+    Attributes:
+        file (GzipFile): The opened recording.
+        start_time (float): The time.monotonic() value at which the recording started.
+    """
+
+    def __init__(self, path, led_count):
+        """
+        Creates the recording and writes its header.
+
+        Parameters:
+            path (str): The file to record to.
+            led_count (int): The number of LEDs of the recorded strip.
+        """
+        self.file = gzip.open(path, 'wb')
+        self.file.write(RECORDING_HEADER.pack(RECORDING_MAGIC, led_count))
+        self.start_time = time.monotonic()
+
+    def record(self, led_indices, colors):
+        """
+        Records a frame.
+
+        Parameters:
+            led_indices (np.ndarray): The indices of the LEDs which changed since the previous frame.
+            colors (np.ndarray): The new 24-bit colors of the changed LEDs, in the same order.
+        """
+        self.file.write(RECORDING_FRAME.pack(time.monotonic() - self.start_time, len(led_indices)))
+        self.file.write(led_indices.astype('<u4').tobytes())
+        self.file.write(colors.astype('<u4').tobytes())
+
+    def close(self):
+        """
+        Finishes the recording.
+        """
+        self.file.close()
+
+
+def read_recording(path):
+    """
+    Reads a recording made by the FrameRecorder. Reading stops at a frame which was not completely written, e.g.
+    because the recording was not closed.
+
+    Parameters:
+        path (str): The recording to read.
+
+    Yields:
+        tuple[float, np.ndarray]: The time in seconds since the start of the recording and the 24-bit colors of all
+            LEDs, for every recorded frame. The array is reused for the next frame.
+
+    Raises:
+        ValueError: If the file is not a frame recording.
+    """
+    with gzip.open(path, 'rb') as file:
+        magic, led_count = RECORDING_HEADER.unpack(file.read(RECORDING_HEADER.size))
+        if magic != RECORDING_MAGIC:
+            raise ValueError('%s is not a frame recording' % path)
+        frame = np.zeros(led_count, dtype=np.uint32)
+        try:
+            while True:
+                frame_header = file.read(RECORDING_FRAME.size)
+                if len(frame_header) < RECORDING_FRAME.size:
+                    return
+                timestamp, n_changed = RECORDING_FRAME.unpack(frame_header)
+                changes = file.read(8 * n_changed)
+                if len(changes) < 8 * n_changed:
+                    return
+                changes = np.frombuffer(changes, dtype='<u4')
+                frame[changes[:n_changed]] = changes[n_changed:]
+                yield timestamp, frame
+        except EOFError:
+            return
+
+
+def replay_recording(path, backend: StripBackend, speed=1.0):
+    """
+    Replays a recording on a backend, with the timing of the recording.
+
+    Parameters:
+        path (str): The recording to replay.
+        backend (StripBackend): The LED output to replay the recording on.
+        speed (float, optional): The replay speed, where 1 replays in real time.
+    """
+    start_time = time.monotonic()
+    led_indices = None
+    for timestamp, frame in read_recording(path):
+        if led_indices is None:
+            led_indices = np.arange(len(frame))
+        delay = start_time + timestamp / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        backend.set_pixels(led_indices, frame)
+        backend.show()
+
+
+def diff_recordings(path, golden_path):
+    """
+    Compares the frames of a recording with those of a golden recording, ignoring their timing.
+
+    Parameters:
+        path (str): The recording to check.
+        golden_path (str): The golden recording to compare with.
+
+    Returns:
+        list[int]: The numbers of the frames which differ, including frames present in only one of the recordings.
+    """
+    frames = [frame.copy() for _, frame in read_recording(path)]
+    golden_frames = [frame.copy() for _, frame in read_recording(golden_path)]
+    differing = [frame_nr for frame_nr, (frame, golden_frame) in enumerate(zip(frames, golden_frames))
+                 if not np.array_equal(frame, golden_frame)]
+    return differing + list(range(min(len(frames), len(golden_frames)), max(len(frames), len(golden_frames))))
+
+
+def get_settings(settings):
+    """
+    Returns a settings object of the configuration. Sections missing from the configuration file are left at their
+    default, which is the settings class itself rather than an instance of it.
+
+    Parameters:
+        settings (object | type): The settings, or the settings class of a missing section.
+
+    Returns:
+        object: The settings, as an instance of the settings class.
+    """
+    return settings() if isinstance(settings, type) else settings
+
+
+def create_segment_backend(led_config: LEDs, segment: Segment):
+    """
+    Creates the LED output of a segment, using the general and network LED settings with the settings of the segment
+    applied on top.
+
+    Parameters:
+        led_config (LEDs config object): LED configuration details.
+        segment (Segment config object): The settings of the segment.
+
+    Returns:
+        StripBackend: The created LED output of the segment.
+    """
+    general = replace(get_settings(led_config.general), led_count=segment.led_count, backend=segment.backend,
+                      gpio_pin=segment.gpio_pin, dma_channel=segment.dma_channel, channel=segment.channel,
+                      recording=segment.recording)
+    network = replace(get_settings(led_config.network), address=segment.address, port=segment.port,
+                      start_universe=segment.start_universe)
+    return create_backend(replace(led_config, general=general, network=network, segments=()))
+
+
+def create_backend(led_config: LEDs):
+    """
+    Creates the configured LED output. If segments are configured, every segment gets its own output, combined in a
+    SegmentedBackend. Otherwise, the output configured in the general LED settings is created.
+
+    Parameters:
+        led_config (LEDs config object): LED configuration details, including the backend to use and its settings.
+
+    Returns:
+        StripBackend: The created LED output.
+
+    Raises:
+        KeyError: If the configured backend does not exist.
+    """
+    if led_config.segments:
+        return SegmentedBackend([create_segment_backend(led_config, segment) for segment in led_config.segments])
+
+    general = led_config.general
+    backends = {"pixelstrip": lambda: PixelStripBackend(general),
+                "network": lambda: NetworkBackend(general.led_count, led_config.network),
+                "virtual": lambda: VirtualBackend(general.led_count, general.recording)}
+    return backends[general.backend]()
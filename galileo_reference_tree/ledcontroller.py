@@ -3,62 +3,249 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
-import itertools
-import time
-from itertools import cycle
+from math import floor
 
-from rpi_ws281x import PixelStrip, Color
+import numpy as np
+from rpi_ws281x import Color
 
+from galileo_reference_tree import constants
+from galileo_reference_tree.compositor import Compositor, Layer
 from galileo_reference_tree.config import LEDs
+from galileo_reference_tree.ledbackends import create_backend
+from galileo_reference_tree.ledgeometry import LedGeometry
+from galileo_reference_tree.propagationdemand import get_crossing_delays
 
 
-def strip_type_to_int(strip_type: str):
+def rotate_list(l, n):
     """
-    Converts a given strip type string to its corresponding integer value for the rpi_ws281x library.
+        Cyclically rotates the elements of a list left by a specified number of positions.
 
-    This function maps a string representation of an LED strip type to its associated
-    integer constant based on predefined mappings.
+        Args:
+            l (list): The list to be rotated.
+            n (int): The number of positions to rotate the list left by.
 
-    Parameters:
-        strip_type (str): The string representation of the LED strip type. Must match one of the keys in the strip_dictionary.
+        Returns:
+            list: The resulting list after rotation by `n` positions.
+    """
+    return l[n:] + l[:n]
 
-    Returns:
-        int: The corresponding integer value of the supplied strip type.
 
-    Raises:
-        KeyError: If the provided strip_type does not exist in the strip_dictionary.
+class PlaneLayer(Layer):
     """
-    strip_dictionary = {"SK6812_STRIP_RGBW": 0x18100800,
-                        "SK6812_STRIP_RBGW": 0x18100008,
-                        "SK6812_STRIP_GRBW": 0x18081000,
-                        "SK6812_STRIP_GBRW": 0x18080010,
-                        "SK6812_STRIP_BRGW": 0x18001008,
-                        "SK6812_STRIP_BGRW": 0x18000810,
-                        "SK6812_SHIFT_WMASK": 0xf0000000,
-                        "WS2811_STRIP_RGB": 0x00100800,
-                        "WS2811_STRIP_RBG": 0x00100008,
-                        "WS2811_STRIP_GRB": 0x00081000,
-                        "WS2811_STRIP_GBR": 0x00080010,
-                        "WS2811_STRIP_BRG": 0x00001008,
-                        "WS2811_STRIP_BGR": 0x00000810,
-                        "WS2812_STRIP": 0x00081000,
-                        "SK6812_STRIP": 0x00081000,
-                        "SK6812W_STRIP": 0x18081000}
-    return strip_dictionary[strip_type]
+    Layer showing an orbital plane through an animation of three LEDs moving along the LEDs of the plane. The LEDs
+    used for satellites are excluded from the animation.
 
+    The satellites mapped to LEDs of the plane are the members of the plane. When the argument of latitude of any of
+    them is known, the animation follows the real orbital motion: the LEDs of the plane represent its orbit, starting
+    at the ascending node with the first LED, and the middle LED moves forward along them with the argument of latitude
+    of the first member for which it is known, i.e. one revolution per orbit. To keep this cheap at the frame rate,
+    the three LEDs to light are precomputed for every step of the argument of latitude, so a frame takes one table
+    lookup. Without a known argument of latitude, the animation advances one LED every plane interval.
 
-def rotate_list(l, n):
+    Attributes:
+        led_indices (list[int]): The indices of the LEDs of the plane, excluding the LEDs used for satellites.
+        interval (float): The time in seconds between two animation steps without a known argument of latitude.
+        mid_color (int): The color of the middle LED of the animation.
+        early_late_color (int): The color of the first and last LED of the animation.
+        colors (np.ndarray): The colors of the early, middle and late LED of the animation.
+        arglat (list[float | None] | None): The argument of latitude in degrees of each satellite, None if unknown.
+        member_sat_indices (np.ndarray): The indices of the satellites mapped to LEDs of the plane.
+        angle_lut (np.ndarray): The indices of the early, middle and late LED for each step of the angle along the
+            plane.
     """
-        Cyclically rotates the elements of a list left by a specified number of positions.
 
-        Args:
-            l (list): The list to be rotated.
-            n (int): The number of positions to rotate the list left by.
+    def __init__(self, led_indices, led_config: LEDs, priority=constants.PLANE_LAYER_PRIORITY, arglat=None):
+        """
+        Initializes the PlaneLayer.
+
+        Parameters:
+            led_indices (list[int]): A list of indices corresponding to LEDs to be used for the plane effect.
+            led_config (LEDs config object): LED configuration details, including the plane colors and interval.
+            priority (int, optional): The priority of the layer.
+            arglat (list[float | None], optional): The argument of latitude in degrees of each satellite, None if
+                unknown. The list is read every frame, so it may be updated while rendering. Defaults to the timed
+                animation only.
+        """
+        super().__init__(priority)
+
+        # Only keep the LED indices which are not already satellites
+        self.led_indices = [x for x in led_indices if x not in led_config.satellites.map_leds]
+        self.interval = led_config.general.plane_interval
+
+        self.mid_color = Color(*led_config.satellites.color_plane)
+        color_with_brightness = [round(i * led_config.satellites.brightness_early_late_plane) for i in
+                                 led_config.satellites.color_plane]
+        self.early_late_color = Color(*color_with_brightness)
+        self.colors = np.array([self.early_late_color, self.mid_color, self.early_late_color], dtype=np.uint32)
+
+        # The LEDs of the plane are spread evenly over the orbit, starting at the first LED
+        led_angles = {led_idx: 360 * position / len(led_indices) for position, led_idx in enumerate(led_indices)}
+        self.arglat = arglat
+        self.member_sat_indices = np.array([prn - 1 for prn, led_idx in zip(led_config.satellites.map_prns,
+                                                                            led_config.satellites.map_leds)
+                                            if led_idx in led_angles], dtype=int)
+        self.angle_lut = self.build_angle_lut(led_angles)
+
+    def build_angle_lut(self, led_angles):
+        """
+        Precomputes the LEDs of the animation for every step of the angle along the plane. The middle LED is the last
+        animated LED at or before the angle, the early and late LEDs are its neighbours.
+
+        Parameters:
+            led_angles (dict): The angle in degrees along the plane of every LED of the plane.
 
         Returns:
-            list: The resulting list after rotation by `n` positions.
+            np.ndarray: The indices of the early, middle and late LED for each step of the angle along the plane.
+        """
+        if not self.led_indices:
+            return np.empty((0, 3), dtype=int)
+        angles = np.arange(360 * constants.PLANE_LUT_STEPS_PER_DEG) / constants.PLANE_LUT_STEPS_PER_DEG
+        animated_angles = np.array([led_angles[led_idx] for led_idx in self.led_indices])
+        positions = np.searchsorted(animated_angles, angles, side='right') - 1
+        ring = np.array(self.led_indices)
+        n_leds = len(ring)
+        return np.stack([ring[(positions - 1) % n_leds], ring[positions % n_leds], ring[(positions + 1) % n_leds]],
+                        axis=-1)
+
+    def get_cursor_angle(self):
+        """
+        Determines the angle along the plane of the middle LED of the animation: the argument of latitude of the first
+        member satellite for which it is known, so the animation moves forward along the orbit with that satellite.
+
+        Returns:
+            float | None: The angle in degrees along the plane, None if no argument of latitude is known.
+        """
+        if self.arglat is None:
+            return None
+        for sat_idx in self.member_sat_indices:
+            if self.arglat[sat_idx] is not None:
+                return self.arglat[sat_idx] % 360
+        return None
+
+    def render(self, frame, elapsed):
+        """
+        Renders the current step of the plane animation.
+
+        Parameters:
+            frame (np.ndarray): The frame buffer, containing the 24-bit color of each LED.
+            elapsed (float): The time in seconds since the compositor started.
+        """
+        if not self.led_indices:
+            return
+        cursor_angle = self.get_cursor_angle()
+        if cursor_angle is not None:
+            frame[self.angle_lut[int(cursor_angle * constants.PLANE_LUT_STEPS_PER_DEG) % len(self.angle_lut)]] = \
+                self.colors
+            return
+        step = floor(elapsed / self.interval) % len(self.led_indices)
+        early, prompt, late = (rotate_list(self.led_indices, step) * 3)[1:4]
+        frame[early] = self.early_late_color
+        frame[prompt] = self.mid_color
+        frame[late] = self.early_late_color
+
+
+class SatelliteLayer(Layer):
     """
-    return l[n:] + l[:n]
+    Layer showing the satellites on their mapped LEDs, with a color based on their signal health and a brightness
+    based on their elevation.
+
+    The satellites are propagated at a much lower rate than the frame rate, only when their LED visibly changes next.
+    To fade smoothly without lagging behind, the layer extrapolates their azimuth and elevation from the latest
+    propagation at the rates estimated by the propagation demand, up to their next propagation. Changes in signal
+    health are cross-faded.
+
+    Attributes:
+        controller (LedController): The controller providing the satellite data, LED mapping and colors.
+        fade_from (np.ndarray): The [R,G,B] color each mapped satellite fades from after a health change.
+        fade_to (np.ndarray): The [R,G,B] color belonging to the current health of each mapped satellite.
+        fade_start (np.ndarray): The times at which the latest health change of each mapped satellite started.
+    """
+
+    def __init__(self, controller, priority=constants.SATELLITE_LAYER_PRIORITY):
+        """
+        Initializes the SatelliteLayer.
+
+        Parameters:
+            controller (LedController): The controller providing the satellite data, LED mapping and colors.
+            priority (int, optional): The priority of the layer.
+        """
+        super().__init__(priority)
+        self.controller = controller
+
+        n_sats = len(controller.mapped_sat_indices)
+        self.fade_from = None
+        self.fade_to = None
+        self.fade_start = np.full(n_sats, -np.inf)
+
+    def get_positions(self, elapsed):
+        """
+        Determines the azimuth and elevation of the mapped satellites to show. With a propagation demand, these are
+        extrapolated from the latest propagation by the demand. Without one, e.g. when rendering offline with a
+        propagation every frame, the latest propagated positions are shown.
+
+        Parameters:
+            elapsed (float): The time in seconds since the compositor started.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The azimuths and elevations, NaN for satellites not propagated yet.
+        """
+        controller = self.controller
+        if controller.demand is not None:
+            return controller.demand.extrapolate(controller.mapped_sat_indices,
+                                                 controller.compositor.start_time + elapsed).T
+        return np.array([controller.azelev[sat_idx][:2] if len(controller.azelev[sat_idx]) else (np.nan, np.nan)
+                         for sat_idx in controller.mapped_sat_indices], dtype=float).reshape(-1, 2).T
+
+    def fade_health_colors(self, signal_health, elapsed):
+        """
+        Determines the [R,G,B] color belonging to the health of each mapped satellite, cross-fading from the previous
+        color when the health changed.
+
+        Parameters:
+            signal_health (np.ndarray): The signal health status of the mapped satellites.
+            elapsed (float): The time in seconds since the compositor started.
+
+        Returns:
+            np.ndarray: The [R,G,B] color of each mapped satellite.
+        """
+        target = self.controller.get_health_colors(signal_health)
+        if self.fade_to is None:
+            self.fade_from = target.copy()
+            self.fade_to = target
+
+        fraction = np.clip((elapsed - self.fade_start) / constants.HEALTH_FADE_DURATION, 0, 1)[:, np.newaxis]
+        current = self.fade_from + (self.fade_to - self.fade_from) * fraction
+
+        # Start a new fade from the current color for the satellites of which the health changed
+        changed = np.any(target != self.fade_to, axis=1)
+        self.fade_from[changed] = current[changed]
+        self.fade_to = target
+        self.fade_start[changed] = elapsed
+        return current
+
+    def render(self, frame, elapsed):
+        """
+        Renders the LEDs of all mapped satellites with a known azimuth and elevation.
+
+        Parameters:
+            frame (np.ndarray): The frame buffer, containing the 24-bit color of each LED.
+            elapsed (float): The time in seconds since the compositor started.
+        """
+        controller = self.controller
+        health = np.array([controller.ephemeris[sat_idx].signalHealth for sat_idx in controller.mapped_sat_indices])
+
+        # Only draw the satellites which have been propagated
+        azimuths, elevations = self.get_positions(elapsed)
+        drawn = ~np.isnan(elevations)
+        colors = controller.scale_colors(self.fade_health_colors(health, elapsed), elevations)
+
+        if controller.geometry is None:
+            led_indices = controller.mapped_led_indices
+        else:
+            # Satellites share LEDs with the orbital planes and each other, so only draw the visible ones
+            drawn &= elevations >= controller.config.satellites.min_elev
+            led_indices = controller.geometry.nearest_leds(np.nan_to_num(azimuths), np.nan_to_num(elevations))
+        frame[led_indices[drawn]] = colors[drawn]
 
 
 class LedController(object):
@@ -67,46 +254,86 @@ class LedController(object):
 
     This class provides methods to initialize and configure an LED strip for representing satellite position, visibility,
     and signal health. It maps satellites to specific LEDs, adjusts LED brightness based on elevation, sets LED colors
-    based on signal status. It furthermore patterns for representing satellite orbital planes.
+    based on signal status. It furthermore patterns for representing satellite orbital planes. All LEDs are written by
+    a single compositor, which stacks a layer per orbital plane and a layer with the satellites on top.
 
     Attributes:
         max_sats (int): The maximum number of satellites supported.
         ephemeris (list[SatEphemeris]): Ephemeris data used for computing satellite positions and retrieving signal health.
         azelev (list[list[float]]): Azimuth and elevation data for satellite tracking.
         config (LEDs config object): Configuration for LEDs
+        arglat (list[float | None] | None): The argument of latitude in degrees of each satellite, driving the
+            orbital plane animations. None for timed plane animations.
+        demand (PropagationDemand | None): The demand propagating the satellites, of which the estimated rates are
+            used to extrapolate the satellites in between propagations. None to show the propagated positions only.
         prn_to_led_map (dict): Maps satellite IDs to LED indices.
-        ledstrip: The initialized LED strip object
+        geometry (LedGeometry | None): The 3D geometry of the LEDs, used to map the satellites to the LEDs nearest to
+            their position on the sky. None if the satellites are mapped through prn_to_led_map.
+        mapped_sat_indices (np.ndarray): The indices of the satellites which are mapped to an LED.
+        mapped_led_indices (np.ndarray): The LED indices of the mapped satellites, in the same order. Not used when
+            mapping through the geometry.
+        brightness_lut (np.ndarray): The brightness for each elevation step from -90 to 90 degrees.
+        scale_lut (np.ndarray): The factor to scale the satellite colors with for each elevation step, including the
+            cut-off below the minimum elevation and the gamma correction.
+        health_colors (np.ndarray): The [R,G,B] colors for healthy, unknown and unhealthy satellites.
+        step_elevations (np.ndarray): The sorted elevations at which the color of a satellite LED changes, i.e. the
+            brightness steps and the minimum elevation.
+        ledstrip (StripBackend): The LED output configured as backend, e.g. the LED strip or a virtual strip.
+        compositor (Compositor): The compositor owning the frame buffer of the LED strip.
     """
 
-    def __init__(self, max_sats, ephemeris, azelev, led_config: LEDs):
+    def __init__(self, max_sats, ephemeris, azelev, led_config: LEDs, arglat=None, demand=None):
         """
         Initializes the LedController
 
-        This constructor sets up the mapping of satellite IDs to LED indices, and initializes an LED strip with
-        given configuration parameters to control the lighting.
+        This constructor sets up the mapping of satellite IDs to LED indices, initializes an LED strip with
+        given configuration parameters to control the lighting, and stacks the orbital plane and satellite layers.
 
         Parameters:
             max_sats (int): The maximum number of satellites supported
             ephemeris (list[SatEphemeris]): Satellite ephemerides
             azelev (list[list[float]]): Azimuth and elevation data.
             led_config (LEDs config object): LED configuration details, including properties for mapping satellites and LED strip settings.
+            arglat (list[float | None], optional): The argument of latitude in degrees of each satellite, None if
+                unknown. Defaults to timed orbital plane animations.
+            demand (PropagationDemand, optional): The demand propagating the satellites, to extrapolate them in
+                between propagations. Defaults to showing the propagated positions only.
         """
         self.max_sats = max_sats
         self.ephemeris = ephemeris
         self.azelev = azelev
         self.config = led_config
+        self.arglat = arglat
+        self.demand = demand
 
         # Create dictionary to map PRN to LED indices
         self.prn_to_led_map = {led_config.satellites.map_prns[i]: led_config.satellites.map_leds[i] for i in
                                range(len(led_config.satellites.map_prns))}
-
-        # Create LED strip
-        strip = PixelStrip(led_config.general.led_count, led_config.general.gpio_pin,
-                           led_config.general.led_freq_hz, led_config.general.dma_channel,
-                           led_config.general.invert_signal, led_config.general.led_max_brightness,
-                           led_config.general.channel, strip_type_to_int(led_config.general.led_strip_type))
-        strip.begin()
-        self.ledstrip = strip
+        mapped = [(prn - 1, led_idx) for prn, led_idx in self.prn_to_led_map.items() if 0 < prn <= max_sats]
+        self.mapped_sat_indices = np.array([sat_idx for sat_idx, _ in mapped], dtype=int)
+        self.mapped_led_indices = np.array([led_idx for _, led_idx in mapped], dtype=int)
+
+        # With a geometry file, all satellites are mapped to the LED nearest to their position on the sky instead
+        self.geometry = None
+        if led_config.satellites.geometry_file:
+            self.geometry = LedGeometry.from_file(led_config.satellites.geometry_file)
+            self.mapped_sat_indices = np.arange(max_sats)
+
+        # Compile the color pipeline into lookup tables
+        self.brightness_lut, self.scale_lut = self.build_brightness_luts()
+        self.health_colors = np.array([led_config.satellites.color_healthy, led_config.satellites.color_unknown,
+                                       led_config.satellites.color_unhealthy], dtype=float)
+        self.step_elevations = self.build_step_elevations()
+
+        # Create the LED output
+        self.ledstrip = create_backend(led_config)
+
+        # Create the compositor with the layers for the orbital planes and the satellites on top
+        self.compositor = Compositor(self.ledstrip, led_config.general.frame_rate)
+        for orbit_plane in [led_config.satellites.orbit_plane_a, led_config.satellites.orbit_plane_b,
+                            led_config.satellites.orbit_plane_c]:
+            self.compositor.add_layer(PlaneLayer(orbit_plane, led_config, arglat=arglat))
+        self.compositor.add_layer(SatelliteLayer(self))
 
     def get_led_idx(self, sat_idx):
         """
@@ -128,106 +355,169 @@ class LedController(object):
             led_idx = -1
         return led_idx
 
-    def get_brightness(self, sat_idx):
+    def build_brightness_luts(self):
+        """
+        Compiles the mapping from elevation to brightness into lookup tables, with an entry for every elevation step
+        from -90 to 90 degrees.
+
+        The brightness follows a linear interpolation between the brightness range defined in the configuration,
+        where negative values are set to zero. From this, the factor to scale the satellite colors with is derived: the
+        brightness relative to the maximum LED brightness, set to zero below the minimum elevation and gamma corrected.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The brightness and the color scale factor for each elevation step.
+        """
+        satellites = self.config.satellites
+        elevations = np.arange(-90 * constants.ELEV_LUT_STEPS_PER_DEG, 90 * constants.ELEV_LUT_STEPS_PER_DEG + 1) / \
+            constants.ELEV_LUT_STEPS_PER_DEG
+
+        a = (satellites.max_elev_brightness - satellites.min_elev_brightness) / \
+            (satellites.max_elev - satellites.min_elev)
+        b = satellites.min_elev_brightness
+        brightness_lut = np.maximum(a * elevations + b, 0)
+
+        scale_lut = np.clip(brightness_lut / self.config.general.led_max_brightness, 0, 1) ** satellites.gamma
+        scale_lut[elevations < satellites.min_elev] = 0
+        return brightness_lut, scale_lut
+
+    def build_step_elevations(self):
+        """
+        Finds the elevations at which the color of a satellite LED changes, so the satellites only need to be
+        propagated when they reach one of them. Between two adjacent entries of the lookup tables, the color changes
+        if any channel of any of the health colors is scaled to another value. The satellites furthermore appear and
+        disappear at the minimum elevation.
+
+        Returns:
+            np.ndarray: The sorted elevations at which the color of a satellite LED changes.
+        """
+        elevations = np.arange(-90 * constants.ELEV_LUT_STEPS_PER_DEG, 90 * constants.ELEV_LUT_STEPS_PER_DEG + 1) / \
+            constants.ELEV_LUT_STEPS_PER_DEG
+        scaled = np.rint(self.health_colors[:, np.newaxis, :] * self.scale_lut[np.newaxis, :, np.newaxis])
+        changed = np.any(scaled[:, 1:] != scaled[:, :-1], axis=(0, 2))
+
+        # The elevations are rounded to the nearest entry, so the steps lie halfway between two entries. Below the
+        # minimum elevation the satellites are off, regardless of the entry they are rounded to.
+        steps = elevations[1:][changed] - 0.5 / constants.ELEV_LUT_STEPS_PER_DEG
+        steps = steps[steps > self.config.satellites.min_elev]
+        return np.unique(np.append(steps, self.config.satellites.min_elev))
+
+    def get_change_delays(self, sat_indices, azelev, rates):
+        """
+        Estimates the time until the LEDs of the satellites change, i.e. until they reach the next brightness step or
+        rise above or set below the minimum elevation. With a geometry, visible satellites may furthermore move to
+        another LED.
+
+        Parameters:
+            sat_indices (np.ndarray): The indices of the satellites.
+            azelev (np.ndarray): The azimuth and elevation in degrees of each of the satellites (n x 2).
+            rates (np.ndarray): The rates of change of the azimuth and elevation of each of the satellites in degrees
+                per second (n x 2).
+
+        Returns:
+            np.ndarray: The time in seconds until the LED of each of the satellites changes, inf if it does not.
+        """
+        delays = get_crossing_delays(azelev[:, 1], rates[:, 1], self.step_elevations)
+        if self.geometry is not None:
+            visible = azelev[:, 1] >= self.config.satellites.min_elev
+            cell_delays = self.geometry.get_cell_change_delays(azelev[:, 0], azelev[:, 1], rates[:, 0], rates[:, 1])
+            delays = np.where(visible, np.minimum(delays, cell_delays), delays)
+        return delays
+
+    def get_lut_idx(self, elevations):
+        """
+        Determines the lookup table entries corresponding to the given elevations.
+
+        Parameters:
+            elevations (np.ndarray): The elevations in degrees. NaN values are mapped to the lowest elevation.
+
+        Returns:
+            np.ndarray: The indices in the brightness lookup tables.
         """
-        Calculates the brightness level for a specific satellite based on its elevation.
+        steps = np.rint((np.nan_to_num(elevations, nan=-90) + 90) * constants.ELEV_LUT_STEPS_PER_DEG)
+        return np.clip(steps, 0, len(self.brightness_lut) - 1).astype(int)
 
-        The computation uses a linear interpolation between the satellite's elevation angle and
-        the brightness range defined in the configuration. If the computed brightness is
-        negative, it is set to zero.
+    def get_brightness(self, sat_idx):
+        """
+        Looks up the brightness level for a specific satellite based on its elevation.
 
         Parameters:
             sat_idx (int): Index of the satellite for which to compute the brightness.
 
         Returns:
-            float: Calculated brightness level for the given satellite.
+            float: Brightness level for the given satellite.
         """
-        elev = self.azelev[sat_idx][1]
+        return self.brightness_lut[self.get_lut_idx(self.azelev[sat_idx][1])]
 
-        a = (self.config.satellites.max_elev_brightness - self.config.satellites.min_elev_brightness) / \
-            (self.config.satellites.max_elev - self.config.satellites.min_elev)
-        b = self.config.satellites.min_elev_brightness
+    def get_health_colors(self, signal_health):
+        """
+        Looks up the [R,G,B] colors belonging to the signal health of the satellites.
 
-        brightness = a * elev + b
-        if brightness < 0:
-            brightness = 0
-        return brightness
+        Parameters:
+            signal_health (np.ndarray): The signal health status of the satellites. Acceptable values are 0
+                (healthy), -1 (unknown), and any other value representing an unhealthy status.
 
-    def set_sat_led(self, sat_idx, signal_health):
+        Returns:
+            np.ndarray: The [R,G,B] color of each satellite.
         """
-        Sets the color of the satellite LED based on the elevation and signal health.
+        health_idx = np.where(signal_health == 0, 0, np.where(signal_health == -1, 1, 2))
+        return self.health_colors[health_idx]
 
-        The method evaluates the satellite's elevation against the minimum elevation
-        threshold and assigns a LED color according to the signal health status if the
-        satellite is considered visible. It also adjusts the LED brightness based on the
-        elevation.
+    def scale_colors(self, colors, elevations):
+        """
+        Scales the [R,G,B] colors of the satellites with the brightness belonging to their elevation. Satellites below
+        the minimum elevation are off.
 
         Parameters:
-            sat_idx (int): The index of the satellite whose LED is to be set.
+            colors (np.ndarray): The [R,G,B] color of each satellite.
+            elevations (np.ndarray): The elevations of the satellites in degrees.
+
+        Returns:
+            np.ndarray: The 24-bit colors of the satellite LEDs.
+        """
+        # The cut-off is applied to the exact elevations, as they are rounded to the nearest entry of the lookup table
+        scale = np.where(np.asarray(elevations) >= self.config.satellites.min_elev,
+                         self.scale_lut[self.get_lut_idx(elevations)], 0)
+        rgb = np.rint(colors * scale[:, np.newaxis]).astype(np.uint32)
+        return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+    def get_sat_colors(self, elevations, signal_health):
+        """
+        Determines the colors of the satellite LEDs based on their elevation and signal health, for all satellites
+        at once.
+
+        Parameters:
+            elevations (np.ndarray): The elevations of the satellites in degrees.
+            signal_health (np.ndarray): The signal health status of the satellites. Acceptable values are 0
+                (healthy), -1 (unknown), and any other value representing an unhealthy status.
+
+        Returns:
+            np.ndarray: The 24-bit colors of the satellite LEDs.
+        """
+        return self.scale_colors(self.get_health_colors(signal_health), elevations)
+
+    def get_sat_color(self, sat_idx, signal_health):
+        """
+        Determines the color of a single satellite LED based on the elevation and signal health.
+
+        Parameters:
+            sat_idx (int): The index of the satellite whose LED color is to be determined.
             signal_health (int): The signal health status of the satellite. Acceptable
                 values are 0 (healthy), -1 (unknown), and any other value representing
                 an unhealthy status.
-        """
-        if self.azelev[sat_idx][1] < self.config.satellites.min_elev:
-            led_color = [0, 0, 0]
-        elif signal_health == 0:
-            led_color = self.config.satellites.color_healthy
-        elif signal_health == -1:
-            led_color = self.config.satellites.color_unknown
-        else:
-            led_color = self.config.satellites.color_unhealthy
-
-        brightness = self.get_brightness(sat_idx) / self.config.general.led_max_brightness
-        led_color_with_elev = [round(i * brightness) for i in led_color]
-        color = Color(*led_color_with_elev)
-        led_idx = self.get_led_idx(sat_idx)
 
-        # Only continue if the LED index is found
-        if led_idx >= 0:
-            self.ledstrip.setPixelColor(led_idx, color)
+        Returns:
+            int: The 24-bit color of the satellite LED.
+        """
+        colors = self.get_sat_colors(np.array([self.azelev[sat_idx][1]]), np.array([signal_health]))
+        return int(colors[0])
 
-    def show_plane(self, led_indices):
+    async def update_leds(self, executor=None):
         """
-        Updates and controls the display of LED patterns representing an orbital plane.
-        The method ensures that the LEDs specified for satellites are excluded and performs
-        cyclic LED activation with a configured colors and brightness. The sequence and timing
-        are controlled based on configuration settings.
+        Runs the compositor, which renders the orbital planes and the satellites to the LED strip indefinitely at the
+        configured frame rate.
 
         Parameters:
-            led_indices (list[int]): A list of indices corresponding to LEDs
-                                     to be used for the plane effect.
+            executor (concurrent.futures.Executor, optional): The executor to render the frames in, as writing to the
+                LED strip blocks. Defaults to the default executor of the event loop.
         """
-        # Only keep the LED indices which are not already satellites
-        led_indices = [x for x in led_indices if x not in self.config.satellites.map_leds]
-
-        mid_color = Color(*self.config.satellites.color_plane)
-        color_with_brightness = [round(i * self.config.satellites.brightness_early_late_plane) for i in
-                                 self.config.satellites.color_plane]
-        early_late_color = Color(*color_with_brightness)
-        reset_color = Color(0, 0, 0)
-
-        very_early_cycle_plane = cycle(led_indices)
-        early_cycle_plane = cycle(rotate_list(led_indices, 1))
-        prompt_cycle_plane = cycle(rotate_list(led_indices, 2))
-        late_cycle_plane = cycle(rotate_list(led_indices, 3))
-        very_late_cycle_plane = cycle(rotate_list(led_indices, 4))
-
-        for _ in itertools.count():
-            self.ledstrip.setPixelColor(next(very_early_cycle_plane), reset_color)
-            self.ledstrip.setPixelColor(next(early_cycle_plane), early_late_color)
-            self.ledstrip.setPixelColor(next(prompt_cycle_plane), mid_color)
-            self.ledstrip.setPixelColor(next(late_cycle_plane), early_late_color)
-            self.ledstrip.setPixelColor(next(very_late_cycle_plane), reset_color)
-            time.sleep(self.config.general.plane_interval)
-
-    def update_leds(self):
-        """
-        Updates LED states for satellites based on their signal health status and displays the
-        changes. This function iterates indefinitely, updating the LED strip at a fixed interval.
-        """
-        for _ in itertools.count():
-            for satIdx in range(self.max_sats):
-                if len(self.azelev[satIdx]):
-                    self.set_sat_led(satIdx, self.ephemeris[satIdx].signalHealth)
-            self.ledstrip.show()
-            time.sleep(self.config.general.update_interval)
+        await self.compositor.run(executor)
@@ -0,0 +1,133 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import numpy as np
+
+from galileo_reference_tree import constants
+from galileo_reference_tree.propagationdemand import get_crossing_delays
+
+
+def azelev_to_unit_vectors(azimuths, elevations):
+    """
+    Converts directions given by azimuth and elevation to unit vectors in a local east, north, up frame.
+
+    Parameters:
+        azimuths (np.ndarray): The azimuths in degrees, clockwise from north.
+        elevations (np.ndarray): The elevations in degrees.
+
+    Returns:
+        np.ndarray: The unit vectors, with the east, north and up components along the last axis.
+    """
+    az = np.radians(azimuths)
+    elev = np.radians(elevations)
+    return np.stack([np.cos(elev) * np.sin(az), np.cos(elev) * np.cos(az), np.sin(elev)], axis=-1)
+
+
+class LedGeometry(object):
+    """
+    Maps positions on the sky to the LEDs of a tree, based on the 3D coordinates of the LEDs.
+
+    The sky is wrapped around the tree: the azimuth of an LED is its direction from the trunk (the vertical axis
+    through the center of all LEDs) and its elevation grows linearly from 0 degrees at the lowest LED to 90 degrees at
+    the highest LED. The nearest LED of every cell of an azimuth/elevation grid is computed once, so finding the LEDs
+    of any number of sky positions only takes a table lookup.
+
+    Attributes:
+        led_indices (np.ndarray): The indices of the LEDs in the geometry.
+        led_azelev (np.ndarray): The azimuth and elevation in degrees assigned to each LED.
+        steps_per_deg (int): The number of grid cells per degree of azimuth and elevation.
+        grid (np.ndarray): The index of the nearest LED for every elevation (rows) and azimuth (columns) of the grid.
+    """
+
+    def __init__(self, led_indices, positions, steps_per_deg=constants.GEOMETRY_GRID_STEPS_PER_DEG):
+        """
+        Initializes the geometry and precomputes the lookup grid.
+
+        Parameters:
+            led_indices (np.ndarray): The indices of the LEDs.
+            positions (np.ndarray): The x (east), y (north) and z (up) coordinates of every LED, in any unit.
+            steps_per_deg (int, optional): The number of grid cells per degree of azimuth and elevation.
+        """
+        self.led_indices = np.asarray(led_indices, dtype=int)
+        positions = np.asarray(positions, dtype=float)
+        self.steps_per_deg = steps_per_deg
+
+        # Direction of every LED from the trunk, and its height scaled to an elevation
+        center = positions[:, :2].mean(axis=0)
+        azimuths = np.degrees(np.arctan2(positions[:, 0] - center[0], positions[:, 1] - center[1])) % 360
+        height = positions[:, 2] - positions[:, 2].min()
+        elevations = 90 * height / height.max() if height.max() else np.zeros(len(height))
+        self.led_azelev = np.stack([azimuths, elevations], axis=-1)
+
+        self.grid = self.build_grid()
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Reads the geometry from a CSV file with a header line, followed by one line per LED with its index and its
+        x (east), y (north) and z (up) coordinates.
+
+        Parameters:
+            path (str): The path of the geometry file.
+
+        Returns:
+            LedGeometry: The geometry described by the file.
+        """
+        data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+        return cls(data[:, 0].astype(int), data[:, 1:4])
+
+    def build_grid(self):
+        """
+        Computes the nearest LED for every cell of the grid, covering all azimuths and the elevations from 0 to 90
+        degrees. The nearest LED is the one with the smallest angle between its direction and the direction of the
+        cell.
+
+        Returns:
+            np.ndarray: The index of the nearest LED for every elevation (rows) and azimuth (columns) of the grid.
+        """
+        n_azimuths = 360 * self.steps_per_deg
+        azimuths = np.arange(n_azimuths) / self.steps_per_deg
+        led_vectors = azelev_to_unit_vectors(self.led_azelev[:, 0], self.led_azelev[:, 1])
+
+        grid = np.empty((90 * self.steps_per_deg + 1, n_azimuths), dtype=int)
+        for row in range(len(grid)):
+            cell_vectors = azelev_to_unit_vectors(azimuths, np.full(n_azimuths, row / self.steps_per_deg))
+            grid[row] = self.led_indices[np.argmax(cell_vectors @ led_vectors.T, axis=1)]
+        return grid
+
+    def nearest_leds(self, azimuths, elevations):
+        """
+        Looks up the nearest LED of every sky position. Elevations below 0 degrees are treated as 0 degrees.
+
+        Parameters:
+            azimuths (np.ndarray): The azimuths in degrees.
+            elevations (np.ndarray): The elevations in degrees.
+
+        Returns:
+            np.ndarray: The index of the nearest LED of every position.
+        """
+        rows = np.clip(np.rint(np.asarray(elevations) * self.steps_per_deg), 0, len(self.grid) - 1).astype(int)
+        columns = np.rint(np.asarray(azimuths) * self.steps_per_deg).astype(int) % self.grid.shape[1]
+        return self.grid[rows, columns]
+
+    def get_cell_change_delays(self, azimuths, elevations, azimuth_rates, elevation_rates):
+        """
+        Estimates the time until every sky position, moving at the given rates, moves into another cell of the grid,
+        i.e. until its nearest LED may change.
+
+        Parameters:
+            azimuths (np.ndarray): The azimuths in degrees.
+            elevations (np.ndarray): The elevations in degrees.
+            azimuth_rates (np.ndarray): The rates of change of the azimuths in degrees per second.
+            elevation_rates (np.ndarray): The rates of change of the elevations in degrees per second.
+
+        Returns:
+            np.ndarray: The time in seconds until every position moves into another cell, inf if it does not move.
+        """
+        # The cells are centered on the grid points, so their edges lie halfway in between, wrapping around in azimuth
+        elevation_edges = (np.arange(len(self.grid) - 1) + 0.5) / self.steps_per_deg
+        azimuth_edges = (np.arange(-1, self.grid.shape[1] + 1) + 0.5) / self.steps_per_deg
+        return np.minimum(get_crossing_delays(np.asarray(azimuths) % 360, azimuth_rates, azimuth_edges),
+                          get_crossing_delays(elevations, elevation_rates, elevation_edges))
@@ -0,0 +1,335 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import threading
+import time
+from bisect import bisect_left
+
+# Default histogram bucket upper bounds in seconds, suitable for per-message timings
+DEFAULT_TIME_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1)
+
+
+def format_labels(labels):
+    """
+    Formats a label dictionary as a Prometheus-style label string.
+
+    Parameters:
+        labels (dict): The labels of the metric.
+
+    Returns:
+        str: The formatted labels, e.g. '{prn="11"}', or an empty string if there are no labels.
+    """
+    if not labels:
+        return ''
+    return '{' + ','.join('%s="%s"' % (key, labels[key]) for key in sorted(labels)) + '}'
+
+
+class Counter(object):
+    """
+    A monotonically increasing counter.
+
+    Counters are only written by the thread owning the instrumented code path, so no locking is done on increments.
+
+    Attributes:
+        value (int | float): The current value of the counter.
+    """
+
+    def __init__(self):
+        """
+        Initializes the counter at zero.
+        """
+        self.value = 0
+
+    def inc(self, amount=1):
+        """
+        Increments the counter.
+
+        Parameters:
+            amount (int | float): The amount to increment the counter with. Defaults to 1.
+        """
+        self.value += amount
+
+    def sample(self):
+        """
+        Returns:
+            int | float: The current value of the counter.
+        """
+        return self.value
+
+
+class Gauge(object):
+    """
+    A value which can go up and down. The value is either set explicitly, or computed by a callback when sampled.
+
+    Attributes:
+        value (float): The last value set on the gauge.
+        callback (callable | None): Optional function returning the current value, evaluated when sampled.
+    """
+
+    def __init__(self, callback=None):
+        """
+        Initializes the gauge.
+
+        Parameters:
+            callback (callable | None): Optional function returning the current value, evaluated when sampled.
+        """
+        self.value = 0
+        self.callback = callback
+
+    def set(self, value):
+        """
+        Sets the value of the gauge.
+
+        Parameters:
+            value (float): The new value.
+        """
+        self.value = value
+
+    def sample(self):
+        """
+        Returns:
+            float: The current value of the gauge.
+        """
+        if self.callback is not None:
+            return self.callback()
+        return self.value
+
+
+class Meter(object):
+    """
+    Measures the rate of events (e.g. bytes) per second over a fixed time window.
+
+    Attributes:
+        total (int | float): The total amount marked since creation.
+        rate (float): The rate per second measured over the last completed window.
+        window (float): The window length in seconds.
+    """
+
+    def __init__(self, window=1.0):
+        """
+        Initializes the meter.
+
+        Parameters:
+            window (float): The window length in seconds over which the rate is computed. Defaults to 1 second.
+        """
+        self.total = 0
+        self.rate = 0.0
+        self.window = window
+        self._window_start = time.monotonic()
+        self._window_amount = 0
+
+    def roll_over(self):
+        """
+        Completes the current window if it has expired, computing the rate over it. A window in which nothing was
+        marked results in a rate of 0.
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            self.rate = self._window_amount / elapsed
+            self._window_start = now
+            self._window_amount = 0
+
+    def mark(self, amount=1):
+        """
+        Registers an amount with the meter and rolls the window over if it has expired.
+
+        Parameters:
+            amount (int | float): The amount to register. Defaults to 1.
+        """
+        self.total += amount
+        self._window_amount += amount
+        self.roll_over()
+
+    def sample(self):
+        """
+        Rolls the window over if it has expired, so the rate drops to 0 when nothing is marked anymore, e.g. when the
+        caster went silent.
+
+        Returns:
+            float: The rate per second measured over the last completed window.
+        """
+        self.roll_over()
+        return self.rate
+
+
+class Histogram(object):
+    """
+    A histogram with fixed bucket upper bounds, keeping a count per bucket, the total count and the sum of all
+    observations.
+
+    Attributes:
+        bounds (tuple[float]): The upper bounds of the buckets, in increasing order.
+        buckets (list[int]): The count of observations per bucket. The last bucket counts observations above all bounds.
+        count (int): The total number of observations.
+        sum (float): The sum of all observations.
+    """
+
+    def __init__(self, bounds=DEFAULT_TIME_BUCKETS):
+        """
+        Initializes the histogram.
+
+        Parameters:
+            bounds (tuple[float]): The upper bounds of the buckets, in increasing order.
+        """
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Adds an observation to the histogram.
+
+        Parameters:
+            value (float): The observed value.
+        """
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimates a quantile from the buckets, returning the upper bound of the bucket containing the quantile.
+
+        Parameters:
+            q (float): The quantile to estimate, between 0 and 1.
+
+        Returns:
+            float: The estimated quantile, or infinity if it falls above the largest bound. Zero if nothing was observed.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.buckets):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return self.bounds[idx] if idx < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def sample(self):
+        """
+        Returns:
+            dict: The count, sum and mean of the observations, and the 50th and 99th percentile estimates.
+        """
+        return {'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else 0.0,
+                'p50': self.quantile(0.5),
+                'p99': self.quantile(0.99)}
+
+
+class MetricsRegistry(object):
+    """
+    In-process registry of metrics, identified by their name and labels.
+
+    Metrics are created on first use and afterwards returned from the registry, so instrumented code can look them
+    up once and keep a reference to avoid the lookup on hot paths.
+
+    Attributes:
+        metrics (dict): Maps (name, labels) keys to the metric objects.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty registry.
+        """
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, factory, name, labels):
+        """
+        Returns the metric with the given name and labels, creating it with the factory if it does not exist yet.
+
+        Parameters:
+            factory (callable): Function creating the metric.
+            name (str): The name of the metric.
+            labels (dict): The labels of the metric.
+
+        Returns:
+            object: The metric.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.setdefault(key, factory())
+        return metric
+
+    def counter(self, name, **labels):
+        """
+        Parameters:
+            name (str): The name of the counter.
+            **labels: The labels of the counter.
+
+        Returns:
+            Counter: The counter with the given name and labels.
+        """
+        return self._get_or_create(Counter, name, labels)
+
+    def gauge(self, name, callback=None, **labels):
+        """
+        Parameters:
+            name (str): The name of the gauge.
+            callback (callable | None): Optional function computing the value when sampled. Only used on creation.
+            **labels: The labels of the gauge.
+
+        Returns:
+            Gauge: The gauge with the given name and labels.
+        """
+        return self._get_or_create(lambda: Gauge(callback), name, labels)
+
+    def meter(self, name, **labels):
+        """
+        Parameters:
+            name (str): The name of the meter.
+            **labels: The labels of the meter.
+
+        Returns:
+            Meter: The meter with the given name and labels.
+        """
+        return self._get_or_create(Meter, name, labels)
+
+    def histogram(self, name, bounds=DEFAULT_TIME_BUCKETS, **labels):
+        """
+        Parameters:
+            name (str): The name of the histogram.
+            bounds (tuple[float]): The bucket upper bounds. Only used on creation.
+            **labels: The labels of the histogram.
+
+        Returns:
+            Histogram: The histogram with the given name and labels.
+        """
+        return self._get_or_create(lambda: Histogram(bounds), name, labels)
+
+    def snapshot(self):
+        """
+        Samples all metrics in the registry.
+
+        Returns:
+            dict: Maps the metric name with formatted labels to its sampled value.
+        """
+        with self._lock:
+            items = list(self.metrics.items())
+        return {name + format_labels(dict(labels)): metric.sample() for (name, labels), metric in sorted(items)}
+
+    def render(self):
+        """
+        Renders all metrics in the registry as text, one metric per line.
+
+        Returns:
+            str: The rendered metrics.
+        """
+        lines = []
+        for name, value in self.snapshot().items():
+            if isinstance(value, dict):
+                value = ' '.join('%s=%.6g' % (key, value[key]) for key in value)
+            lines.append('%s %s' % (name, value))
+        return '\n'.join(lines)
+
+
+# Default registry used throughout the application
+registry = MetricsRegistry()
@@ -3,12 +3,15 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
 import base64
 import socket
+import time
 
 import pyrtcm
+from pyrtcm.socket_stream import SocketStream
 
-from galileo_reference_tree import constants
+from galileo_reference_tree import constants, metrics, statehub
 from galileo_reference_tree.config import Ntrip
 
 
@@ -40,6 +43,113 @@ def check_connection_response(line):
     raise RuntimeError(error_string)
 
 
+def get_frame_size(header):
+    """
+    Computes the size of an RTCM3 frame from its header, i.e. the preamble followed by the 10-bit payload length.
+
+    Parameters:
+        header (bytes): The first RTCM_HEADER_SIZE bytes of the frame.
+
+    Returns:
+        int: The size of the complete frame, including header and CRC.
+    """
+    return constants.RTCM_HEADER_SIZE + (((header[1] & 0x03) << 8) | header[2]) + constants.RTCM_CRC_SIZE
+
+
+def check_frame_crc(frame):
+    """
+    Validates the CRC-24Q of a raw RTCM3 frame.
+
+    Parameters:
+        frame (bytes): The raw RTCM3 frame, including header and CRC.
+
+    Returns:
+        bool: True if the CRC of the frame is valid.
+    """
+    return pyrtcm.calc_crc24q(frame) == 0
+
+
+async def read_frame(reader, meter):
+    """
+    Reads the next raw RTCM3 frame from a stream, skipping the bytes before its preamble. The CRC is not validated,
+    which is left to the caller, see check_frame_crc(). The blocking counterpart is rtcmrelay.read_frames().
+
+    Parameters:
+        reader (asyncio.StreamReader): The stream to read from.
+        meter (Meter): Meter to register the number of bytes received with.
+
+    Returns:
+        bytes: The raw RTCM3 frame, including header and CRC.
+
+    Raises:
+        asyncio.IncompleteReadError: If the stream ended before the end of the frame.
+    """
+    preamble = bytes([constants.RTCM_PREAMBLE])
+    while True:
+        try:
+            skipped = await reader.readuntil(preamble)
+            break
+        except asyncio.LimitOverrunError as err:
+            # Discard the bytes without a preamble which no longer fit in the buffer of the stream
+            meter.mark(len(await reader.readexactly(err.consumed)))
+
+    header = preamble + await reader.readexactly(constants.RTCM_HEADER_SIZE - 1)
+    frame = header + await reader.readexactly(get_frame_size(header) - constants.RTCM_HEADER_SIZE)
+    meter.mark(len(skipped) + len(frame) - len(preamble))
+    return frame
+
+
+class MeteredStream(object):
+    """
+    Wraps a blocking socket stream, e.g. the upstream connection of the relay, counting the received bytes and
+    recording when the last read completed.
+
+    Attributes:
+        stream (SocketStream): The wrapped socket stream.
+        meter (Meter): Meter registering the number of bytes received.
+        last_read_time (float): The time.perf_counter() value at which the last read completed.
+    """
+
+    def __init__(self, sock, meter):
+        """
+        Initializes the MeteredStream.
+
+        Parameters:
+            sock (socket): The connected socket to read from.
+            meter (Meter): Meter to register the number of bytes received with.
+        """
+        self.stream = SocketStream(sock)
+        self.meter = meter
+        self.last_read_time = time.perf_counter()
+
+    def read(self, size):
+        """
+        Reads a number of bytes from the stream.
+
+        Parameters:
+            size (int): The number of bytes to read.
+
+        Returns:
+            bytes: The bytes read.
+        """
+        data = self.stream.read(size)
+        self.meter.mark(len(data))
+        self.last_read_time = time.perf_counter()
+        return data
+
+    def readline(self):
+        """
+        Reads a line from the stream.
+
+        Returns:
+            bytes: The line read.
+        """
+        data = self.stream.readline()
+        self.meter.mark(len(data))
+        self.last_read_time = time.perf_counter()
+        return data
+
+
 class NtripClient(object):
     """
     Represents a client for connecting to a network caster/server. This class handles
@@ -54,19 +164,30 @@ class NtripClient(object):
             required for establishing a connection with the server.
         socket (socket): A socket object used to connect with the NTRIP caster/server.
         Initially set to None.
+        registry (MetricsRegistry): The registry the ingestion telemetry is recorded in.
+        ephemeris_update_times (dict): Maps the PRN to the time.monotonic() value of its last ephemeris update.
+        frame_counters (dict): Maps the message type to the counter of its frames, to avoid a registry lookup per frame.
+        hub (StateHub): The hub the ephemeris updates are published to.
     """
 
-    def __init__(self, ephem, ntrip_config: Ntrip):
+    def __init__(self, ephem, ntrip_config: Ntrip, registry=None, hub=None):
         """
         Initialization of the NtripClient.
 
         Parameters:
             ephem (List[SatEphemeris]): Array of SatEphemeris objects to save the RTCM data to
             ntrip_config (Ntrip config object): NTRIP configuration data containing network settings.
+            registry (MetricsRegistry, optional): The registry to record the ingestion telemetry in. Defaults to the
+                application-wide registry.
+            hub (StateHub, optional): The hub to publish the ephemeris updates to. Defaults to the application-wide hub.
         """
         self.ephem = ephem
         self.config = ntrip_config
         self.socket = None
+        self.registry = registry if registry is not None else metrics.registry
+        self.ephemeris_update_times = {}
+        self.frame_counters = {}
+        self.hub = hub if hub is not None else statehub.hub
 
         self.connect_to_server()
 
@@ -99,8 +220,12 @@ class NtripClient(object):
         Connects to the server and establishes a connection with the mount point. This involves creating a socket, sending
         a request to the server, and parsing the server's response to verify a successful connection.
         """
-        # Set up a connection with the mount point
-        self.socket = socket.create_connection((self.config.address, self.config.port))
+        # Set up a connection with the mount point, either directly or through the Unix socket of a local relay
+        if self.config.unix_socket:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(self.config.unix_socket)
+        else:
+            self.socket = socket.create_connection((self.config.address, self.config.port))
         self.socket.sendall(self.get_mount_point_for_request())
 
         # Parse the response to the connection request
@@ -108,26 +233,105 @@ class NtripClient(object):
         response_lines = self.socket.recv(response_size_bytes).decode('utf-8').split("\r\n")
         check_connection_response(response_lines[0])
 
-    def get_ephemeris_loop(self):
+    def handle_reader_error(self, err):
         """
-        Parses and updates Galileo Ephemeris data in a loop using the RTCM reader.
+        Counts an error raised while parsing a frame, distinguishing CRC failures from other parsing errors. The frame
+        is skipped, after which reading continues with the next frame.
 
-        The function indefinitely reads RTCM messages from a connected socket,
-        checks if the message corresponds to a Galileo Ephemeris type, retrieves
-        necessary information such as the satellite ID and Galileo System Time (GST),
-        and updates the ephemeris data for the satellite if newer information is received.
+        Parameters:
+            err (Exception): The error raised while reading or parsing a message.
+        """
+        if "CRC" in str(err):
+            self.registry.counter("ntrip_crc_failures_total").inc()
+        else:
+            self.registry.counter("ntrip_parse_errors_total").inc()
+
+    def get_ephemeris_age(self, prn):
+        """
+        Returns the time since the ephemeris of a satellite was last updated.
+
+        Parameters:
+            prn (int): The PRN of the satellite.
+
+        Returns:
+            float: The age of the current ephemeris in seconds.
+        """
+        return time.monotonic() - self.ephemeris_update_times[prn]
+
+    def record_ephemeris_update(self, prn):
+        """
+        Records an ephemeris update for a satellite, registering the age gauge of the satellite on its first update.
+
+        Parameters:
+            prn (int): The PRN of the satellite.
+        """
+        if prn not in self.ephemeris_update_times:
+            self.registry.gauge("ntrip_ephemeris_age_seconds", callback=lambda: self.get_ephemeris_age(prn), prn=prn)
+        self.ephemeris_update_times[prn] = time.monotonic()
+        self.registry.counter("ntrip_ephemeris_updates_total", prn=prn).inc()
+
+    def handle_message(self, parsed_data):
+        """
+        Handles a parsed RTCM message: counts the frame per message type and, if it is a Galileo Ephemeris message
+        newer than the current ephemeris of the satellite, updates the ephemeris and publishes it to the hub.
+
+        Parameters:
+            parsed_data (RTCMMessage): The parsed message.
+        """
+        # Count the frames per message type, caching the counters to avoid a registry lookup per frame
+        msg_type = parsed_data.DF002
+        if msg_type not in self.frame_counters:
+            self.frame_counters[msg_type] = self.registry.counter("ntrip_frames_total", msg_type=msg_type)
+        self.frame_counters[msg_type].inc()
+
+        # Check if the message number (DF002) is that of a Galileo Ephemeris message
+        if msg_type == constants.DF_GALILEO_EPH:
+            # Get the satellite ID and the Galileo System Time (GST) of the ephemeris
+            satID = parsed_data.DF252
+            gst = parsed_data.DF289 * constants.SEC_IN_WEEK + parsed_data.DF293
+
+            # If the ephemeris is newer than the current one, update the ephemeris by mapping the received data
+            if gst > self.ephem[satID - 1].gst:
+                self.ephem[satID - 1].map_to_ephemeris(parsed_data)
+                self.record_ephemeris_update(satID)
+                self.hub.publish(statehub.TOPIC_EPHEMERIS)
+
+    async def get_ephemeris_loop(self, reader=None):
+        """
+        Parses and updates Galileo Ephemeris data in a loop, until the server closes the connection.
+
+        The function reads the RTCM frames from the connected socket without blocking the event loop, parses each
+        frame, checks if the message corresponds to a Galileo Ephemeris type, retrieves necessary information such as
+        the satellite ID and Galileo System Time (GST), and updates the ephemeris data for the satellite if newer
+        information is received. Frames with an invalid CRC or which cannot be parsed are counted and skipped.
+
+        While doing so, it records the received bytes per second, the frames per message type, CRC failures,
+        the decode time per message and the ephemeris updates per PRN in the metrics registry.
+
+        Parameters:
+            reader (asyncio.StreamReader, optional): The stream to read the frames from. Defaults to a stream reading
+                from the connected socket.
         """
-        # Create the RTCM Reader using the connected socket
-        reader = pyrtcm.RTCMReader(self.socket, quitonerror=2)
+        if reader is None:
+            reader, _ = await asyncio.open_connection(sock=self.socket)
+        meter = self.registry.meter("ntrip_bytes_per_second")
+        decode_time = self.registry.histogram("ntrip_decode_time_seconds")
+        crc_failures = self.registry.counter("ntrip_crc_failures_total")
 
-        # Loop over the data parsed by the reader (which has an overloaded __next__ function)
-        for (_, parsed_data) in reader:
-            # Check if the message number (DF002) is that of a Galileo Ephemeris message
-            if parsed_data.DF002 == constants.DF_GALILEO_EPH:
-                # Get the satellite ID and the Galileo System Time (GST) of the ephemeris
-                satID = parsed_data.DF252
-                gst = parsed_data.DF289 * constants.SEC_IN_WEEK + parsed_data.DF293
+        while True:
+            try:
+                frame = await read_frame(reader, meter)
+            except asyncio.IncompleteReadError:
+                return
+            if not check_frame_crc(frame):
+                crc_failures.inc()
+                continue
 
-                # If the ephemeris is newer than the current one, update the ephemeris by mapping the received data
-                if gst > self.ephem[satID - 1].gst:
-                    self.ephem[satID - 1].map_to_ephemeris(parsed_data)
+            decode_start = time.perf_counter()
+            try:
+                parsed_data = pyrtcm.RTCMReader.parse(frame)
+            except (pyrtcm.RTCMParseError, pyrtcm.RTCMMessageError, pyrtcm.RTCMTypeError) as err:
+                self.handle_reader_error(err)
+                continue
+            decode_time.observe(time.perf_counter() - decode_start)
+            self.handle_message(parsed_data)
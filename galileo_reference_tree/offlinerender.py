@@ -0,0 +1,202 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import datetime
+import multiprocessing
+import os
+import warnings
+from dataclasses import replace
+from math import ceil, floor
+
+import numpy as np
+from astropy.time import Time
+
+from galileo_reference_tree import constants
+from galileo_reference_tree.config import Config, Location
+from galileo_reference_tree.ledcontroller import LedController
+from galileo_reference_tree.plotprocess import get_track_length
+from galileo_reference_tree.satephemeris import SatEphemeris
+from galileo_reference_tree.transform import ecef2aer
+from galileo_reference_tree.twolineelements import TwoLineElements
+
+
+def split_frames(n_frames, n_slices):
+    """
+    Splits the frames into contiguous slices of (nearly) equal size, one per worker.
+
+    Parameters:
+        n_frames (int): The number of frames.
+        n_slices (int): The number of slices to split the frames into.
+
+    Returns:
+        list[tuple[int, int]]: The first frame and the frame after the last frame of each non-empty slice.
+    """
+    bounds = np.linspace(0, n_frames, n_slices + 1).round().astype(int)
+    return [(int(first), int(stop)) for first, stop in zip(bounds[:-1], bounds[1:]) if stop > first]
+
+
+def propagate_frames(ephemeris, location: Location, gps_times):
+    """
+    Propagates all satellites to all given times, propagating each satellite to all times at once.
+
+    Parameters:
+        ephemeris (list[SatEphemeris]): The ephemerides of the satellites.
+        location (Location): The location to compute the azimuth and elevation for.
+        gps_times (np.ndarray): The times to propagate to, in GPS seconds.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The azimuth and elevation in degrees of each satellite (first axis) at each
+            time (second axis), and the argument of latitude in degrees of each satellite at each time. Both are NaN
+            for satellites which cannot be propagated.
+    """
+    azelev = np.full((len(ephemeris), len(gps_times), 2), np.nan)
+    arglat = np.full((len(ephemeris), len(gps_times)), np.nan)
+    wn = floor(gps_times[0] / constants.SEC_IN_WEEK)
+    tows = gps_times - wn * constants.SEC_IN_WEEK
+    for idx, eph in enumerate(ephemeris):
+        if eph.toe or eph.tle is not None:
+            x, y, z = eph.propagate_batch(wn, tows)
+            az, elev, r = ecef2aer(x, y, z, location.latitude_deg, location.longitude_deg, location.altitude_m)
+            azelev[idx, :, 0] = az
+            azelev[idx, :, 1] = elev
+            arglat[idx] = [eph.get_argument_of_latitude(wn, tow) for tow in tows]
+    return azelev, arglat
+
+
+def get_trail_frames(first, step, trail_length):
+    """
+    Gets the frames before a slice at which the skyplot would have taken its trail samples. Inside a slice, the skyplot
+    samples the first frame at least TRACK_SAMPLE_INTERVAL after the previous sample, i.e. every frame when the step
+    exceeds the interval. The samples therefore lie on a grid of whole frames counted from the first frame of the time
+    range, which continues before it for the history of the first slice.
+
+    Parameters:
+        first (int): The index of the first frame of the slice.
+        step (float): The simulated time between frames [s].
+        trail_length (int): The number of samples in a trail, including the current position.
+
+    Returns:
+        np.ndarray: The indices of the frames of the trail samples before the slice, in chronological order.
+    """
+    frames_per_sample = max(1, ceil(constants.TRACK_SAMPLE_INTERVAL / step))
+    last = (first - 1) // frames_per_sample * frames_per_sample
+    return last + np.arange(2 - trail_length, 1) * frames_per_sample
+
+
+def render_slice(config: Config, start, first, stop):
+    """
+    Renders a slice of the frames of the time range to images, using the Agg backend of matplotlib. The satellites
+    are propagated to all frames of the slice at once, after which every frame is composed by the LED compositor and
+    drawn by the skyplot and the LED plot. The drawn canvases are written directly, without drawing the figures again.
+
+    As every slice is rendered by its own worker, each slice first replays the history before its first frame: the
+    trail samples of the skyplot, on the same grid of frames as the slice samples them, and the preceding frame of the
+    LEDs. The slices therefore join up seamlessly.
+
+    Parameters:
+        config (Config): The configuration.
+        start (datetime.datetime): The UTC time of the first frame of the time range.
+        first (int): The index of the first frame of the slice.
+        stop (int): The index of the frame after the last frame of the slice.
+
+    Returns:
+        int: The number of frames written.
+    """
+    # Import matplotlib in the worker processes only, using the headless backend
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import image
+    from galileo_reference_tree.plotleds import LedPlot
+    from galileo_reference_tree.skyplot import SkyPlot
+
+    render = config.render
+    ephemeris = [SatEphemeris() for _ in range(constants.MAX_SATS)]
+    TwoLineElements().set_tle(ephemeris)
+    health = np.array([eph.signalHealth for eph in ephemeris])
+
+    # The trail samples and the LED frame before the slice, followed by the frames of the slice
+    trail_length = get_track_length(config.general.trail_minutes)
+    frames = np.arange(first - 1 if first else first, stop)
+    start_gps = Time(start, format='datetime').to_value('gps')
+    trail_offsets = get_trail_frames(first, render.step, trail_length) * render.step
+    offsets = np.concatenate([trail_offsets, frames * render.step])
+    azelev, arglat = propagate_frames(ephemeris, config.general.location, start_gps + offsets)
+
+    # Render the LEDs to a virtual strip, whatever output is configured
+    led_config = replace(config.leds, general=replace(config.leds.general, backend='virtual', recording=''),
+                         segments=())
+    sat_azelev = [[] for _ in range(constants.MAX_SATS)]
+    sat_arglat = [None] * constants.MAX_SATS
+    controller = LedController(constants.MAX_SATS, ephemeris, sat_azelev, led_config, sat_arglat)
+
+    skyplot = SkyPlot(constants.MAX_SATS, trail_length)
+    led_plot = LedPlot(render.width, controller.ledstrip)
+    for plot in [skyplot, led_plot]:
+        plot.fig.canvas.draw()
+
+    written = 0
+    for sample, offset in enumerate(offsets):
+        coords = azelev[:, sample]
+        timestamp = start + datetime.timedelta(seconds=float(offset))
+        if sample < len(trail_offsets):
+            skyplot.update_tracks(coords, None, timestamp.timestamp())
+            continue
+
+        for sat_idx in range(constants.MAX_SATS):
+            known = not np.isnan(coords[sat_idx, 1])
+            sat_azelev[sat_idx] = coords[sat_idx].tolist() if known else []
+            sat_arglat[sat_idx] = float(arglat[sat_idx, sample]) if known else None
+        controller.compositor.render_frame(float(offset))
+        frame = frames[sample - len(trail_offsets)]
+        if frame < first:
+            continue
+
+        skyplot.update_satellites(coords, health, timestamp=timestamp)
+        led_plot.update_plot(timestamp)
+        for name, plot in [('skyplot', skyplot), ('leds', led_plot)]:
+            image.imsave(os.path.join(render.output_dir, '%s_%06d.png' % (name, frame)),
+                         np.asarray(plot.fig.canvas.buffer_rgba()))
+        written += 1
+    controller.ledstrip.close()
+    return written
+
+
+def render_offline(config: Config):
+    """
+    Renders the skyplot and the LED view of a simulated time range to numbered images, e.g. to make a time-lapse video.
+    The satellites are propagated from the TLEs, as no broadcast ephemerides are available for a simulated time range.
+    The frames are split into contiguous slices, which are rendered in parallel by separate worker processes.
+
+    Parameters:
+        config (Config): The configuration, of which the render settings define the time range.
+
+    Returns:
+        int: The number of frames written, 0 if the time range is shorter than one step.
+    """
+    render = config.render
+    if render.step <= 0:
+        raise ValueError("The render step must be positive, got {0}".format(render.step))
+    if render.start:
+        start = datetime.datetime.fromisoformat(render.start)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=datetime.UTC)
+    else:
+        start = datetime.datetime.now(datetime.UTC)
+    n_frames = int(round(render.duration_hours * constants.SEC_IN_HOUR / render.step))
+    if n_frames < 1:
+        warnings.warn("The render duration of {0} hours is shorter than one step, no frames to render".format(
+            render.duration_hours))
+        return 0
+    os.makedirs(render.output_dir, exist_ok=True)
+
+    # Make sure the TLE file is up to date before the workers load it
+    tle = TwoLineElements()
+    if tle.tle_refresh_due():
+        tle.refresh_tle([SatEphemeris() for _ in range(constants.MAX_SATS)])
+
+    slices = split_frames(n_frames, render.workers or os.cpu_count())
+    with multiprocessing.get_context('spawn').Pool(len(slices)) as pool:
+        written = pool.starmap(render_slice, [(config, start, first, stop) for first, stop in slices])
+    return sum(written)
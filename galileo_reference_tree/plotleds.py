@@ -4,10 +4,9 @@
 #  For details, see the LICENSE file in the project root.
 
 import datetime
-from math import floor
 
 import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+import numpy as np
 
 
 class LedPlot(object):
@@ -18,17 +17,24 @@ class LedPlot(object):
     LED strip. It is structured into a grid where each LED is represented as a dot,
     and its color and brightness correspond to its physical state.
 
+    To scale to strips with thousands of LEDs, all LEDs are a single scatter collection of which only the colors are
+    updated, computed at once from a snapshot of the strip. The grid and the LED labels never change, so they are
+    rendered once and cached as background, after which every update only draws the LEDs and the title on top of it
+    (blitting). Updates in which neither the LEDs nor the title changed are skipped.
+
     Attributes:
         width (int): The number of LEDs per row in the grid representation.
-        strip (object): The LED strip object, assumed to have `numPixels`, `getPixelColorRGB`,
-            and `getBrightness` methods.
+        strip (StripBackend): The LED output to show, providing `numPixels`, `get_pixels` and `getBrightness`.
         numleds (int): Total number of LEDs in the strip, derived from the `strip` object.
         height (int): The number of rows in the grid representation, calculated as the total number
             of LEDs divided by the width.
-        annot (list[list[object]]): Storage for annotations, used to label each LED in the grid.
-        leds_plot (list[list[object]]): Stores plot references for each LED dot on the visualization.
+        annot (list[matplotlib.text.Annotation]): Annotations used to label each LED in the grid.
+        leds_plot (matplotlib.collections.PathCollection): The scatter collection with a dot for every LED.
         fig (object): The `matplotlib` figure object for the visualization.
         ax (object): The `matplotlib` axes object for the visualization grid.
+        title (matplotlib.text.Text): The title of the plot, showing the time of the latest update.
+        pixels (np.ndarray | None): The 24-bit colors of the LEDs drawn last, None if not drawn yet.
+        background (object): The cached static part of the figure, None if not rendered yet.
     """
 
     def __init__(self, width, strip):
@@ -40,14 +46,12 @@ class LedPlot(object):
 
         Parameters:
             width (int): The width of the LED grid (number of columns).
-            strip (LED strip object): A LED strip object containing the LED data
+            strip (StripBackend): The LED output containing the LED data
         """
         self.width = width
         self.strip = strip
         self.numleds = strip.numPixels()
         self.height = self.numleds / self.width
-        self.annot = [[] for _ in range(self.numleds)]
-        self.leds_plot = [[] for _ in range(self.numleds)]
         self.fig, self.ax = plt.subplots()
 
         plt.ion()
@@ -59,35 +63,76 @@ class LedPlot(object):
         self.ax.set_yticks([])
         self.ax.set_xticks([])
 
-        ledIdx: int
-        for ledIdx in range(self.numleds):
-            self.leds_plot[ledIdx] = plt.plot([], [], '.', markersize=20)
-            Line2D.set_xdata(self.leds_plot[ledIdx][0], [ledIdx % self.width])
-            Line2D.set_ydata(self.leds_plot[ledIdx][0], [self.height - floor(ledIdx / self.width)])
-            self.annot[ledIdx] = self.ax.annotate('%s' % (ledIdx + 1),
-                                                  xy=[ledIdx % self.width,
-                                                      self.height - floor(ledIdx / self.width) + 0.1],
-                                                  textcoords='data', color=(1, 1, 1))
-
-    def update_plot(self):
+        led_indices = np.arange(self.numleds)
+        x = led_indices % self.width
+        y = self.height - led_indices // self.width
+        self.leds_plot = self.ax.scatter(x, y, s=20 ** 2, marker='.', color='black', animated=True)
+        self.annot = [self.ax.annotate('%s' % (ledIdx + 1), xy=[x[ledIdx], y[ledIdx] + 0.1], textcoords='data',
+                                       color=(1, 1, 1)) for ledIdx in range(self.numleds)]
+        self.title = self.ax.set_title('', animated=True)
+
+        self.pixels = None
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        """
+        Caches the static part of the figure after every full redraw of the figure, e.g. after resizing the window.
+
+        Parameters:
+            event (matplotlib.backend_bases.DrawEvent): The draw event.
+        """
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.leds_plot)
+        self.ax.draw_artist(self.title)
+
+    def get_led_colors(self, pixels):
+        """
+        Converts the colors of the LEDs into the [R,G,B,A] colors to plot. The brightest channel of an LED is always
+        plotted at full intensity, and its brightness is plotted through the transparency instead.
+
+        Parameters:
+            pixels (np.ndarray): The 24-bit colors of the LEDs.
+
+        Returns:
+            np.ndarray: The [R,G,B,A] color of every LED, with values from 0 to 1.
+        """
+        rgb = ((pixels[:, np.newaxis] >> np.array([16, 8, 0], dtype=np.uint32)) & 0xFF) / 255
+        max_color = rgb.max(axis=1)
+        lit = max_color > 0
+        rgba = np.ones((len(pixels), 4))
+        rgba[:, :3] = rgb
+        rgba[lit, :3] = rgb[lit] / max_color[lit, np.newaxis]
+        rgba[lit, 3] = max_color[lit] * self.strip.getBrightness() / 255
+        return rgba
+
+    def update_plot(self, timestamp=None):
         """
         Updates the LED plot with the current RGB color and brightness values and refreshes the plot visualization.
+
+        Parameters:
+            timestamp (datetime.datetime, optional): The UTC time of the LED state, e.g. a simulated time when rendering
+                offline. Defaults to the current time.
         """
-        plt.show()
-        for ledIdx in range(self.numleds):
-            red = self.strip.getPixelColorRGB(ledIdx).r / 255
-            green = self.strip.getPixelColorRGB(ledIdx).g / 255
-            blue = self.strip.getPixelColorRGB(ledIdx).b / 255
-            max_color = max(red, green, blue)
-
-            alpha = 1
-            if max_color:
-                led_brightness = max_color
-                red = red / max_color  # Always make the brightest color 1 and plot the brightness through alpha
-                green = green / max_color
-                blue = blue / max_color
-                alpha = led_brightness * self.strip.getBrightness() / 255
-            Line2D.set_color(self.leds_plot[ledIdx][0], [red, green, blue, alpha])
-        plt.draw()
-        plt.pause(0.02)
-        self.ax.set_title('Latest update %s' % datetime.datetime.now(datetime.UTC).strftime('%Y/%m/%d - %H:%M:%S'))
+        if timestamp is None:
+            timestamp = datetime.datetime.now(datetime.UTC)
+        pixels = np.array(self.strip.get_pixels(), dtype=np.uint32)
+        title = 'Latest update %s' % timestamp.strftime('%Y/%m/%d - %H:%M:%S')
+        canvas = self.fig.canvas
+        if self.background is not None and title == self.title.get_text() and np.array_equal(pixels, self.pixels):
+            canvas.flush_events()
+            return
+
+        self.pixels = pixels
+        self.leds_plot.set_color(self.get_led_colors(pixels))
+        self.title.set_text(title)
+        if self.background is None:
+            # The first full draw shows the figure and caches the background through on_draw
+            plt.show()
+            canvas.draw()
+        else:
+            canvas.restore_region(self.background)
+            self.ax.draw_artist(self.leds_plot)
+            self.ax.draw_artist(self.title)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
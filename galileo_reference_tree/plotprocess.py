@@ -0,0 +1,258 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import multiprocessing
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from galileo_reference_tree import constants
+
+StateSnapshot = namedtuple('StateSnapshot', ['sequence', 'azelev', 'health', 'pixels', 'brightness', 'predicted'])
+
+
+def get_track_length(minutes):
+    """
+    Computes the number of samples of a satellite track covering the given duration.
+
+    Parameters:
+        minutes (float): The duration of the track in minutes, 0 for no track.
+
+    Returns:
+        int: The number of samples of the track, 0 for no track.
+    """
+    if minutes <= 0:
+        return 0
+    return int(round(minutes * 60 / constants.TRACK_SAMPLE_INTERVAL)) + 1
+
+
+class SharedState(object):
+    """
+    The satellite state and the LED frame buffer in a shared memory segment, to hand them to the plotting process
+    without the real-time loops ever waiting for it.
+
+    There is a single writer, which uses a sequence counter to publish consistent snapshots without locking (a
+    sequence lock): the counter is odd while a snapshot is being written and even once it is complete. A reader copies
+    the state and only accepts the copy if the counter was even and unchanged during the copy, otherwise it retries.
+
+    Attributes:
+        max_sats (int): The number of satellites in the state.
+        num_leds (int): The number of LEDs in the frame buffer.
+        shm (SharedMemory): The shared memory segment.
+        name (str): The name of the shared memory segment, used to attach to it from another process.
+        sequence (np.ndarray): The sequence counter of the published snapshots.
+        brightness (np.ndarray): The global brightness of the LED output, from 0 to 255.
+        azelev (np.ndarray): The azimuth and elevation of each satellite in degrees, NaN if not propagated yet.
+        health (np.ndarray): The signal health of each satellite.
+        pixels (np.ndarray): The 24-bit colors of all LEDs.
+        predicted (np.ndarray): The predicted azimuth and elevation in degrees of each satellite (first axis) at each
+            future sample (second axis), NaN if not predicted.
+    """
+
+    def __init__(self, max_sats, num_leds, prediction_length=0, name=None):
+        """
+        Creates a new shared memory segment, or attaches to an existing one.
+
+        Parameters:
+            max_sats (int): The number of satellites in the state.
+            num_leds (int): The number of LEDs in the frame buffer.
+            prediction_length (int, optional): The number of samples of the predicted tracks. Defaults to 0, which
+                leaves out the predictions.
+            name (str, optional): The name of an existing segment to attach to. Defaults to creating a new segment.
+        """
+        self.max_sats = max_sats
+        self.num_leds = num_leds
+        self.prediction_length = prediction_length
+
+        # Layout: sequence counter, brightness, azimuth/elevation, signal health, LED colors and predicted tracks
+        fields = [('sequence', np.uint64, (1,)), ('brightness', np.float64, (1,)),
+                  ('azelev', np.float64, (max_sats, 2)), ('health', np.int64, (max_sats,)),
+                  ('pixels', np.uint32, (num_leds,)), ('predicted', np.float64, (max_sats, prediction_length, 2))]
+        size = sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for _, dtype, shape in fields)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        offset = 0
+        for field, dtype, shape in fields:
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+            offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+        if name is None:
+            self.azelev[:] = np.nan
+            self.health[:] = -1
+            self.predicted[:] = np.nan
+
+    def write(self, azelev, health, pixels, brightness, predicted=None):
+        """
+        Publishes a new snapshot. Only a single thread may write.
+
+        Parameters:
+            azelev (np.ndarray): The azimuth and elevation of each satellite in degrees, NaN if not propagated yet.
+            health (np.ndarray): The signal health of each satellite.
+            pixels (np.ndarray): The 24-bit colors of all LEDs.
+            brightness (float): The global brightness of the LED output, from 0 to 255.
+            predicted (np.ndarray, optional): The predicted tracks of the satellites. Defaults to leaving them
+                unchanged.
+        """
+        self.sequence[0] += 1
+        self.azelev[:] = azelev
+        self.health[:] = health
+        self.pixels[:] = pixels
+        self.brightness[0] = brightness
+        if predicted is not None:
+            self.predicted[:] = predicted
+        self.sequence[0] += 1
+
+    def read(self, retries=constants.SHARED_STATE_READ_RETRIES):
+        """
+        Copies the latest complete snapshot.
+
+        Parameters:
+            retries (int, optional): The number of attempts before giving up when the writer keeps updating the state.
+
+        Returns:
+            StateSnapshot | None: The copied snapshot, or None if no consistent copy could be made.
+        """
+        for _ in range(retries):
+            sequence = int(self.sequence[0])
+            if sequence % 2:
+                time.sleep(0)
+                continue
+            snapshot = StateSnapshot(sequence, self.azelev.copy(), self.health.copy(), self.pixels.copy(),
+                                     float(self.brightness[0]), self.predicted.copy())
+            if int(self.sequence[0]) == sequence:
+                return snapshot
+        return None
+
+    def wait_read(self, interval=constants.PLOTTING_INTERVAL):
+        """
+        Copies the latest complete snapshot, waiting for the writer until a consistent copy can be made.
+
+        Parameters:
+            interval (float, optional): The time in seconds to wait between attempts to read the snapshot.
+
+        Returns:
+            StateSnapshot: The copied snapshot.
+        """
+        snapshot = self.read()
+        while snapshot is None:
+            time.sleep(interval)
+            snapshot = self.read()
+        return snapshot
+
+    def publish(self, ephemeris, azelev, ledstrip, predicted=None):
+        """
+        Publishes a snapshot of the satellite state and of the frame shown on the LED output.
+
+        Parameters:
+            ephemeris (list[SatEphemeris]): The ephemeris of the satellites, providing their signal health.
+            azelev (list[list[float]]): The azimuth and elevation of each satellite, empty if not propagated yet.
+            ledstrip (StripBackend): The LED output.
+            predicted (np.ndarray, optional): The predicted tracks of the satellites. Defaults to leaving them
+                unchanged.
+        """
+        coords = np.array([azelev[satIdx][:2] if len(azelev[satIdx]) else (np.nan, np.nan)
+                           for satIdx in range(self.max_sats)], dtype=float).reshape(-1, 2)
+        health = [ephemeris[satIdx].signalHealth for satIdx in range(self.max_sats)]
+        self.write(coords, health, ledstrip.get_pixels(), ledstrip.getBrightness(), predicted)
+
+    def close(self):
+        """
+        Detaches from the shared memory segment.
+        """
+        # Release the views on the buffer first, the segment cannot be closed while they exist
+        for field in ['sequence', 'brightness', 'azelev', 'health', 'pixels', 'predicted']:
+            setattr(self, field, None)
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Removes the shared memory segment. Only the process which created the segment should do so.
+        """
+        self.shm.unlink()
+
+
+class SnapshotStrip(object):
+    """
+    Read-only stand-in for the LED output in the plotting process, showing the LEDs of the latest snapshot.
+
+    Attributes:
+        snapshot (StateSnapshot): The latest snapshot read from the shared state.
+    """
+
+    def __init__(self, snapshot):
+        """
+        Initializes the SnapshotStrip.
+
+        Parameters:
+            snapshot (StateSnapshot): The snapshot to show.
+        """
+        self.snapshot = snapshot
+
+    def numPixels(self):
+        return len(self.snapshot.pixels)
+
+    def get_pixels(self):
+        return self.snapshot.pixels
+
+    def getBrightness(self):
+        return self.snapshot.brightness
+
+
+def run_plotting(name, max_sats, num_leds, width, prediction_length=0, trail_length=0):
+    """
+    Main loop of the plotting process: shows the skyplot and the LED plot of the snapshots in the shared state. Only
+    new snapshots are plotted.
+
+    Parameters:
+        name (str): The name of the shared memory segment.
+        max_sats (int): The number of satellites in the state.
+        num_leds (int): The number of LEDs in the frame buffer.
+        width (int): The number of LEDs per row in the LED plot.
+        prediction_length (int, optional): The number of samples of the predicted tracks in the shared state.
+        trail_length (int, optional): The number of samples of the trails in the skyplot, 0 for no trails.
+    """
+    # Import matplotlib in the plotting process only
+    from galileo_reference_tree.plotleds import LedPlot
+    from galileo_reference_tree.skyplot import SkyPlot
+
+    state = SharedState(max_sats, num_leds, prediction_length, name)
+    strip = SnapshotStrip(state.wait_read())
+    skyplot = SkyPlot(max_sats, trail_length)
+    ledPlot = LedPlot(width, strip)
+    sequence = -1
+    while True:
+        snapshot = state.read()
+        if snapshot is not None and snapshot.sequence != sequence:
+            sequence = snapshot.sequence
+            strip.snapshot = snapshot
+            skyplot.update_satellites(snapshot.azelev, snapshot.health,
+                                      snapshot.predicted if prediction_length else None)
+            ledPlot.update_plot()
+        time.sleep(constants.PLOTTING_INTERVAL)
+
+
+def start_plotting(state, width, trail_length=0):
+    """
+    Starts the plotting process for the shared state. The process is started fresh (spawned) rather than forked, so it
+    does not inherit the threads and locks of the real-time loops, and it ends together with the main process.
+
+    Parameters:
+        state (SharedState): The shared state to plot.
+        width (int): The number of LEDs per row in the LED plot.
+        trail_length (int, optional): The number of samples of the trails in the skyplot, 0 for no trails.
+
+    Returns:
+        multiprocessing.Process: The started plotting process.
+    """
+    process = multiprocessing.get_context('spawn').Process(target=run_plotting, name='plotting', daemon=True,
+                                                           args=(state.name, state.max_sats, state.num_leds, width,
+                                                                 state.prediction_length, trail_length))
+    process.start()
+    return process
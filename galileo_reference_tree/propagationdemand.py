@@ -0,0 +1,272 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import threading
+
+import numpy as np
+
+from galileo_reference_tree import metrics, statehub
+
+
+def get_crossing_delays(values, rates, boundaries):
+    """
+    Computes the time until each value, changing linearly at its rate, crosses the next of the given boundaries in the
+    direction it moves in, e.g. the time until the elevation of a satellite reaches the next brightness step.
+
+    Parameters:
+        values (np.ndarray): The current values.
+        rates (np.ndarray): The rates of change of the values per second.
+        boundaries (np.ndarray): The sorted boundaries.
+
+    Returns:
+        np.ndarray: The time in seconds until each value crosses a boundary, inf if it does not move towards one.
+    """
+    values = np.asarray(values, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    rising = np.searchsorted(boundaries, values, side='right')
+    falling = np.searchsorted(boundaries, values, side='left') - 1
+    next_boundary = np.where(rates > 0, boundaries[np.minimum(rising, len(boundaries) - 1)],
+                             boundaries[np.maximum(falling, 0)])
+    reachable = np.where(rates > 0, rising < len(boundaries), (rates < 0) & (falling >= 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delays = (next_boundary - values) / rates
+    return np.where(reachable & ~np.isnan(delays), delays, np.inf)
+
+
+class PropagationDemand(object):
+    """
+    Collects which satellites the consumers of the propagation need, and how often. Every consumer, e.g. the LEDs, the
+    plotting process or the web dashboard, declares a set of satellites and the interval at which it needs their
+    positions. The propagator only propagates the union of these satellites, each at the shortest interval requested
+    for it, so satellites nobody shows cost nothing.
+
+    A consumer which only needs a satellite when it visibly changes, e.g. the LEDs when the brightness step of a
+    satellite changes, declares a function estimating that time instead of a fixed interval. The demand estimates the
+    rate at which the azimuth and elevation of every satellite change from its two most recent propagations, and after
+    every propagation schedules the satellite for when the estimated change happens, between the minimum and maximum
+    interval of the consumer. As the Galileo satellites only move about a degree every couple of minutes, this is
+    usually much less often than the minimum interval. In between, the consumer can extrapolate the satellites at the
+    estimated rates.
+
+    Every satellite has its own deadline. A satellite is due when its deadline passed; after propagating it, its
+    deadline moves on by its interval, so the schedule does not drift by the time spent propagating. Newly demanded
+    satellites are due right away, and satellites which are demanded at a shorter interval are due one interval after
+    their last propagation. Every change of the demand is published to the state hub, waking the propagator.
+
+    Attributes:
+        demands (dict): The satellite indices, the minimum and maximum interval in seconds and the function estimating
+            the time until a visible change (None for a fixed interval) declared by each consumer, by its name.
+        intervals (np.ndarray): The shortest interval requested for each satellite, inf if not demanded.
+        max_intervals (np.ndarray): The longest interval allowed by all consumers of each satellite, inf if not
+            demanded.
+        next_due (np.ndarray): The time.monotonic() value at which each satellite is due next, -inf if never
+            propagated.
+        sample_azelev (np.ndarray): The azimuth and elevation of each satellite at its latest propagation, NaN if never
+            propagated.
+        sample_time (np.ndarray): The time.monotonic() value of the latest propagation of each satellite, -inf if never
+            propagated.
+        rates (np.ndarray): The estimated rate of change of the azimuth and elevation of each satellite in degrees per
+            second, NaN if unknown.
+        lock (threading.Lock): Lock guarding the demand, which may be declared from any thread.
+        hub (StateHub): The hub the changes of the demand are published to.
+        propagations (Counter): Counter of the satellite propagations.
+        demanded (Gauge): The number of demanded satellites.
+    """
+
+    def __init__(self, max_sats, registry=None, hub=None):
+        """
+        Initializes the demand without any consumers.
+
+        Parameters:
+            max_sats (int): The number of satellites.
+            registry (MetricsRegistry, optional): The registry to record the propagations and the demand in. Defaults
+                to the application-wide registry.
+            hub (StateHub, optional): The hub to publish the changes of the demand to. Defaults to the
+                application-wide hub.
+        """
+        self.demands = {}
+        self.intervals = np.full(max_sats, np.inf)
+        self.max_intervals = np.full(max_sats, np.inf)
+        self.next_due = np.full(max_sats, -np.inf)
+        self.sample_azelev = np.full((max_sats, 2), np.nan)
+        self.sample_time = np.full(max_sats, -np.inf)
+        self.rates = np.full((max_sats, 2), np.nan)
+        self.lock = threading.Lock()
+        self.hub = hub if hub is not None else statehub.hub
+
+        registry = registry if registry is not None else metrics.registry
+        self.propagations = registry.counter("propagation_satellites_total")
+        self.demanded = registry.gauge("propagation_demanded_satellites",
+                                       callback=lambda: int(np.sum(np.isfinite(self.intervals))))
+
+    def update_intervals(self):
+        """
+        Recomputes the shortest requested and longest allowed interval of every satellite from the declared demands.
+        Satellites which are no longer demanded are due right away when they are demanded again, and no satellite is
+        due later than its longest allowed interval after its last propagation. Must be called while holding the lock.
+        """
+        intervals = np.full_like(self.intervals, np.inf)
+        max_intervals = np.full_like(self.max_intervals, np.inf)
+        for sat_indices, interval, max_interval, _ in self.demands.values():
+            intervals[sat_indices] = np.minimum(intervals[sat_indices], interval)
+            max_intervals[sat_indices] = np.minimum(max_intervals[sat_indices], max_interval)
+        demanded = np.isfinite(intervals)
+        self.next_due[~demanded] = -np.inf
+        self.next_due[demanded] = np.minimum(self.next_due[demanded],
+                                             self.sample_time[demanded] + max_intervals[demanded])
+        self.intervals = intervals
+        self.max_intervals = max_intervals
+
+    def declare(self, consumer, sat_indices, interval, max_interval=None, get_delays=None):
+        """
+        Declares the satellites a consumer needs and the interval at which it needs them, replacing its previous
+        declaration.
+
+        Parameters:
+            consumer (str): The name of the consumer.
+            sat_indices (Iterable[int]): The indices of the satellites the consumer needs.
+            interval (float): The interval in seconds at which the consumer needs the positions of the satellites, or
+                the minimum interval if the consumer estimates when it needs them.
+            max_interval (float, optional): The maximum interval in seconds if the consumer estimates when it needs
+                the positions. Defaults to the interval.
+            get_delays (Callable, optional): Function estimating the time in seconds until a visible change of the
+                given satellites for the consumer, called with their indices, azimuths and elevations (n x 2) and the
+                rates of change of these in degrees per second (n x 2). Defaults to a fixed interval.
+        """
+        max_interval = interval if max_interval is None else max(max_interval, interval)
+        with self.lock:
+            self.demands[consumer] = (np.array(list(sat_indices), dtype=int), interval, max_interval, get_delays)
+            self.update_intervals()
+        self.hub.publish(statehub.TOPIC_DEMAND)
+
+    def withdraw(self, consumer):
+        """
+        Withdraws the demand of a consumer, if it declared any.
+
+        Parameters:
+            consumer (str): The name of the consumer.
+        """
+        with self.lock:
+            if self.demands.pop(consumer, None) is None:
+                return
+            self.update_intervals()
+        self.hub.publish(statehub.TOPIC_DEMAND)
+
+    def invalidate(self, sat_indices=None):
+        """
+        Makes demanded satellites due right away, e.g. after their ephemeris changed.
+
+        Parameters:
+            sat_indices (Iterable[int], optional): The indices of the satellites to make due. Defaults to all
+                satellites.
+        """
+        with self.lock:
+            self.next_due[slice(None) if sat_indices is None else np.array(list(sat_indices), dtype=int)] = -np.inf
+
+    def get_due(self, now):
+        """
+        Parameters:
+            now (float): The current time.monotonic() value.
+
+        Returns:
+            np.ndarray: The indices of the demanded satellites which are due.
+        """
+        with self.lock:
+            return np.flatnonzero(np.isfinite(self.intervals) & (self.next_due <= now))
+
+    def estimate_rates(self, sat_indices, azelev, now):
+        """
+        Estimates the rate of change of the azimuth and elevation of the propagated satellites from their previous
+        propagation, and stores their new azimuth and elevation. Must be called while holding the lock.
+
+        Parameters:
+            sat_indices (np.ndarray): The indices of the propagated satellites.
+            azelev (np.ndarray): The propagated azimuth and elevation of each of the satellites (n x 2), NaN if they
+                could not be propagated.
+            now (float): The time.monotonic() value at which the propagation started.
+        """
+        change = azelev - self.sample_azelev[sat_indices]
+        change[:, 0] = (change[:, 0] + 180) % 360 - 180  # Shortest way around in azimuth
+        elapsed = now - self.sample_time[sat_indices]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.rates[sat_indices] = np.where((elapsed > 0)[:, np.newaxis], change / elapsed[:, np.newaxis], np.nan)
+        self.sample_azelev[sat_indices] = azelev
+        self.sample_time[sat_indices] = now
+
+    def get_intervals(self, sat_indices):
+        """
+        Determines the interval until the next propagation of each of the propagated satellites, being the shortest of
+        the intervals of all consumers which need it. For consumers estimating when they need a satellite, this is the
+        estimated time until its next visible change, between their minimum and maximum interval, or the minimum
+        interval while its rates are unknown. Must be called while holding the lock.
+
+        Parameters:
+            sat_indices (np.ndarray): The indices of the propagated satellites.
+
+        Returns:
+            np.ndarray: The interval in seconds until each of the satellites is needed again.
+        """
+        intervals = np.full(len(sat_indices), np.inf)
+        for consumer_indices, interval, max_interval, get_delays in self.demands.values():
+            needed = np.isin(sat_indices, consumer_indices)
+            if get_delays is None or not np.any(needed):
+                intervals[needed] = np.minimum(intervals[needed], interval)
+                continue
+            needed_indices = sat_indices[needed]
+            rates = self.rates[needed_indices]
+            delays = np.asarray(get_delays(needed_indices, self.sample_azelev[needed_indices], rates), dtype=float)
+            delays = np.where(np.isnan(rates).any(axis=1) | np.isnan(delays), interval,
+                              np.clip(delays, interval, max_interval))
+            intervals[needed] = np.minimum(intervals[needed], delays)
+        return intervals
+
+    def mark_propagated(self, sat_indices, now, azelev=None):
+        """
+        Moves the deadlines of the propagated satellites on by their interval. Satellites which were propagated late,
+        or for the first time, are next due one interval from now.
+
+        Parameters:
+            sat_indices (np.ndarray): The indices of the propagated satellites.
+            now (float): The time.monotonic() value at which the propagation started.
+            azelev (np.ndarray, optional): The propagated azimuth and elevation of each of the satellites (n x 2), to
+                estimate the rates of change from. Without these, satellites are propagated at their minimum interval.
+        """
+        with self.lock:
+            azelev = np.full((len(sat_indices), 2), np.nan) if azelev is None else np.asarray(azelev, dtype=float)
+            self.estimate_rates(sat_indices, azelev.reshape(-1, 2), now)
+            intervals = self.get_intervals(sat_indices)
+            scheduled = self.next_due[sat_indices] + intervals
+            self.next_due[sat_indices] = np.where(scheduled > now, scheduled, now + intervals)
+        self.propagations.inc(len(sat_indices))
+
+    def extrapolate(self, sat_indices, now):
+        """
+        Estimates the azimuth and elevation of satellites in between their propagations, by extrapolating from their
+        latest propagation at their estimated rates of change. The estimate stops at the next propagation of each
+        satellite, which is scheduled for its next visible change, so it joins up with the next propagation rather than
+        running ahead of it. Satellites of which the rates are unknown keep their latest propagated position.
+
+        Parameters:
+            sat_indices (np.ndarray): The indices of the satellites.
+            now (float): The time.monotonic() value to estimate the positions at.
+
+        Returns:
+            np.ndarray: The estimated azimuth and elevation of each of the satellites (n x 2), NaN if never propagated.
+        """
+        with self.lock:
+            start = np.where(np.isfinite(self.sample_time[sat_indices]), self.sample_time[sat_indices], now)
+            elapsed = np.clip(now, start, np.maximum(self.next_due[sat_indices], start)) - start
+            azelev = self.sample_azelev[sat_indices] + np.nan_to_num(self.rates[sat_indices]) * elapsed[:, np.newaxis]
+        azelev[:, 0] %= 360
+        return azelev
+
+    def get_next_due(self):
+        """
+        Returns:
+            float: The time.monotonic() value at which the next satellite is due, inf if no satellite is demanded.
+        """
+        with self.lock:
+            demanded = np.isfinite(self.intervals)
+            return float(np.min(self.next_due[demanded])) if np.any(demanded) else np.inf
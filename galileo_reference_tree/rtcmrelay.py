@@ -0,0 +1,274 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import os
+import socket
+import threading
+import warnings
+from collections import deque
+
+from galileo_reference_tree import constants, metrics
+from galileo_reference_tree.config import Ntrip, Relay
+from galileo_reference_tree.ntripclient import NtripClient, MeteredStream, check_frame_crc, get_frame_size
+
+CONNECTION_RESPONSE = b"ICY 200 OK\r\n\r\n"  # Response sent to local clients once they requested a mount point
+HANDSHAKE_TIMEOUT = 5  # Time in seconds a local client gets to send its mount point request
+
+
+def get_message_type(frame):
+    """
+    Extracts the RTCM message number (DF002) from a raw RTCM3 frame, without decoding the rest of the message.
+
+    Parameters:
+        frame (bytes): The raw RTCM3 frame, including the header.
+
+    Returns:
+        int: The message number of the frame.
+    """
+    return (frame[3] << 4) | (frame[4] >> 4)
+
+
+def read_frames(stream, registry):
+    """
+    Splits a byte stream into raw RTCM3 frames, only validating their CRC. Bytes outside of frames and frames with an
+    invalid CRC are skipped, after which the function resynchronizes on the next preamble. This is the blocking
+    counterpart of ntripclient.read_frame(), sharing its frame layout and CRC check.
+
+    Parameters:
+        stream (MeteredStream): The stream to read from, providing a read(size) method.
+        registry (MetricsRegistry): The registry to count CRC failures in.
+
+    Yields:
+        bytes: The raw RTCM3 frames, including header and CRC.
+    """
+    crc_failures = registry.counter("relay_crc_failures_total")
+    while True:
+        preamble = stream.read(1)
+        if not preamble:
+            return
+        if preamble[0] != constants.RTCM_PREAMBLE:
+            continue
+
+        header = preamble + stream.read(constants.RTCM_HEADER_SIZE - 1)
+        if len(header) < constants.RTCM_HEADER_SIZE:
+            return
+        size = get_frame_size(header)
+        frame = header + stream.read(size - len(header))
+        if len(frame) < size:
+            return
+
+        if not check_frame_crc(frame):
+            crc_failures.inc()
+            continue
+        yield frame
+
+
+class RelayClient(object):
+    """
+    A local client of the relay, with its own bounded queue of frames and a sender thread.
+
+    The upstream reader only appends frames to the queue, so a slow client can never stall the upstream connection.
+    When the client falls behind further than the queue length, the oldest frames are dropped.
+
+    Attributes:
+        conn (socket): The connection with the client.
+        frames (deque[bytes]): The frames waiting to be sent to the client.
+        condition (threading.Condition): Condition used to wake up the sender thread when frames are queued.
+        closed (bool): Whether the connection with the client is closed.
+        dropped (Counter): Counter of the frames dropped for slow clients.
+    """
+
+    def __init__(self, conn, max_frames, registry):
+        """
+        Initializes the RelayClient.
+
+        Parameters:
+            conn (socket): The connection with the client.
+            max_frames (int): The maximum number of frames to queue before dropping the oldest ones.
+            registry (MetricsRegistry): The registry to count dropped frames in.
+        """
+        self.conn = conn
+        self.frames = deque(maxlen=max_frames)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = registry.counter("relay_frames_dropped_total")
+
+    def enqueue(self, frame):
+        """
+        Queues a frame for sending to the client, dropping the oldest queued frame if the queue is full.
+
+        Parameters:
+            frame (bytes): The raw frame to send.
+        """
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped.inc()
+            self.frames.append(frame)
+            self.condition.notify()
+
+    def send_loop(self):
+        """
+        Sends the queued frames to the client until the connection is closed. All frames queued at the time of
+        waking up are sent together in a single write.
+        """
+        while True:
+            with self.condition:
+                while not self.frames and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                data = b"".join(self.frames)
+                self.frames.clear()
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                self.close()
+
+    def close(self):
+        """
+        Closes the connection with the client and stops its sender thread.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.conn.close()
+
+
+class RtcmRelay(object):
+    """
+    Relays the ephemeris messages of a single upstream NTRIP connection to many local clients.
+
+    Local clients connect over TCP or a Unix socket and are treated as NTRIP clients: after sending their mount point
+    request, they receive an 'ICY 200 OK' response followed by the relayed RTCM frames. Tree processes can therefore
+    use the regular NtripClient, configured with the address, port or Unix socket of the relay.
+
+    Attributes:
+        ntrip_config (Ntrip config object): The settings of the upstream NTRIP connection.
+        config (Relay config object): The settings of the relay.
+        registry (MetricsRegistry): The registry the relay telemetry is recorded in.
+        clients (list[RelayClient]): The connected local clients.
+        server (socket): The socket listening for local clients. Initially set to None.
+    """
+
+    def __init__(self, ntrip_config: Ntrip, relay_config: Relay, registry=None):
+        """
+        Initializes the RtcmRelay.
+
+        Parameters:
+            ntrip_config (Ntrip config object): The settings of the upstream NTRIP connection.
+            relay_config (Relay config object): The settings of the relay.
+            registry (MetricsRegistry, optional): The registry to record the relay telemetry in. Defaults to the
+                application-wide registry.
+        """
+        self.ntrip_config = ntrip_config
+        self.config = relay_config
+        self.registry = registry if registry is not None else metrics.registry
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.server = None
+        self.registry.gauge("relay_clients", callback=lambda: len(self.clients))
+
+    def listen(self):
+        """
+        Creates the socket listening for local clients, on the configured Unix socket or TCP address and port.
+        """
+        if self.config.unix_socket:
+            if os.path.exists(self.config.unix_socket):
+                os.remove(self.config.unix_socket)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(self.config.unix_socket)
+        else:
+            self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind((self.config.address, self.config.port))
+        self.server.listen()
+
+    def accept_loop(self):
+        """
+        Accepts local clients and starts a thread for each of them, which answers its mount point request and sends
+        it the relayed frames. A slow or idle client therefore never delays accepting the others.
+        """
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve_client, args=(conn,), daemon=True).start()
+
+    def serve_client(self, conn):
+        """
+        Answers the mount point request of a local client, after which the relayed frames are sent to it until the
+        connection is closed. Clients which do not complete their request within HANDSHAKE_TIMEOUT are disconnected.
+
+        Parameters:
+            conn (socket): The connection with the client.
+        """
+        # Wait for the end of the request headers before responding, as done by an NTRIP caster
+        request = b""
+        conn.settimeout(HANDSHAKE_TIMEOUT)
+        try:
+            while b"\r\n\r\n" not in request:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                request += data
+            if b"\r\n\r\n" not in request:
+                conn.close()
+                return
+            conn.sendall(CONNECTION_RESPONSE)
+        except OSError:
+            conn.close()
+            return
+        conn.settimeout(None)
+
+        client = RelayClient(conn, self.config.max_client_frames, self.registry)
+        with self.clients_lock:
+            self.clients.append(client)
+        client.send_loop()
+
+    def forward(self, frame):
+        """
+        Forwards a frame to all connected clients if its message type is relayed, removing disconnected clients.
+
+        Parameters:
+            frame (bytes): The raw RTCM3 frame.
+        """
+        if get_message_type(frame) not in self.config.message_types:
+            return
+        self.registry.counter("relay_frames_forwarded_total").inc()
+        with self.clients_lock:
+            self.clients = [client for client in self.clients if not client.closed]
+            clients = self.clients
+        for client in clients:
+            client.enqueue(frame)
+
+    def relay_loop(self, upstream_socket):
+        """
+        Reads frames from the upstream connection and forwards them until the upstream connection is closed.
+
+        Parameters:
+            upstream_socket (socket): The connected socket of the upstream NTRIP connection.
+        """
+        stream = MeteredStream(upstream_socket, self.registry.meter("relay_upstream_bytes_per_second"))
+        for frame in read_frames(stream, self.registry):
+            self.forward(frame)
+
+    def run(self):
+        """
+        Connects to the upstream caster, starts listening for local clients and relays frames until the upstream
+        connection is closed. The relay does not reconnect: once the caster closes the connection, all clients are
+        disconnected and the relay stops, so it should be restarted, e.g. by the service manager.
+        """
+        upstream = NtripClient([], self.ntrip_config, self.registry)
+        self.listen()
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        try:
+            self.relay_loop(upstream.socket)
+            warnings.warn("Upstream NTRIP connection closed, stopping the relay")
+        finally:
+            self.server.close()
+            with self.clients_lock:
+                for client in self.clients:
+                    client.close()
@@ -0,0 +1,156 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from galileo_reference_tree import constants, metrics
+
+STOP_SIGNALS = (signal.SIGINT, signal.SIGTERM)  # Signals on which the runtime cancels its tasks and stops
+
+
+class Runtime(object):
+    """
+    Runs the long-running loops of the tree, e.g. the NTRIP client, the propagation and the LED compositor, as tasks
+    of a single asyncio event loop instead of a thread each. The tasks wait for their deadlines and for the state hub
+    on the event loop, so they only wake when they have something to do, and all of them can be cancelled.
+
+    Work which would block the event loop is handed to an executor: the blocking calls to the LED hardware to a
+    dedicated single thread, so frames never queue behind other work, and computations and downloads to the default
+    executor of the loop.
+
+    On SIGINT or SIGTERM, or when any of the tasks fails, all tasks are cancelled and awaited, so their cleanup runs
+    before the runtime stops. Event loops without support for signal handlers, e.g. on Windows, fall back to the
+    handlers of the signal module. The scheduling latency of the event loop, i.e. the time by which a task wakes after its
+    deadline, is sampled continuously and recorded in the metrics registry.
+
+    Attributes:
+        coroutines (list[tuple[str, Coroutine]]): The name and the coroutine of every task to run.
+        tasks (list[asyncio.Task]): The running tasks, empty while not running.
+        signal_handlers (dict[int, Any]): The signals handled while running, with the handler to restore afterwards, or
+            None if the signal is handled by the event loop.
+        hardware_executor (ThreadPoolExecutor): The single thread running the blocking calls to the LED hardware.
+        loop_lag (Histogram): Time in seconds by which the event loop woke a task after its deadline.
+    """
+
+    def __init__(self, registry=None):
+        """
+        Initializes the runtime without any tasks.
+
+        Parameters:
+            registry (MetricsRegistry, optional): The registry to record the scheduling latency in. Defaults to the
+                application-wide registry.
+        """
+        self.coroutines = []
+        self.tasks = []
+        self.signal_handlers = {}
+        self.hardware_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hardware')
+
+        registry = registry if registry is not None else metrics.registry
+        self.loop_lag = registry.histogram("runtime_loop_lag_seconds")
+
+    def add_task(self, name, coroutine):
+        """
+        Adds a task to run once the runtime is started.
+
+        Parameters:
+            name (str): The name of the task.
+            coroutine (Coroutine): The coroutine to run as the task.
+        """
+        self.coroutines.append((name, coroutine))
+
+    async def monitor_loop_lag(self):
+        """
+        Samples the scheduling latency of the event loop every LOOP_LAG_INTERVAL, by measuring how late the loop wakes
+        the monitor after its sleep.
+        """
+        while True:
+            deadline = time.monotonic() + constants.LOOP_LAG_INTERVAL
+            await asyncio.sleep(constants.LOOP_LAG_INTERVAL)
+            self.loop_lag.observe(max(time.monotonic() - deadline, 0))
+
+    def stop(self):
+        """
+        Cancels all tasks, after which the runtime stops once they finished their cleanup.
+        """
+        for task in self.tasks:
+            task.cancel()
+
+    def add_signal_handlers(self, loop):
+        """
+        Stops the runtime on STOP_SIGNALS. If the event loop does not support signal handlers, e.g. on Windows, the
+        handlers are set with the signal module instead, from where stop() is scheduled on the event loop.
+
+        Parameters:
+            loop (asyncio.AbstractEventLoop): The running event loop.
+        """
+        try:
+            for signal_number in STOP_SIGNALS:
+                loop.add_signal_handler(signal_number, self.stop)
+                self.signal_handlers[signal_number] = None
+        except NotImplementedError:
+            for signal_number in STOP_SIGNALS:
+                self.signal_handlers[signal_number] = signal.signal(
+                    signal_number, lambda *_: loop.call_soon_threadsafe(self.stop))
+
+    def remove_signal_handlers(self, loop):
+        """
+        Restores the handling of the signals from before add_signal_handlers().
+
+        Parameters:
+            loop (asyncio.AbstractEventLoop): The running event loop.
+        """
+        for signal_number, handler in self.signal_handlers.items():
+            if handler is None:
+                loop.remove_signal_handler(signal_number)
+            else:
+                signal.signal(signal_number, handler)
+        self.signal_handlers = {}
+
+    async def run_tasks(self):
+        """
+        Runs all tasks until they are stopped or one of them fails. Tasks which finish normally, e.g. the NTRIP client
+        when the caster closes the connection, do not stop the others.
+
+        Raises:
+            Exception: The error of the first task which failed, after all tasks were cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        self.tasks = [asyncio.create_task(coroutine, name=name) for name, coroutine in self.coroutines]
+        self.tasks.append(asyncio.create_task(self.monitor_loop_lag(), name='monitor'))
+        self.coroutines = []
+        try:
+            self.add_signal_handlers(loop)
+            done, _ = await asyncio.wait(self.tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            self.remove_signal_handlers(loop)
+            self.stop()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.tasks = []
+
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    def run(self):
+        """
+        Runs the event loop with all tasks until they are stopped, after which the hardware executor is shut down.
+        """
+        try:
+            asyncio.run(self.run_tasks())
+        finally:
+            self.hardware_executor.shutdown()
+
+    def timing_summary(self):
+        """
+        Summarizes the scheduling latency of the event loop, e.g. to print on shutdown.
+
+        Returns:
+            str: The summary of the scheduling latency.
+        """
+        return 'Event loop lag: mean %.3f ms, p99 <= %.3f ms' % (self.loop_lag.sample()['mean'] * 1e3,
+                                                                 self.loop_lag.quantile(0.99) * 1e3)
@@ -6,6 +6,7 @@
 import datetime
 from math import pi, sqrt, sin, cos, floor, ceil, atan2
 
+import numpy as np
 from astropy.coordinates import GCRS, CartesianRepresentation, ITRS
 from astropy.time import Time
 from skyfield.api import load
@@ -179,6 +180,32 @@ class SatEphemeris(object):
         else:
             raise RuntimeError("Attempted to propagate satellite without ephemeris or TLE")
 
+    def propagate_batch(self, wn, tows):
+        """
+        Propagates the satellite's position to many times at once, like propagate().
+
+        The TLE propagation, dominated by the overhead of each call, is done in a single vectorized call for all times.
+        The ephemeris propagation is cheap per call and is done per time.
+
+        Parameters:
+            wn (int): GPS week number to propagate to
+            tows (np.ndarray): Times of week in seconds to propagate to, which may exceed the week
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The x, y and z positions of the satellite in ECEF coordinates,
+                given in meters.
+
+        Raises:
+            RuntimeError: Raised when no data (TLE or ephemeris) is available for propagation.
+        """
+        if self.wn == 0 and self.tle is not None:
+            return self.propagate_tle(wn, np.asarray(tows, dtype=float))
+        elif self.wn > 0:
+            positions = np.array([self.propagate_ephemeris(tow % constants.SEC_IN_WEEK) for tow in tows], dtype=float)
+            return tuple(positions.reshape(-1, 3).T)
+        else:
+            raise RuntimeError("Attempted to propagate satellite without ephemeris or TLE")
+
     def propagate_tle(self, wn, tow):
         """
         Propagates a TLE (Two-Line Element set) for a satellite to compute its position in ECEF
@@ -240,22 +267,10 @@ class SatEphemeris(object):
             tuple[float, float, float]: The computed ECEF coordinates (x, y, z) of the satellite in meters.
         """
         # Time from the ephemerides reference epoch
-        tk = tow - self.toe
+        tk = self.get_time_from_toe(tow)
 
-        # Update time difference in case of week rollover
-        if tk > constants.SEC_IN_WEEK / 2:
-            tk -= constants.SEC_IN_WEEK
-        elif tk < -constants.SEC_IN_WEEK / 2:
-            tk += constants.SEC_IN_WEEK
-
-        # Compute mean anomaly
-        Mk = self.m0 + (sqrt(constants.MU_EARTH) / sqrt(self.a ** 3) + self.deltaN) * tk
-
-        # Compute the eccentric anomaly
-        Ek = self.getEccentricAnomaly(Mk)
-
-        # Compute the true anomaly
-        vk = atan2(sqrt(1 - self.ecc ** 2) * sin(Ek), (cos(Ek) - self.ecc))
+        # Compute the eccentric and true anomaly
+        Ek, vk = self.get_anomalies(tk)
 
         # Compute argument of latitude from the argument of perigee, true anomaly and the corrections
         uk = self.omega + vk + self.cuc * cos(2 * (self.omega + vk)) + self.cus * sin(2 * (self.omega + vk))
@@ -277,6 +292,76 @@ class SatEphemeris(object):
 
         return x, y, z
 
+    def get_time_from_toe(self, tow):
+        """
+        Computes the time since the time of ephemeris, corrected for a week rollover in between.
+
+        Parameters:
+            tow (float): Time of week in seconds.
+
+        Returns:
+            float: The time in seconds from the time of ephemeris to the given time of week.
+        """
+        tk = tow - self.toe
+
+        # Update time difference in case of week rollover
+        if tk > constants.SEC_IN_WEEK / 2:
+            tk -= constants.SEC_IN_WEEK
+        elif tk < -constants.SEC_IN_WEEK / 2:
+            tk += constants.SEC_IN_WEEK
+        return tk
+
+    def get_anomalies(self, tk):
+        """
+        Computes the eccentric and true anomaly of the satellite from its ephemeris.
+
+        Parameters:
+            tk (float): The time in seconds from the time of ephemeris.
+
+        Returns:
+            tuple[float, float]: The eccentric anomaly and the true anomaly in radians.
+        """
+        # Compute mean anomaly
+        Mk = self.m0 + (sqrt(constants.MU_EARTH) / sqrt(self.a ** 3) + self.deltaN) * tk
+
+        # Compute the eccentric anomaly
+        Ek = self.getEccentricAnomaly(Mk)
+
+        # Compute the true anomaly
+        vk = atan2(sqrt(1 - self.ecc ** 2) * sin(Ek), (cos(Ek) - self.ecc))
+        return Ek, vk
+
+    def get_argument_of_latitude(self, wn, tow):
+        """
+        Computes the argument of latitude of the satellite, being the angle along its orbit from the ascending node.
+
+        Like propagate(), the ephemeris is used when available and the TLE otherwise. For the ephemeris, the argument
+        of latitude includes the harmonic corrections. For the TLE, the mean argument of latitude is propagated with
+        the secular rates of the SGP4 model, which is accurate to a fraction of a degree for the near-circular Galileo
+        orbits. The difference between GPS time and UTC (the leap seconds) is neglected.
+
+        Parameters:
+            wn (int): GPS week number.
+            tow (float): Time of week in seconds.
+
+        Returns:
+            float: The argument of latitude in degrees, from 0 to 360.
+
+        Raises:
+            RuntimeError: Raised when no data (TLE or ephemeris) is available.
+        """
+        if self.wn == 0 and self.tle is not None:
+            model = self.tle.model
+            jd = constants.GPS_EPOCH_JD + (wn * constants.SEC_IN_WEEK + tow) / constants.SEC_IN_DAY
+            minutes = (jd - model.jdsatepoch - model.jdsatepochF) * constants.MIN_IN_DAY
+            uk = model.argpo + model.argpdot * minutes + model.mo + model.mdot * minutes
+        elif self.wn > 0:
+            _, vk = self.get_anomalies(self.get_time_from_toe(tow))
+            uk = self.omega + vk + self.cuc * cos(2 * (self.omega + vk)) + self.cus * sin(2 * (self.omega + vk))
+        else:
+            raise RuntimeError("Attempted to propagate satellite without ephemeris or TLE")
+        return (uk * constants.RAD_TO_DEG) % 360
+
     def getEccentricAnomaly(self, mean_anomaly):
         """
         Calculate the eccentric anomaly for a given mean anomaly
@@ -4,10 +4,76 @@
 #  For details, see the LICENSE file in the project root.
 
 import datetime
-from math import pi
+import time
 
 import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
+
+from galileo_reference_tree import constants
+
+HEALTH_COLORS = to_rgba_array(['green', 'orange', 'red'])  # Colors for healthy, unknown and unhealthy satellites
+
+
+def to_polar(coords):
+    """
+    Converts azimuth/elevation coordinates to the polar coordinates of the plot. Positions below the horizon become NaN,
+    so they are not drawn and break the tracks passing through them.
+
+    Parameters:
+        coords (np.ndarray): The azimuth and elevation in degrees along the last axis.
+
+    Returns:
+        np.ndarray: The angle in radians and the elevation in degrees along the last axis.
+    """
+    polar = np.stack([np.radians(coords[..., 0]), coords[..., 1]], axis=-1)
+    polar[~(coords[..., 1] >= 0)] = np.nan
+    return polar
+
+
+class TrackBuffer(object):
+    """
+    The recent track of every satellite on the sky, kept in a fixed-size ring buffer.
+
+    The buffer is allocated once with room for the given number of points per satellite. Every new sample overwrites
+    the oldest one, so the memory use and the cost of drawing the tracks stay the same however long the plot runs.
+
+    Attributes:
+        points (np.ndarray): The azimuth and elevation in degrees of each satellite (first axis) at each sample (second
+            axis), NaN where no sample was taken yet.
+        head (int): The index of the sample to overwrite next, which holds the oldest sample.
+    """
+
+    def __init__(self, max_sats, length):
+        """
+        Initializes an empty track buffer.
+
+        Parameters:
+            max_sats (int): The number of satellites.
+            length (int): The number of samples kept per satellite.
+        """
+        self.points = np.full((max_sats, length, 2), np.nan)
+        self.head = 0
+
+    def append(self, coords):
+        """
+        Stores a new sample of all satellites, replacing the oldest one.
+
+        Parameters:
+            coords (np.ndarray): The azimuth and elevation of each satellite in degrees, NaN if unknown.
+        """
+        self.points[:, self.head] = coords
+        self.head = (self.head + 1) % self.points.shape[1]
+
+    def get_tracks(self):
+        """
+        Returns the tracks of all satellites, ordered from the oldest to the latest sample.
+
+        Returns:
+            np.ndarray: The azimuth and elevation in degrees of each satellite at each sample.
+        """
+        return np.roll(self.points, -self.head, axis=1)
 
 
 class SkyPlot(object):
@@ -18,24 +84,45 @@ class SkyPlot(object):
     on a polar graph based on their azimuth and elevation coordinates, with different colors indicating the signal health
     of each satellite. The class also offers dynamic updates to the plot.
 
+    To keep the updates cheap, the plot is redrawn with blitting. The static part of the figure (axes, grid and tick
+    labels) is rendered once and cached. On top of it, the satellite labels and the title are cached as a second
+    layer, which is only redrawn when a label moved or the title changed. Every update then only restores this cached
+    layer and draws the single scatter collection holding all satellites.
+
+    Optionally, the plot shows the recent track of every satellite as a trail, and its predicted track ahead. The trail
+    is sampled every TRACK_SAMPLE_INTERVAL seconds into a fixed-size ring buffer, and all trails are drawn as a single
+    line collection, as are all predictions. Both are part of the cached labels layer, so they are only redrawn when a
+    new sample was taken or the predictions changed.
+
     Attributes:
         max_sats (int): The maximum number of satellites that can be displayed on the plot.
-        annot (list[list[object]]): List of annotation objects used to label satellites on the plot.
-        sats_plot (list[list[matplotlib.pyplot]]): List of plots representing satellites on the polar graph.
+        annot (list[matplotlib.text.Annotation]): List of annotation objects used to label satellites on the plot.
+        sats_plot (matplotlib.collections.PathCollection): The scatter collection with a point for every satellite.
         fig (matplotlib.figure.Figure): The matplotlib figure object for the plot.
         ax (matplotlib.axes._subplots.PolarAxesSubplot): The polar axis for the plot.
+        title (matplotlib.text.Text): The title of the plot, showing the time of the latest update.
+        label_coords (np.ndarray): The rounded azimuth and elevation at which each label was drawn, NaN if hidden.
+        background (object): The cached static part of the figure, None if not rendered yet.
+        labels_background (object): The cached static part of the figure with the tracks, labels and title drawn on
+            top, None if they have to be redrawn.
+        trails (TrackBuffer | None): The recent tracks of the satellites, None if trails are disabled.
+        trail_time (float): The monotonic time at which the latest trail sample was taken.
+        trails_plot (matplotlib.collections.LineCollection): The line collection with the trail of every satellite.
+        predicted (np.ndarray | None): The predicted tracks currently shown, None if there are none.
+        predictions_plot (matplotlib.collections.LineCollection): The line collection with the predicted track of every
+            satellite.
     """
 
-    def __init__(self, max_sats):
+    def __init__(self, max_sats, trail_length=0):
         """
         Initializes a visualization object for satellite plotting on a polar map.
 
         Parameters:
             max_sats (int): Defines the maximum number of satellites that the plot will track.
+            trail_length (int, optional): The number of samples in the trail of each satellite. Defaults to 0, which
+                disables the trails.
         """
         self.max_sats = max_sats
-        self.annot = [[] for _ in range(max_sats)]
-        self.sats_plot = [[] for _ in range(max_sats)]
 
         plt.ion()
         self.fig, self.ax = plt.subplots(subplot_kw={'projection': 'polar'})
@@ -44,11 +131,103 @@ class SkyPlot(object):
         self.ax.set_ylim([90, 0])
         self.ax.set_yticks([0, 15, 30, 45, 60, 90])
 
-        satIdx: int
-        default_coords = [-5, -5]
-        for satIdx in range(max_sats):
-            self.sats_plot[satIdx] = plt.polar([], [], color='green', marker='.')
-            self.annot[satIdx] = self.ax.annotate('%s' % (satIdx + 1), xy=default_coords, textcoords='data')
+        # All dynamic artists are animated, so they are left out of the cached background
+        self.sats_plot = self.ax.scatter(np.full(max_sats, np.nan), np.full(max_sats, np.nan), marker='.',
+                                         color='green', animated=True)
+        self.annot = [self.ax.annotate('%s' % (satIdx + 1), xy=(0, 0), textcoords='data', visible=False,
+                                       animated=True) for satIdx in range(max_sats)]
+        self.title = self.ax.set_title('', animated=True)
+        self.trails_plot = self.ax.add_collection(LineCollection([], colors='gray', linewidths=1, animated=True))
+        self.predictions_plot = self.ax.add_collection(LineCollection([], colors='gray', linewidths=1,
+                                                                      linestyles='dotted', animated=True))
+
+        self.trails = TrackBuffer(max_sats, trail_length) if trail_length else None
+        self.trail_time = -np.inf
+        self.predicted = None
+
+        self.label_coords = np.full((max_sats, 2), np.nan)
+        self.background = None
+        self.labels_background = None
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        """
+        Caches the static part of the figure after every full redraw of the figure, e.g. after resizing the window.
+
+        Parameters:
+            event (matplotlib.backend_bases.DrawEvent): The draw event.
+        """
+        canvas = self.fig.canvas
+        self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self.labels_background = None
+        self.draw_overlay()
+        self.ax.draw_artist(self.sats_plot)
+
+    def draw_overlay(self):
+        """
+        Draws the tracks, the labels and the title on top of the static part of the figure and caches the result.
+        """
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        self.ax.draw_artist(self.trails_plot)
+        self.ax.draw_artist(self.predictions_plot)
+        for annot in self.annot:
+            if annot.get_visible():
+                self.ax.draw_artist(annot)
+        self.ax.draw_artist(self.title)
+        self.labels_background = canvas.copy_from_bbox(self.fig.bbox)
+
+    def update_labels(self, coords, visible):
+        """
+        Moves the labels of the satellites which moved by at least the label step, and shows or hides the labels of
+        the satellites which rose or set.
+
+        Parameters:
+            coords (np.ndarray): The azimuth and elevation of each satellite in degrees.
+            visible (np.ndarray): Whether each satellite is shown.
+
+        Returns:
+            bool: Whether any label changed.
+        """
+        label_coords = np.where(visible[:, np.newaxis], np.round(coords / constants.SKYPLOT_LABEL_STEP) *
+                                constants.SKYPLOT_LABEL_STEP, np.nan)
+        moved = np.flatnonzero(np.any(label_coords != self.label_coords, axis=1) &
+                               ~np.all(np.isnan(label_coords) & np.isnan(self.label_coords), axis=1))
+        for satIdx in moved:
+            self.annot[satIdx].set_visible(bool(visible[satIdx]))
+            if visible[satIdx]:
+                # The text is placed at the position of the satellite itself, so both the anchor and the text move
+                position = (np.radians(coords[satIdx, 0]), coords[satIdx, 1])
+                self.annot[satIdx].xy = position
+                self.annot[satIdx].set_position(position)
+        self.label_coords = label_coords
+        return len(moved) > 0
+
+    def update_tracks(self, coords, predicted, now):
+        """
+        Takes a new trail sample once the sample interval passed, and replaces the predicted tracks when they changed.
+
+        Parameters:
+            coords (np.ndarray): The azimuth and elevation of each satellite in degrees.
+            predicted (np.ndarray | None): The predicted azimuth and elevation in degrees of each satellite (first axis)
+                at each future sample (second axis), None to leave the predictions unchanged.
+            now (float): The current time in seconds, used to time the trail samples.
+
+        Returns:
+            bool: Whether any track changed.
+        """
+        changed = False
+        if self.trails is not None and now - self.trail_time >= constants.TRACK_SAMPLE_INTERVAL:
+            self.trail_time = now
+            self.trails.append(coords)
+            self.trails_plot.set_segments(to_polar(self.trails.get_tracks()))
+            changed = True
+        if predicted is not None and (self.predicted is None or
+                                      not np.array_equal(predicted, self.predicted, equal_nan=True)):
+            self.predicted = predicted.copy()
+            self.predictions_plot.set_segments(to_polar(predicted))
+            changed = True
+        return changed
 
     def update_plot(self, ephemeris, azelev):
         """
@@ -65,26 +244,55 @@ class SkyPlot(object):
                 being the elevation (in degrees). If a satellite list is empty or its elevation is negative, the satellite
                 is hidden in the plot.
         """
-        plt.show()
-        for satIdx in range(self.max_sats):
-            if len(azelev[satIdx]) and azelev[satIdx][1] < 0:
-                Line2D.set_alpha(self.sats_plot[satIdx][0], 0)
-                self.annot[satIdx].set_alpha(0)
-            elif len(azelev[satIdx]) and azelev[satIdx][1] >= 0:
-                Line2D.set_alpha(self.sats_plot[satIdx][0], 1)
-                Line2D.set_xdata(self.sats_plot[satIdx][0], [azelev[satIdx][0] / 180 * pi])
-                Line2D.set_ydata(self.sats_plot[satIdx][0], [azelev[satIdx][1]])
-                if ephemeris[satIdx].signalHealth == 0:
-                    Line2D.set_color(self.sats_plot[satIdx][0], color='green')
-                elif ephemeris[satIdx].signalHealth == -1:
-                    Line2D.set_color(self.sats_plot[satIdx][0], color='orange')
-                else:
-                    Line2D.set_color(self.sats_plot[satIdx][0], color='red')
-
-                self.annot[satIdx].set_alpha(1)
-                self.annot[satIdx].xy = [azelev[satIdx][0] / 180 * pi, azelev[satIdx][1]]
-                self.annot[satIdx].set_x(azelev[satIdx][0] / 180 * pi)
-                self.annot[satIdx].set_y(azelev[satIdx][1])
-        plt.draw()
-        plt.pause(0.02)
-        self.ax.set_title('Latest update %s' % datetime.datetime.now(datetime.UTC).strftime('%Y/%m/%d - %H:%M:%S'))
+        coords = np.array([azelev[satIdx][:2] if len(azelev[satIdx]) else (np.nan, np.nan)
+                           for satIdx in range(self.max_sats)], dtype=float).reshape(-1, 2)
+        health = np.array([ephemeris[satIdx].signalHealth for satIdx in range(self.max_sats)])
+        self.update_satellites(coords, health)
+
+    def update_satellites(self, coords, health, predicted=None, timestamp=None):
+        """
+        Updates the plot from the state of all satellites at once.
+
+        Parameters:
+            coords (np.ndarray): The azimuth and elevation of each satellite in degrees, NaN if not propagated yet.
+                Satellites with a negative elevation are hidden.
+            health (np.ndarray): The signal health of each satellite (-1 for unknown, 0 for healthy, other values for
+                unhealthy).
+            predicted (np.ndarray, optional): The predicted azimuth and elevation in degrees of each satellite (first
+                axis) at each future sample (second axis). Defaults to leaving the predictions unchanged.
+            timestamp (datetime.datetime, optional): The UTC time of the satellite state, e.g. a simulated time when
+                rendering offline. Defaults to the current time.
+        """
+        if timestamp is None:
+            timestamp = datetime.datetime.now(datetime.UTC)
+            now = time.monotonic()
+        else:
+            now = timestamp.timestamp()
+
+        visible = coords[:, 1] >= 0
+
+        # Hidden satellites get a NaN position, which is not drawn
+        offsets = np.where(visible[:, np.newaxis], np.column_stack([np.radians(coords[:, 0]), coords[:, 1]]), np.nan)
+        self.sats_plot.set_offsets(offsets)
+        self.sats_plot.set_color(HEALTH_COLORS[np.where(health == 0, 0, np.where(health == -1, 1, 2))])
+
+        labels_changed = self.update_labels(coords, visible)
+        labels_changed |= self.update_tracks(coords, predicted, now)
+        title = 'Latest update %s' % timestamp.strftime('%Y/%m/%d - %H:%M:%S')
+        if title != self.title.get_text():
+            self.title.set_text(title)
+            labels_changed = True
+
+        canvas = self.fig.canvas
+        if self.background is None:
+            # The first full draw shows the figure and caches the background through on_draw
+            plt.show()
+            canvas.draw()
+        else:
+            if labels_changed or self.labels_background is None:
+                self.draw_overlay()
+            else:
+                canvas.restore_region(self.labels_background)
+            self.ax.draw_artist(self.sats_plot)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
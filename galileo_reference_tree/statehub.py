@@ -0,0 +1,267 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import asyncio
+import threading
+import time
+
+from galileo_reference_tree import metrics
+
+# Topics of the state updates
+TOPIC_EPHEMERIS = 'ephemeris'  # An ephemeris, and with it the signal health, of a satellite changed
+TOPIC_AZELEV = 'azelev'  # The satellites were propagated to new positions
+TOPIC_FRAME = 'frame'  # A new frame was shown on the LED output
+TOPIC_DEMAND = 'demand'  # The satellites needed by the consumers of the propagation, or their rates, changed
+
+
+class Subscription(object):
+    """
+    A subscriber's view on a set of topics of the state hub, remembering the version of each topic it has seen.
+
+    Attributes:
+        hub (StateHub): The hub the subscription belongs to.
+        topics (tuple[str]): The subscribed topics.
+        versions (dict): The version of each topic seen by the subscriber.
+    """
+
+    def __init__(self, hub, topics):
+        """
+        Initializes the subscription, starting from the current version of each topic.
+
+        Parameters:
+            hub (StateHub): The hub the subscription belongs to.
+            topics (tuple[str]): The topics to subscribe to.
+        """
+        self.hub = hub
+        self.topics = topics
+        self.versions = {topic: hub.get_version(topic) for topic in topics}
+
+    def get_changed(self):
+        """
+        Returns:
+            list[str]: The subscribed topics which were published since they were last seen.
+        """
+        return [topic for topic in self.topics if self.hub.versions.get(topic, 0) != self.versions[topic]]
+
+    def wait(self, timeout=None):
+        """
+        Waits until any of the subscribed topics is published, and marks the published topics as seen. Returns
+        immediately if a topic was already published since it was last seen.
+
+        Parameters:
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+
+        Returns:
+            list[str]: The topics which were published, empty if the timeout expired first.
+        """
+        with self.hub.condition:
+            changed = self.hub.condition.wait_for(self.get_changed, timeout)
+            self.mark_seen(changed)
+        return changed
+
+    def mark_seen(self, changed):
+        """
+        Marks the published topics as seen, recording the wake-up latency since the latest of their publications. Must
+        be called while holding the condition of the hub.
+
+        Parameters:
+            changed (list[str]): The topics which were published.
+        """
+        hub = self.hub
+        for topic in changed:
+            self.versions[topic] = hub.versions[topic]
+        if changed:
+            hub.wake_latency.observe(time.monotonic() - max(hub.publish_times[topic] for topic in changed))
+
+
+class AsyncSubscription(Subscription):
+    """
+    A subscription for tasks running on an event loop, which waits for the topics without blocking the loop. The
+    publishing threads wake the loop through a listener.
+
+    Attributes:
+        loop (asyncio.AbstractEventLoop): The event loop of the subscriber.
+        published (asyncio.Event): Set when any of the subscribed topics is published.
+    """
+
+    def __init__(self, hub, topics, loop):
+        """
+        Initializes the subscription, starting from the current version of each topic.
+
+        Parameters:
+            hub (StateHub): The hub the subscription belongs to.
+            topics (tuple[str]): The topics to subscribe to.
+            loop (asyncio.AbstractEventLoop): The event loop of the subscriber.
+        """
+        super().__init__(hub, topics)
+        self.loop = loop
+        self.published = asyncio.Event()
+        hub.add_listener(topics, self.on_publish)
+
+    def on_publish(self, topic):
+        """
+        Wakes the subscriber, called from the publishing thread.
+
+        Parameters:
+            topic (str): The published topic.
+        """
+        self.loop.call_soon_threadsafe(self.published.set)
+
+    async def wait(self, timeout=None):
+        """
+        Waits until any of the subscribed topics is published, and marks the published topics as seen. Returns
+        immediately if a topic was already published since it was last seen.
+
+        Parameters:
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to waiting indefinitely.
+
+        Returns:
+            list[str]: The topics which were published, empty if the timeout expired first.
+        """
+        # Clear the event before checking the versions, so a publication in between is not missed. The event may
+        # still be set by a publication which was already seen, so keep waiting until a topic actually changed.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.published.clear()
+        while not self.get_changed():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self.published.wait(), remaining)
+            except TimeoutError:
+                break
+            self.published.clear()
+
+        with self.hub.condition:
+            changed = self.get_changed()
+            self.mark_seen(changed)
+        return changed
+
+    def close(self):
+        """
+        Stops receiving the publications, e.g. once the event loop is closing.
+        """
+        self.hub.remove_listener(self.on_publish)
+
+
+class StateHub(object):
+    """
+    Central hub through which the components announce changes of the shared state, so others can react to them
+    instead of polling for them.
+
+    Every topic has a version, which is incremented on every publication. The state itself stays where it is (e.g. the
+    ephemerides and the azimuth/elevation lists); the hub only carries the versions, so a subscriber which was busy
+    wakes once for any number of publications in between. Threads wait on a subscription, while tasks on an event loop
+    wait on an asynchronous subscription, or register a listener, which is called from the publishing thread.
+
+    Attributes:
+        condition (threading.Condition): Notified on every publication.
+        versions (dict): The version of each topic, 0 if never published.
+        publish_times (dict): The time.monotonic() value of the latest publication of each topic.
+        listeners (list[tuple[tuple[str], Callable]]): The topics and the callback of every listener.
+        registry (MetricsRegistry): The registry the publications and wake-up latency are recorded in.
+        updates (dict): Counter of the publications per topic.
+        wake_latency (Histogram): Time in seconds between a publication and the wake-up of a subscriber.
+    """
+
+    def __init__(self, registry=None):
+        """
+        Initializes the hub without any publications.
+
+        Parameters:
+            registry (MetricsRegistry, optional): The registry to record the publications and wake-up latency in.
+                Defaults to the application-wide registry.
+        """
+        self.condition = threading.Condition()
+        self.versions = {}
+        self.publish_times = {}
+        self.listeners = []
+
+        self.registry = registry if registry is not None else metrics.registry
+        self.updates = {}
+        self.wake_latency = self.registry.histogram("state_wake_latency_seconds")
+
+    def get_version(self, topic):
+        """
+        Parameters:
+            topic (str): The topic.
+
+        Returns:
+            int: The current version of the topic, 0 if never published.
+        """
+        return self.versions.get(topic, 0)
+
+    def publish(self, topic):
+        """
+        Announces a change of the state of a topic, waking all subscribers and calling all listeners of the topic.
+
+        Parameters:
+            topic (str): The topic which changed.
+        """
+        with self.condition:
+            self.versions[topic] = self.versions.get(topic, 0) + 1
+            self.publish_times[topic] = time.monotonic()
+            if topic not in self.updates:
+                self.updates[topic] = self.registry.counter("state_updates_total", topic=topic)
+            self.updates[topic].inc()
+            self.condition.notify_all()
+            listeners = list(self.listeners)
+        for topics, callback in listeners:
+            if topic in topics:
+                callback(topic)
+
+    def subscribe(self, *topics):
+        """
+        Subscribes to the given topics, starting from their current versions.
+
+        Parameters:
+            *topics (str): The topics to subscribe to.
+
+        Returns:
+            Subscription: The subscription to wait on.
+        """
+        with self.condition:
+            return Subscription(self, topics)
+
+    def subscribe_async(self, *topics):
+        """
+        Subscribes a task on the running event loop to the given topics, starting from their current versions. The
+        subscription should be closed when the task ends.
+
+        Parameters:
+            *topics (str): The topics to subscribe to.
+
+        Returns:
+            AsyncSubscription: The subscription to wait on.
+        """
+        loop = asyncio.get_running_loop()
+        with self.condition:
+            return AsyncSubscription(self, topics, loop)
+
+    def add_listener(self, topics, callback):
+        """
+        Registers a callback, called with the topic from the publishing thread on every publication of the topics. The
+        callback should return quickly, e.g. by scheduling work on an event loop.
+
+        Parameters:
+            topics (tuple[str]): The topics to listen to.
+            callback (Callable[[str], None]): The callback.
+        """
+        with self.condition:
+            self.listeners.append((tuple(topics), callback))
+
+    def remove_listener(self, callback):
+        """
+        Removes all registrations of a callback.
+
+        Parameters:
+            callback (Callable[[str], None]): The callback to remove.
+        """
+        with self.condition:
+            self.listeners = [(topics, listener) for topics, listener in self.listeners if listener != callback]
+
+
+# Default hub used throughout the application
+hub = StateHub()
@@ -3,7 +3,9 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
-from math import sqrt, sin, cos, hypot, atan2, pi
+from math import sqrt, sin, cos, pi
+
+import numpy as np
 
 from galileo_reference_tree import constants
 
@@ -48,23 +50,24 @@ def ecef2aer(x, y, z, lat0, lon0, alt0):
     ESA Communications.
 
     Parameters:
-        x (float): X-coordinate of the target in ECEF (meters).
-        y (float): Y-coordinate of the target in ECEF (meters).
-        z (float): Z-coordinate of the target in ECEF (meters).
+        x (float | np.ndarray): X-coordinate(s) of the target in ECEF (meters).
+        y (float | np.ndarray): Y-coordinate(s) of the target in ECEF (meters).
+        z (float | np.ndarray): Z-coordinate(s) of the target in ECEF (meters).
         lat0 (float): Latitude of the observation point in degrees.
         lon0 (float): Longitude of the observation point in degrees.
         alt0 (float): Altitude of the observation point in meters.
 
     Returns:
-        tuple[float, float, float]: The (azimuth, elevation, range) in degrees and meters respectively.
+        tuple[float, float, float]: The (azimuth, elevation, range) in degrees and meters respectively, as arrays
+            when the coordinates are given as arrays.
     """
     x0, y0, z0 = llh2ecef(lat0, lon0, alt0)
     e, n, u = ecef2enu(x - x0, y - y0, z - z0, lat0, lon0)
 
-    r = hypot(e, n)
-    slant_range = hypot(r, u)
-    elev = atan2(u, r) * constants.RAD_TO_DEG
-    az = atan2(e, n) % (2 * pi) * constants.RAD_TO_DEG
+    r = np.hypot(e, n)
+    slant_range = np.hypot(r, u)
+    elev = np.arctan2(u, r) * constants.RAD_TO_DEG
+    az = np.arctan2(e, n) % (2 * pi) * constants.RAD_TO_DEG
 
     return az, elev, slant_range
 
@@ -3,16 +3,101 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
 import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import struct
+import time
 import warnings
 
 import requests
 from bs4 import BeautifulSoup
+from sgp4.api import Satrec, WGS72
 from skyfield.api import load
 from skyfield.sgp4lib import EarthSatellite
 
 from galileo_reference_tree import constants
 
+TLE_URL = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=galileo&FORMAT=csv'  # Galileo TLE data from CelesTrak
+TLE_FILENAME = 'galileo_tle.csv'  # custom filename, not 'gp.php'
+TLE_META_FILENAME = 'galileo_tle.json'  # ETag and Last-Modified headers of the downloaded TLE data
+TLE_CACHE_FILENAME = 'galileo_tle.bin'  # Binary cache of the element sets parsed from the TLE data
+TLE_CACHE_MAGIC = b'GRTTLE01'  # Identifies the format of the binary cache
+TLE_CACHE_HEADER = struct.Struct('<8s32sI')  # Magic, SHA-256 of the TLE file and the number of records
+TLE_CACHE_RECORD = struct.Struct('<i10d')  # Catalog number, epoch and the SGP4 mean elements of one satellite
+SGP4_EPOCH_JD = 2433281.5  # Julian date of the SGP4 epoch reference (1949 December 31 00:00 UT)
+GSAT_MAP_FILENAME = 'gsat_to_svid.json'  # Cache of the GSAT to SVID mapping retrieved from the GSC
+
+# GSAT to SVID mapping as published by the GSC, used when no cached mapping is available (e.g. on offline starts)
+FALLBACK_GSAT_TO_SVID_MAP = {'GSAT0101': 11, 'GSAT0102': 12, 'GSAT0103': 19, 'GSAT0104': 20,
+                             'GSAT0201': 18, 'GSAT0202': 14, 'GSAT0203': 26, 'GSAT0204': 22,
+                             'GSAT0205': 24, 'GSAT0206': 30, 'GSAT0207': 7, 'GSAT0208': 8,
+                             'GSAT0209': 9, 'GSAT0210': 1, 'GSAT0211': 2, 'GSAT0212': 3,
+                             'GSAT0213': 4, 'GSAT0214': 5, 'GSAT0215': 21, 'GSAT0216': 25,
+                             'GSAT0217': 27, 'GSAT0218': 31, 'GSAT0219': 36, 'GSAT0220': 13,
+                             'GSAT0221': 15, 'GSAT0222': 33, 'GSAT0223': 34, 'GSAT0224': 10}
+
+
+def save_tle_cache(digest, sats):
+    """
+    Saves the element sets of the given satellites to the binary cache, keyed by the hash of the TLE file they were
+    parsed from. The cache is written to a temporary file first and then moved into place.
+
+    Parameters:
+        digest (bytes): The SHA-256 digest of the TLE file.
+        sats (list[EarthSatellite]): The satellites parsed from the TLE file.
+    """
+    records = [TLE_CACHE_HEADER.pack(TLE_CACHE_MAGIC, digest, len(sats))]
+    for sat in sats:
+        m = sat.model
+        epoch = (m.jdsatepoch - SGP4_EPOCH_JD) + m.jdsatepochF
+        records.append(TLE_CACHE_RECORD.pack(m.satnum, epoch, m.bstar, m.ndot, m.nddot, m.ecco, m.argpo, m.inclo,
+                                             m.mo, m.no_kozai, m.nodeo))
+    records.append('\n'.join(sat.name or '' for sat in sats).encode('utf-8'))
+
+    path = load.path_to(TLE_CACHE_FILENAME)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(b''.join(records))
+    os.replace(path + '.tmp', path)
+
+
+def load_tle_cache(digest, ts):
+    """
+    Loads the satellites from the binary cache in a single read, if the cache was created from the TLE file with the
+    given hash. Only the SGP4 initialization is repeated; all text parsing is skipped.
+
+    Parameters:
+        digest (bytes): The SHA-256 digest of the current TLE file.
+        ts (Timescale): The timescale used to create the satellite epochs.
+
+    Returns:
+        list[EarthSatellite] | None: The cached satellites, or None if there is no valid cache for the TLE file.
+    """
+    if not load.exists(TLE_CACHE_FILENAME):
+        return None
+    with open(load.path_to(TLE_CACHE_FILENAME), 'rb') as f:
+        data = f.read()
+    if len(data) < TLE_CACHE_HEADER.size:
+        return None
+    magic, cached_digest, count = TLE_CACHE_HEADER.unpack_from(data)
+    names_offset = TLE_CACHE_HEADER.size + count * TLE_CACHE_RECORD.size
+    if magic != TLE_CACHE_MAGIC or cached_digest != digest or len(data) < names_offset:
+        return None
+
+    names = data[names_offset:].decode('utf-8').split('\n')
+    sats = []
+    for name, record in zip(names, TLE_CACHE_RECORD.iter_unpack(data[TLE_CACHE_HEADER.size:names_offset])):
+        satrec = Satrec()
+        satrec.sgp4init(WGS72, 'i', *record)
+        sat = EarthSatellite.from_satrec(satrec, ts)
+        sat.name = name
+        sats.append(sat)
+    return sats
+
 
 class TwoLineElements(object):
     """
@@ -24,31 +109,154 @@ class TwoLineElements(object):
     Attributes:
         sats (list[EarthSatellite]): A list of EarthSatellite objects created from TLE data.
         gsat_to_svid_map (dict): A dictionary mapping GSAT satellite names to SVIDs.
+        gsat_to_svid_map_stale (bool): Whether the mapping comes from an outdated cache or the fallback table, and
+            should be refreshed.
+        gsat_map_checked_at (float | None): The monotonic time of the latest attempt to refresh the mapping, or None.
+        gsat_map_failures (int): The number of consecutive failed attempts to refresh the mapping.
     """
 
     def __init__(self):
         """
-        Initialization function responsible for downloading, parsing, and using Galileo satellite Two-Line Element (TLE)
-        data in CSV format. The class fetches data from CelesTrak if the local file does not exist
-        or is outdated. Loaded data is used to create EarthSatellite objects and populate a mapping
-        between GSAT identifiers and SVID values.
+        Initialization function responsible for parsing and using Galileo satellite Two-Line Element (TLE) data in CSV
+        format. Only the local TLE file is used, whatever its age, so the startup never waits for CelesTrak; downloading
+        missing or outdated data is left to the background refresh. Loaded data is used to create EarthSatellite
+        objects. The mapping between GSAT identifiers and SVID values is loaded from the cache on disk, or the bundled
+        fallback table, without any network requests.
         """
-        name = 'galileo_tle.csv'  # custom filename, not 'gp.php'
+        self.sats = []
+        self.tle_checked_at = None
+        if load.exists(TLE_FILENAME):
+            self.sats = self.load_tle()
 
-        base = 'https://celestrak.org/NORAD/elements/gp.php'
-        url = base + '?GROUP=galileo&FORMAT=csv'
+        self.gsat_to_svid_map = {}
+        self.gsat_to_svid_map_stale = True
+        self.gsat_map_checked_at = None
+        self.gsat_map_failures = 0
+
+        self.load_gsat_to_svid_map()
 
-        if not load.exists(name) or load.days_old(name) >= constants.TLE_MAX_AGE:
-            load.download(url, filename=name)
+    @staticmethod
+    def load_tle():
+        """
+        Loads the satellites of the local TLE file. They are taken from the binary cache if it matches the hash of the
+        TLE file. Otherwise, the TLE file is parsed into EarthSatellite objects and the binary cache is updated.
 
-        with load.open(name, mode='r') as f:
-            data = list(csv.DictReader(f))
+        Returns:
+            list[EarthSatellite]: The satellites in the TLE file.
+        """
+        with load.open(TLE_FILENAME, mode='r') as f:
+            source = f.read()
+        digest = hashlib.sha256(source.encode('utf-8')).digest()
 
         ts = load.timescale()
-        self.sats = [EarthSatellite.from_omm(ts, fields) for fields in data]
-        self.gsat_to_svid_map = {}
+        sats = load_tle_cache(digest, ts)
+        if sats is not None:
+            return sats
+
+        data = list(csv.DictReader(io.StringIO(source)))
+        sats = [EarthSatellite.from_omm(ts, fields) for fields in data]
+        try:
+            save_tle_cache(digest, sats)
+        except OSError as err:
+            warnings.warn("Could not save TLE cache {0}: {1}".format(TLE_CACHE_FILENAME, err))
+        return sats
+
+    def download_tle(self):
+        """
+        Downloads the TLE data from CelesTrak using a conditional request, based on the ETag and Last-Modified headers
+        of the previous download. The data is written to a temporary file first and then moved into place, so the
+        local file is never partially written. If CelesTrak reports that the data is unchanged, only the modification
+        time of the local file is updated.
 
-        self.get_gsat_to_svid_map()
+        Returns:
+            bool: True if new data was downloaded, False if the data was unchanged.
+
+        Raises:
+            RequestException: If there is an issue with making the HTTP request, or the response is an error.
+        """
+        headers = {}
+        if load.exists(TLE_FILENAME) and load.exists(TLE_META_FILENAME):
+            with load.open(TLE_META_FILENAME, mode='r') as f:
+                meta = json.load(f)
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        res = requests.get(TLE_URL, headers=headers, timeout=20)
+        if res.status_code == 304:
+            os.utime(load.path_to(TLE_FILENAME))
+            return False
+        res.raise_for_status()
+
+        path = load.path_to(TLE_FILENAME)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(res.content)
+        os.replace(path + '.tmp', path)
+        with open(load.path_to(TLE_META_FILENAME), 'w') as f:
+            json.dump({'etag': res.headers.get('ETag'), 'last_modified': res.headers.get('Last-Modified')}, f)
+        return True
+
+    def tle_refresh_due(self):
+        """
+        Determines whether the TLE data should be checked for updates. This is the case when the local file is
+        missing or older than TLE_MAX_AGE, and afterwards every TLE_REFRESH_INTERVAL.
+
+        Returns:
+            bool: True if the TLE data should be checked for updates.
+        """
+        if self.tle_checked_at is None:
+            return not load.exists(TLE_FILENAME) or load.days_old(TLE_FILENAME) >= constants.TLE_MAX_AGE
+        return time.monotonic() - self.tle_checked_at >= constants.TLE_REFRESH_INTERVAL
+
+    def refresh_tle(self, ephemeris):
+        """
+        Checks CelesTrak for updated TLE data and, if there is any, hot swaps the new element sets into the given
+        ephemeris. The new satellites are parsed completely before being swapped in, and each ephemeris only has its
+        TLE reference replaced, so propagation continues undisturbed. If the data cannot be retrieved, a warning is
+        issued and the current element sets are kept.
+
+        Parameters:
+            ephemeris (list[SatEphemeris]): A list containing satellite ephemeris data to assign the TLEs to.
+        """
+        self.tle_checked_at = time.monotonic()
+        try:
+            if not self.download_tle():
+                return
+            sats = self.load_tle()
+        except (requests.RequestException, OSError, ValueError) as err:
+            warnings.warn("Could not refresh TLE data, keeping current TLE: {0}".format(err))
+            return
+        self.sats = sats
+        self.set_tle(ephemeris)
+
+    def load_gsat_to_svid_map(self):
+        """
+        Loads the GSAT to SV ID mapping from the cache on disk, without any network requests. If there is no cache,
+        the bundled fallback table is used instead. The mapping is marked as stale when the cache is missing or older
+        than GSAT_MAP_MAX_AGE, so it can be refreshed in the background.
+        """
+        if load.exists(GSAT_MAP_FILENAME):
+            try:
+                with load.open(GSAT_MAP_FILENAME, mode='r') as f:
+                    self.gsat_to_svid_map = {gsat: int(svid) for gsat, svid in json.load(f).items()}
+                self.gsat_to_svid_map_stale = load.days_old(GSAT_MAP_FILENAME) >= constants.GSAT_MAP_MAX_AGE
+                return
+            except (OSError, ValueError, AttributeError):
+                warnings.warn("Could not read cached GSAT to SVID mapping {0}, using fallback".format(
+                    GSAT_MAP_FILENAME))
+        self.gsat_to_svid_map = dict(FALLBACK_GSAT_TO_SVID_MAP)
+        self.gsat_to_svid_map_stale = True
+
+    def save_gsat_to_svid_map(self):
+        """
+        Saves the GSAT to SV ID mapping to the cache on disk. The cache is written to a temporary file first and then
+        moved into place, so a concurrent reader never sees a partially written cache.
+        """
+        path = load.path_to(GSAT_MAP_FILENAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.gsat_to_svid_map, f, indent=1, sort_keys=True)
+        os.replace(path + '.tmp', path)
 
     def get_gsat_to_svid_map(self):
         """
@@ -72,25 +280,90 @@ class TwoLineElements(object):
             soup = BeautifulSoup(res.text, "html.parser")
             info_table = soup.find("table")  # Finds the first table on the page
             rows = info_table.find_all("tr")
+            gsat_to_svid_map = {}
             for row in rows[1:]:
                 cells = row.find_all("td")
                 if len(cells) >= 2:
-                    self.gsat_to_svid_map[cells[0].text.strip()] = int(
+                    gsat_to_svid_map[cells[0].text.strip()] = int(
                         cells[1].text.strip()[1:])  # Ensure the row has enough columns
 
+            # Replace the mapping as a whole, so concurrent readers never see a partially filled mapping
+            self.gsat_to_svid_map = gsat_to_svid_map
+            self.gsat_to_svid_map_stale = False
+
+    def gsat_map_refresh_due(self):
+        """
+        Determines whether the GSAT to SV ID mapping should be refreshed. This is the case while it is stale, but after
+        a failed attempt only once the retry interval has passed, so an unreachable or changed GSC is not scraped over
+        and over.
+
+        Returns:
+            bool: True if the mapping should be refreshed.
+        """
+        if not self.gsat_to_svid_map_stale:
+            return False
+        if not self.gsat_map_failures:
+            return True
+        retry_interval = min(constants.GSAT_MAP_RETRY_INTERVAL * 2 ** (self.gsat_map_failures - 1),
+                             constants.GSAT_MAP_MAX_RETRY_INTERVAL)
+        return time.monotonic() - self.gsat_map_checked_at >= retry_interval
+
+    def refresh_gsat_to_svid_map(self, ephemeris):
+        """
+        Fetches the GSAT to SV ID mapping from the GSC, caches it on disk and assigns the TLEs again using the new
+        mapping. If the mapping cannot be retrieved, a warning is issued, the current mapping is kept and the interval
+        before the next attempt is doubled.
+
+        Parameters:
+            ephemeris (list[SatEphemeris]): A list containing satellite ephemeris data to assign the TLEs to.
+        """
+        self.gsat_map_checked_at = time.monotonic()
+        try:
+            self.get_gsat_to_svid_map()
+        except (requests.RequestException, AttributeError, ValueError) as err:
+            warnings.warn("Could not refresh GSAT to SVID mapping, keeping current mapping: {0}".format(err))
+            self.gsat_map_failures += 1
+            return
+        if self.gsat_to_svid_map_stale:
+            warnings.warn("Could not refresh GSAT to SVID mapping, keeping current mapping")
+            self.gsat_map_failures += 1
+            return
+        self.gsat_map_failures = 0
+        self.save_gsat_to_svid_map()
+        self.set_tle(ephemeris)
+
+    async def refresh_loop(self, ephemeris):
+        """
+        Refreshes the GSAT to SV ID mapping while it is stale, backing off after failures, and checks for updated TLE
+        data when due. The downloads are done in the default executor of the event loop, so that the other tasks never
+        wait for the GSC or CelesTrak.
+
+        Parameters:
+            ephemeris (list[SatEphemeris]): A list containing satellite ephemeris data to assign the TLEs to.
+        """
+        loop = asyncio.get_running_loop()
+        for _ in itertools.count():
+            if self.gsat_map_refresh_due():
+                await loop.run_in_executor(None, self.refresh_gsat_to_svid_map, ephemeris)
+            if self.tle_refresh_due():
+                await loop.run_in_executor(None, self.refresh_tle, ephemeris)
+            await asyncio.sleep(constants.TLE_CHECK_INTERVAL)
+
     def set_tle(self, ephemeris):
         """
         Sets the TLE (Two-Line Elements) values in the given ephemeris data for satellites by
         mapping satellite names to corresponding IDs. If a satellite name cannot be mapped,
-        a warning is issued indicating the unmapped satellite.
+        a warning is issued indicating the unmapped satellite. As only the TLE reference of each
+        ephemeris is replaced, this can be called while the satellites are being propagated.
 
         Parameters:
             ephemeris (list[SatEphemeris]): A list containing satellite ephemeris data.
         """
+        gsat_to_svid_map = self.gsat_to_svid_map
         for sat in self.sats:
             gsat = sat.name[:8]
             try:
-                sv_id = self.gsat_to_svid_map[gsat]
+                sv_id = gsat_to_svid_map[gsat]
                 ephemeris[sv_id - 1].tle = sat
             except KeyError:
                 warnings.warn("Unknown satellite name {0} in TLE, skipping".format(gsat))
@@ -4,33 +4,39 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
+import atexit
 import datetime
-import threading
 import time
 from math import floor
 
+import numpy as np
 from astropy.time import Time
 from dataclass_binder import Binder
 
-from galileo_reference_tree import constants
+from galileo_reference_tree import constants, statehub
 from galileo_reference_tree.config import Config, Location
+from galileo_reference_tree.dashboard import Dashboard
 from galileo_reference_tree.ledcontroller import LedController
 from galileo_reference_tree.ntripclient import NtripClient
-from galileo_reference_tree.plotleds import LedPlot
+from galileo_reference_tree.offlinerender import render_offline
+from galileo_reference_tree.plotprocess import SharedState, start_plotting, get_track_length
+from galileo_reference_tree.propagationdemand import PropagationDemand
+from galileo_reference_tree.rtcmrelay import RtcmRelay
+from galileo_reference_tree.runtime import Runtime
 from galileo_reference_tree.satephemeris import SatEphemeris
-from galileo_reference_tree.skyplot import SkyPlot
 from galileo_reference_tree.transform import ecef2aer
 from galileo_reference_tree.twolineelements import TwoLineElements
 
 TIME_START = datetime.datetime.now(datetime.UTC)
 
 
-def propagate_all(all_ephem, all_azelev, location: Location, simulation_speed=1):
+def propagate_once(all_ephem, all_azelev, location: Location, simulation_speed=1, all_arglat=None, sat_indices=None):
     """
-    Continuously propagates ephemeris data and computes the satellites' azimuth and
-    elevation as observed from a specific location. The propagation is performed in a loop
-    for a predefined number of satellites, and the results are updated in the specified
-    all_ephem and azimuth-elevation output arrays.
+    Propagates the ephemeris data to the current time and computes the satellites'
+    azimuth and elevation as observed from a specific location, for a predefined number
+    of satellites or the given satellites only. The results are updated in the specified
+    azimuth-elevation output arrays.
 
     Parameters:
         all_ephem (list[SatEphemeris]): A list of ephemeris data objects for satellites.
@@ -41,23 +47,163 @@ def propagate_all(all_ephem, all_azelev, location: Location, simulation_speed=1)
             altitude in degrees and meters respectively.
         simulation_speed (int, optional): optional speed-up factor for the simulation's
             time progression. Default is 1.
+        all_arglat (list[float], optional): A mutable list to store the resulting argument
+            of latitude in degrees for each satellite. Not computed if not given.
+        sat_indices (Iterable[int], optional): The indices of the satellites to propagate.
+            Defaults to all satellites.
+    """
+    # Loop over the ephemeris of the requested satellites
+    for idx in range(constants.MAX_SATS) if sat_indices is None else sat_indices:
+        eph = all_ephem[idx]
+
+        # If it has a Time of Ephemeris, it can be propagated
+        if eph.toe or eph.tle is not None:
+            wn, tow = getCurrentToW(simulation_speed)
+            x, y, z = eph.propagate(wn, tow)
+
+            # Convert to azimuth, elevation and range
+            az, elev, r = ecef2aer(x, y, z, location.latitude_deg, location.longitude_deg,
+                                   location.altitude_m)
+            all_azelev[idx] = [az, elev]
+            if all_arglat is not None:
+                all_arglat[idx] = eph.get_argument_of_latitude(wn, tow)
+
+
+def get_ephemeris_versions(all_ephem):
+    """
+    Identifies the ephemeris and TLE currently used for every satellite, to find the satellites of which these changed.
+
+    Parameters:
+        all_ephem (list[SatEphemeris]): A list of ephemeris data objects for satellites.
+
+    Returns:
+        list[tuple]: The Galileo System Time of the ephemeris and the identity of the TLE of every satellite.
+    """
+    return [(eph.gst, id(eph.tle)) for eph in all_ephem]
+
+
+async def propagate_all(all_ephem, all_azelev, location: Location, simulation_speed=1, all_arglat=None, hub=None,
+                        demand=None):
+    """
+    Continuously propagates ephemeris data and computes the satellites' azimuth and
+    elevation as observed from a specific location, see propagate_once. As the
+    propagation is computationally heavy, it runs in the default executor of the
+    event loop.
+
+    Only the satellites demanded by the consumers are propagated, each on fixed
+    deadlines at the interval requested for it, so the time spent propagating does not
+    make the interval drift, or at the time its consumers estimate it visibly changes.
+    Satellites are propagated right away when their ephemeris changed, and newly
+    demanded satellites as soon as they are demanded. Every propagation is published to
+    the state hub.
+
+    Parameters:
+        all_ephem (list[SatEphemeris]): A list of ephemeris data objects for satellites.
+        all_azelev (list[list[float]]): A mutable list to store the resulting azimuth,
+            elevation pairs for each satellite.
+        location (Location): The location to compute the azimuth and elevation for.
+        simulation_speed (int, optional): optional speed-up factor for the simulation's
+            time progression. Default is 1.
+        all_arglat (list[float], optional): A mutable list to store the resulting argument
+            of latitude in degrees for each satellite. Not computed if not given.
+        hub (StateHub, optional): The hub to receive the ephemeris and demand changes from
+            and to publish the propagations to. Defaults to the application-wide hub.
+        demand (PropagationDemand, optional): The satellites demanded by the consumers.
+            Defaults to all satellites every propagation interval.
     """
-    # Start continuous loop
-    while True:
-        # Loop over all the ephemeris
-        for idx in range(constants.MAX_SATS):
-            eph = all_ephem[idx]
+    hub = hub if hub is not None else statehub.hub
+    if demand is None:
+        demand = PropagationDemand(constants.MAX_SATS, hub=hub)
+        demand.declare('all', range(constants.MAX_SATS), constants.PROPAGATION_INTERVAL)
+    loop = asyncio.get_running_loop()
+    subscription = hub.subscribe_async(statehub.TOPIC_EPHEMERIS, statehub.TOPIC_DEMAND)
+    ephemeris_versions = get_ephemeris_versions(all_ephem)
+    try:
+        while True:
+            now = time.monotonic()
+            due = demand.get_due(now)
+            if len(due):
+                await loop.run_in_executor(None, propagate_once, all_ephem, all_azelev, location, simulation_speed,
+                                           all_arglat, due)
+                demand.mark_propagated(due, now, [all_azelev[idx][:2] if len(all_azelev[idx]) else [np.nan, np.nan]
+                                                  for idx in due])
+                hub.publish(statehub.TOPIC_AZELEV)
 
-            # If it has a Time of Ephemeris, it can be propagated
-            if eph.toe or eph.tle is not None:
-                wn, tow = getCurrentToW(simulation_speed)
-                x, y, z = eph.propagate(wn, tow)
+            # Wait for the next deadline, or until an ephemeris or the demand changed
+            next_due = demand.get_next_due()
+            changed = await subscription.wait(next_due - time.monotonic() if np.isfinite(next_due) else None)
+            if statehub.TOPIC_EPHEMERIS in changed:
+                versions = get_ephemeris_versions(all_ephem)
+                demand.invalidate([idx for idx, version in enumerate(versions) if version != ephemeris_versions[idx]])
+                ephemeris_versions = versions
+    finally:
+        subscription.close()
 
-                # Convert to azimuth, elevation and range
-                az, elev, r = ecef2aer(x, y, z, location.latitude_deg, location.longitude_deg,
-                                       location.altitude_m)
-                all_azelev[idx] = [az, elev]
-        time.sleep(constants.PROPAGATION_INTERVAL)
+
+def predict_all(all_ephem, location: Location, length, simulation_speed=1):
+    """
+    Predicts the track of all satellites on the sky, starting at the current time with a sample every
+    TRACK_SAMPLE_INTERVAL seconds (sped up with the simulation). Every satellite is propagated to all sample times at
+    once.
+
+    Parameters:
+        all_ephem (list[SatEphemeris]): A list of ephemeris data objects for satellites.
+        location (Location): The location to compute the azimuth and elevation for.
+        length (int): The number of samples of each track.
+        simulation_speed (int, optional): optional speed-up factor for the simulation's time progression. Default is 1.
+
+    Returns:
+        np.ndarray: The azimuth and elevation in degrees of each satellite (first axis) at each sample (second axis),
+            NaN for satellites which cannot be propagated yet.
+    """
+    predicted = np.full((constants.MAX_SATS, length, 2), np.nan)
+    wn, tow = getCurrentToW(simulation_speed)
+    tows = tow + np.arange(length) * constants.TRACK_SAMPLE_INTERVAL * simulation_speed
+    for idx in range(constants.MAX_SATS):
+        eph = all_ephem[idx]
+        if eph.toe or eph.tle is not None:
+            x, y, z = eph.propagate_batch(wn, tows)
+            az, elev, r = ecef2aer(x, y, z, location.latitude_deg, location.longitude_deg, location.altitude_m)
+            predicted[idx, :, 0] = az
+            predicted[idx, :, 1] = elev
+    return predicted
+
+
+async def publish_plot_state(state, all_ephem, all_azelev, ledstrip, location: Location, prediction_length,
+                             simulation_speed=1, hub=None):
+    """
+    Publishes the state to the plotting process whenever it changes, at most once per plotting interval. The
+    predicted tracks are only computed every TRACK_SAMPLE_INTERVAL seconds, in the default executor of the event loop,
+    as they hardly change in between.
+
+    Parameters:
+        state (SharedState): The shared memory to publish the state to.
+        all_ephem (list[SatEphemeris]): A list of ephemeris data objects for satellites.
+        all_azelev (list[list[float]]): The azimuth and elevation of each satellite.
+        ledstrip (StripBackend): The LED output to publish the colors of.
+        location (Location): The location to predict the tracks for.
+        prediction_length (int): The number of samples of the predicted tracks, 0 to not predict them.
+        simulation_speed (int, optional): optional speed-up factor for the simulation's time progression. Default is 1.
+        hub (StateHub, optional): The hub announcing the changes of the state. Defaults to the application-wide hub.
+    """
+    hub = hub if hub is not None else statehub.hub
+    loop = asyncio.get_running_loop()
+    subscription = hub.subscribe_async(statehub.TOPIC_EPHEMERIS, statehub.TOPIC_AZELEV, statehub.TOPIC_FRAME)
+    predicted = None
+    prediction_time = -np.inf
+    try:
+        while True:
+            if prediction_length and time.monotonic() - prediction_time >= constants.TRACK_SAMPLE_INTERVAL:
+                prediction_time = time.monotonic()
+                predicted = await loop.run_in_executor(None, predict_all, all_ephem, location, prediction_length,
+                                                       simulation_speed)
+            state.publish(all_ephem, all_azelev, ledstrip, predicted)
+
+            # Wait for the next change, publishing at most once per plotting interval
+            await asyncio.sleep(constants.PLOTTING_INTERVAL)
+            await subscription.wait()
+    finally:
+        subscription.close()
 
 
 def get_utc_now():
@@ -96,52 +242,73 @@ if __name__ == '__main__':
     # Read the configuration file
     config = Binder(Config).parse_toml("./config.toml")
 
+    # In relay mode, only share the caster connection with the local tree processes
+    if config.relay.enabled:
+        RtcmRelay(config.ntrip, config.relay).run()
+        raise SystemExit
+
+    # In render mode, only render the simulated time range to images
+    if config.render.enabled:
+        print('Rendered %d frames to %s' % (render_offline(config), config.render.output_dir))
+        raise SystemExit
+
     # Create data structures for the ephemeris and azimuth + elevation
     ephemeris = []
     for satIdx in range(constants.MAX_SATS):
         ephemeris.append(SatEphemeris())
     azelev = [[] for _ in range(constants.MAX_SATS)]
+    arglat = [None] * constants.MAX_SATS
 
-    running_threads = []
-    try:
-        # Get the TLE
-        tle = TwoLineElements()
-        tle.set_tle(ephemeris)
-
-        # Create RTCM retrieval loop
-        client = NtripClient(ephemeris, config.ntrip)
-        running_threads.append(threading.Thread(target=client.get_ephemeris_loop))
-
-        # Create propagation loop
-        running_threads.append(threading.Thread(target=propagate_all,
-                                                args=[ephemeris, azelev, config.general.location,
-                                                      config.general.simulation_speed]))
-
-        # Create LED update loop for satellites
-        ledController = LedController(constants.MAX_SATS, ephemeris, azelev, config.leds)
-        running_threads.append(threading.Thread(target=ledController.update_leds))
-
-        # Create LED update loop for orbital planes
-        running_threads.append(
-            threading.Thread(target=ledController.show_plane, args=[config.leds.satellites.orbit_plane_a]))
-        running_threads.append(
-            threading.Thread(target=ledController.show_plane, args=[config.leds.satellites.orbit_plane_b]))
-        running_threads.append(
-            threading.Thread(target=ledController.show_plane, args=[config.leds.satellites.orbit_plane_c]))
-
-        # Start all threads
-        for thread in running_threads:
-            thread.daemon = True
-            thread.start()
-
-        if config.general.plotting:
-            # Start plotting loop. This has to be done in the main thread
-            skyplot = SkyPlot(constants.MAX_SATS)
-            ledPlot = LedPlot(10, ledController.ledstrip)
-            while True:
-                skyplot.update_plot(ephemeris, azelev)
-                ledPlot.update_plot()
-                time.sleep(constants.PLOTTING_INTERVAL)
+    # Get the TLE, refreshing it in the background so that the startup never waits for the GSC or CelesTrak
+    runtime = Runtime()
+    tle = TwoLineElements()
+    tle.set_tle(ephemeris)
+    runtime.add_task('tle', tle.refresh_loop(ephemeris))
+
+    # Create RTCM retrieval loop
+    client = NtripClient(ephemeris, config.ntrip)
+    runtime.add_task('ntrip', client.get_ephemeris_loop())
 
+    # Create propagation loop, propagating only the satellites demanded by the LEDs, plots and dashboard. The
+    # satellites only shown in the skyplots move too slowly to propagate them as often as the LEDs need, and the LEDs
+    # only need a satellite when its brightness changes.
+    demand = PropagationDemand(constants.MAX_SATS)
+    skyplot_interval = max(constants.SKYPLOT_PROPAGATION_INTERVAL / config.general.simulation_speed,
+                           constants.PROPAGATION_INTERVAL)
+    led_max_interval = max(constants.LED_PROPAGATION_MAX_INTERVAL / config.general.simulation_speed,
+                           constants.PROPAGATION_INTERVAL)
+    runtime.add_task('propagation', propagate_all(ephemeris, azelev, config.general.location,
+                                                  config.general.simulation_speed, arglat, demand=demand))
+
+    # Create LED render loop for the satellites and orbital planes, writing to the LEDs from the hardware thread
+    ledController = LedController(constants.MAX_SATS, ephemeris, azelev, config.leds, arglat, demand)
+    demand.declare('leds', ledController.mapped_sat_indices, constants.PROPAGATION_INTERVAL, led_max_interval,
+                   ledController.get_change_delays)
+    runtime.add_task('leds', ledController.update_leds(runtime.hardware_executor))
+
+    # Summarize the LED frame timing on shutdown
+    atexit.register(lambda: print(ledController.compositor.timing_summary() + '\n' + runtime.timing_summary()))
+
+    # Create the web dashboard
+    if config.dashboard.enabled:
+        dashboard = Dashboard(ephemeris, azelev, ledController.ledstrip, config.dashboard, demand=demand,
+                              demand_interval=skyplot_interval)
+        runtime.add_task('dashboard', dashboard.serve())
+
+    if config.general.plotting:
+        # Plot in a separate process, which reads the state from shared memory published by the runtime
+        prediction_length = get_track_length(config.general.prediction_minutes)
+        state = SharedState(constants.MAX_SATS, ledController.ledstrip.numPixels(), prediction_length)
+        atexit.register(state.unlink)
+        start_plotting(state, 10, get_track_length(config.general.trail_minutes))
+        demand.declare('plotting', range(constants.MAX_SATS), skyplot_interval)
+        runtime.add_task('plotting', publish_plot_state(state, ephemeris, azelev, ledController.ledstrip,
+                                                        config.general.location, prediction_length,
+                                                        config.general.simulation_speed))
+
+    # Run all loops until interrupted. The LED output is only closed once the runtime stopped, as the compositor may
+    # still be showing a frame until then.
+    try:
+        runtime.run()
     finally:
-        [thread.join() for thread in running_threads if thread.is_alive()]
+        ledController.ledstrip.close()
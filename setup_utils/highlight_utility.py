@@ -7,7 +7,7 @@ from dataclass_binder import Binder
 from rpi_ws281x import PixelStrip, Color
 
 from galileo_reference_tree.config import Config
-from galileo_reference_tree.ledcontroller import strip_type_to_int
+from galileo_reference_tree.ledbackends import strip_type_to_int
 
 LED_HIGHLIGHT_INTERVAL = 10
 LED_COLOR_HIGHLIGHT = [255, 255, 255]
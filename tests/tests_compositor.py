@@ -0,0 +1,205 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch, AsyncMock, MagicMock
+
+from galileo_reference_tree.compositor import *
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.statehub import StateHub, AsyncSubscription, TOPIC_FRAME
+
+
+class FillLayer(Layer):
+    def __init__(self, priority, led_indices, color):
+        super().__init__(priority)
+        self.led_indices = led_indices
+        self.color = color
+
+    def render(self, frame, elapsed):
+        for led_idx in self.led_indices:
+            frame[led_idx] = self.color
+
+
+class CountLayer(Layer):
+    def __init__(self, priority):
+        super().__init__(priority)
+        self.renders = 0
+
+    def render(self, frame, elapsed):
+        self.renders += 1
+        frame[0] = self.renders
+
+
+class TestCompositor(unittest.TestCase):
+    def setUp(self):
+        self.mock_strip = MagicMock()
+        self.mock_strip.numPixels.return_value = 4
+        self.registry = MetricsRegistry()
+        self.hub = StateHub(self.registry)
+
+    def test_layer_render_not_implemented(self):
+        # Prepare
+        class IncompleteLayer(Layer):
+            pass
+
+        # Execute and verify (a layer without render() cannot be created)
+        with self.assertRaises(TypeError):
+            Layer(0)
+        with self.assertRaises(TypeError):
+            IncompleteLayer(0)
+
+    def test_compose_by_priority(self):
+        # Prepare
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+        compositor.add_layer(FillLayer(20, [1, 2], 0x00ff00))
+        compositor.add_layer(FillLayer(10, [0, 1], 0xff0000))
+
+        # Execute
+        frame = compositor.compose(0)
+
+        # Verify (the layer with the highest priority is on top, regardless of the order of adding)
+        self.assertEqual(frame.tolist(), [0xff0000, 0x00ff00, 0x00ff00, 0])
+
+    def test_render_frame_writes_changed_pixels(self):
+        # Prepare
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+        layer = FillLayer(10, [], 0x0000ff)
+        compositor.add_layer(layer)
+        compositor.render_frame(0)
+        self.mock_strip.reset_mock()
+
+        # Execute
+        layer.led_indices = [3]
+        compositor.render_frame(0.1)
+
+        # Verify (only the pixel differing from the dark frame shown before is written)
+        led_indices, colors = self.mock_strip.set_pixels.call_args.args
+        self.assertEqual((led_indices.tolist(), colors.tolist()), ([3], [0x0000ff]))
+        self.mock_strip.show.assert_called_once()
+        self.assertEqual(compositor.frame.tolist(), [0, 0, 0, 0x0000ff])
+        self.assertEqual(self.registry.counter("led_pixels_written_total").value, 5)
+        self.assertEqual(self.registry.counter("led_pixels_skipped_total").value, 3)
+
+    def test_render_frame_writes_first_dark_frame(self):
+        # Prepare
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+
+        # Execute
+        shown = compositor.render_frame(0)
+
+        # Verify (all pixels are written, turning off LEDs left lit before the start)
+        led_indices, colors = self.mock_strip.set_pixels.call_args.args
+        self.assertTrue(shown)
+        self.assertEqual((led_indices.tolist(), colors.tolist()), ([0, 1, 2, 3], [0, 0, 0, 0]))
+        self.mock_strip.show.assert_called_once()
+
+    def test_render_frame_skips_unchanged_frame(self):
+        # Prepare
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+        layer = FillLayer(10, [0, 1], 0xff0000)
+        compositor.add_layer(layer)
+        compositor.render_frame(0)
+        self.mock_strip.reset_mock()
+
+        # Execute
+        compositor.render_frame(0.1)
+        layer.led_indices = [1]
+        compositor.render_frame(0.2)
+
+        # Verify (the identical frame is not shown, the next one only turns off pixel 0)
+        led_indices, colors = self.mock_strip.set_pixels.call_args.args
+        self.assertEqual((led_indices.tolist(), colors.tolist()), ([0], [0]))
+        self.mock_strip.show.assert_called_once()
+        self.assertEqual(self.registry.counter("led_frames_shown_total").value, 2)
+        self.assertEqual(self.registry.counter("led_frames_skipped_total").value, 1)
+
+    @patch('galileo_reference_tree.compositor.time')
+    def test_run_fixed_deadlines(self, mock_time):
+        # Prepare
+        mock_time.monotonic.side_effect = [0.0,  # Start time
+                                           0.0,  # First deadline
+                                           0.0, 0.03,  # First frame takes 30 ms
+                                           0.12, 0.25]  # Second frame starts 20 ms late and overruns its deadline
+        mock_time.perf_counter.return_value = 0.0
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+        compositor.add_layer(CountLayer(10))
+
+        # Execute
+        with patch('galileo_reference_tree.compositor.itertools', **{'count.return_value': [1, 2]}):
+            with patch('galileo_reference_tree.compositor.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+                asyncio.run(compositor.run())
+
+        # Verify (sleep until the next deadline, and not at all when late)
+        sleeps = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertAlmostEqual(sleeps[0], 0.07)
+        self.assertEqual(sleeps[1], 0)
+        self.assertEqual(self.mock_strip.show.call_count, 2)
+        self.assertEqual(self.hub.get_version(TOPIC_FRAME), 2)
+        self.assertEqual(compositor.deadlines_missed.value, 1)
+        self.assertEqual(compositor.frame_rate.total, 2)
+        self.assertAlmostEqual(compositor.jitter.sum, 0.02)
+
+    @patch('galileo_reference_tree.compositor.time')
+    def test_run_waits_when_idle(self, mock_time):
+        # Prepare
+        mock_time.monotonic.side_effect = [0.0,  # Start time
+                                           0.0,  # First deadline
+                                           0.0, 0.03,  # First frame is shown
+                                           0.1, 0.6]  # Second frame is unchanged, followed by waiting
+        mock_time.perf_counter.return_value = 0.0
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+        compositor.add_layer(FillLayer(10, [0], 0xff0000))
+
+        # Execute
+        with patch('galileo_reference_tree.compositor.itertools', **{'count.return_value': [1, 2]}):
+            with patch('galileo_reference_tree.compositor.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+                with patch.object(AsyncSubscription, 'wait', return_value=[]) as mock_wait:
+                    asyncio.run(compositor.run())
+
+        # Verify (no sleep after the unchanged frame, but a wait for a state change instead)
+        mock_wait.assert_called_once_with(constants.COMPOSITOR_IDLE_INTERVAL)
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertEqual(compositor.idle_waits.value, 1)
+        self.assertEqual(compositor.deadlines_missed.value, 0)
+        self.assertAlmostEqual(compositor.jitter.sum, 0.0)
+
+    def test_run_renders_non_blocking_output_on_loop(self):
+        # Prepare
+        self.mock_strip.blocking = False
+        compositor = Compositor(self.mock_strip, 1000, self.registry, self.hub)
+        compositor.add_layer(CountLayer(10))
+        show_threads = []
+        self.mock_strip.show.side_effect = lambda: show_threads.append(threading.current_thread())
+
+        # Execute
+        with patch('galileo_reference_tree.compositor.itertools', **{'count.return_value': [1, 2]}):
+            asyncio.run(compositor.run())
+
+        # Verify (shown from the event loop, without handing the frames to an executor)
+        self.assertEqual(show_threads, [threading.main_thread()] * 2)
+
+    @patch('galileo_reference_tree.compositor.time.perf_counter')
+    def test_render_frame_timing(self, mock_perf_counter):
+        # Prepare
+        mock_perf_counter.side_effect = [0.0, 0.001,  # Composing takes 1 ms
+                                         0.004]  # Showing takes 3 ms
+        compositor = Compositor(self.mock_strip, 10, self.registry, self.hub)
+        compositor.add_layer(FillLayer(10, [0], 0xff0000))
+
+        # Execute
+        compositor.render_frame(0)
+        summary = compositor.timing_summary()
+
+        # Verify
+        self.assertAlmostEqual(compositor.compose_time.sum, 0.001)
+        self.assertAlmostEqual(compositor.show_time.sum, 0.003)
+        self.assertIn('LED show time: mean 3.000 ms', summary)
+        self.assertIn('led_show_time_seconds', self.registry.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
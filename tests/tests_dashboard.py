@@ -0,0 +1,224 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import asyncio
+import unittest
+from dataclasses import replace
+from unittest.mock import MagicMock
+
+from galileo_reference_tree.config import Dashboard as DashboardConfig
+from galileo_reference_tree.dashboard import *
+from galileo_reference_tree.ledbackends import VirtualBackend
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.propagationdemand import PropagationDemand
+from galileo_reference_tree.statehub import StateHub, TOPIC_FRAME
+
+
+def decode_message(message):
+    message_type, sat_count, led_count = MESSAGE_HEADER.unpack_from(message)
+    sats = np.frombuffer(message, dtype=SAT_RECORD, count=sat_count, offset=MESSAGE_HEADER.size)
+    leds = np.frombuffer(message, dtype=LED_RECORD, count=led_count,
+                         offset=MESSAGE_HEADER.size + sat_count * SAT_RECORD.itemsize)
+    return message_type, sats, leds
+
+
+class TestWebSocket(unittest.TestCase):
+    def test_websocket_accept(self):
+        # Execute (example handshake of RFC 6455)
+        found_accept = websocket_accept('dGhlIHNhbXBsZSBub25jZQ==')
+
+        # Verify
+        self.assertEqual(found_accept, 's3pPLMBiTxaQ9kYGzzhZRbK+xOo=')
+
+    def test_encode_websocket_frame(self):
+        # Execute
+        short_frame = encode_websocket_frame(b'abc')
+        long_frame = encode_websocket_frame(b'x' * 300)
+
+        # Verify
+        self.assertEqual(short_frame, b'\x82\x03abc')
+        self.assertEqual(long_frame[:4], b'\x82\x7e\x01\x2c')
+        self.assertEqual(len(long_frame), 304)
+
+    def test_read_websocket_frame(self):
+        # Prepare (a masked ping, as sent by browsers)
+        mask = b'\x01\x02\x03\x04'
+        payload = bytes(byte ^ mask[idx % 4] for idx, byte in enumerate(b'hello'))
+
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'\x89\x85' + mask + payload)
+            return await read_websocket_frame(reader)
+
+        # Execute
+        opcode, found_payload = asyncio.run(read())
+
+        # Verify
+        self.assertEqual(opcode, OPCODE_PING)
+        self.assertEqual(found_payload, b'hello')
+
+    def test_read_websocket_frame_too_large(self):
+        # Prepare (a frame announcing a payload of 1 GB with the 64-bit length)
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'\x82\xff' + struct.pack('!Q', 1 << 30) + b'\x01\x02\x03\x04')
+            return await read_websocket_frame(reader)
+
+        # Execute and verify (rejected before reading the payload)
+        with self.assertRaises(ValueError):
+            asyncio.run(read())
+
+
+class TestDashboard(unittest.TestCase):
+    def setUp(self):
+        self.ephemeris = [MagicMock(signalHealth=health) for health in [0, -1, 1]]
+        self.azelev = [[10.5, 20.25], [], [350, -5]]
+        self.ledstrip = VirtualBackend(4)
+        self.config = replace(DashboardConfig(), address='127.0.0.1', port=0, max_update_rate=100.0)
+        self.registry = MetricsRegistry()
+        self.hub = StateHub(self.registry)
+        self.dashboard = Dashboard(self.ephemeris, self.azelev, self.ledstrip, self.config, self.registry, self.hub)
+
+    def test_full_message(self):
+        # Prepare
+        self.ledstrip.set_pixels(np.array([1]), np.array([0x102030]))
+        self.ledstrip.show()
+        self.dashboard.sample()
+
+        # Execute
+        message_type, sats, leds = decode_message(self.dashboard.get_message(None))
+
+        # Verify
+        self.assertEqual(message_type, MESSAGE_FULL)
+        self.assertEqual(sats['az'].tolist(), [1050, 0, 35000])
+        self.assertEqual(sats['el'].tolist(), [2025, ELEV_UNKNOWN, -500])
+        self.assertEqual(sats['health'].tolist(), [0, -1, 1])
+        self.assertEqual(leds['idx'].tolist(), [0, 1, 2, 3])
+        self.assertEqual(leds['rgb'][1].tolist(), [0x10, 0x20, 0x30])
+
+    def test_delta_message(self):
+        # Prepare
+        sequence = self.dashboard.sequence
+        self.azelev[1] = [90, 45]
+        self.ledstrip.set_pixels(np.array([3]), np.array([0xff0000]))
+        self.ledstrip.show()
+
+        # Execute
+        changed = self.dashboard.sample()
+        message_type, sats, leds = decode_message(self.dashboard.get_message(sequence))
+
+        # Verify (only the changed satellite and LED are sent)
+        self.assertTrue(changed)
+        self.assertEqual(message_type, MESSAGE_DELTA)
+        self.assertEqual(sats['idx'].tolist(), [1])
+        self.assertEqual(leds['idx'].tolist(), [3])
+        self.assertEqual(leds['rgb'][0].tolist(), [0xff, 0, 0])
+
+    def test_unchanged_state(self):
+        # Prepare
+        sequence = self.dashboard.sequence
+
+        # Execute
+        changed = self.dashboard.sample()
+
+        # Verify
+        self.assertFalse(changed)
+        self.assertEqual(self.dashboard.sequence, sequence)
+
+    def test_messages_are_shared(self):
+        # Prepare
+        sequence = self.dashboard.sequence
+        self.azelev[1] = [90, 45]
+        self.dashboard.sample()
+
+        # Execute (two browsers at the same state and one without state)
+        first = self.dashboard.get_message(sequence)
+        second = self.dashboard.get_message(sequence)
+        self.dashboard.get_message(None)
+
+        # Verify
+        self.assertIs(first, second)
+        self.assertEqual(self.dashboard.messages_encoded.value, 2)
+
+    def test_stream_to_browser(self):
+        # Prepare
+        demand = PropagationDemand(3, self.registry, self.hub)
+        self.dashboard.demand = demand
+        demanded = []
+
+        async def browse():
+            server_task = asyncio.create_task(self.dashboard.serve())
+            while self.dashboard.server is None:
+                await asyncio.sleep(0.01)
+            port = self.dashboard.server.sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /ws HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                         b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n')
+            response = await reader.readuntil(b'\r\n\r\n')
+            _, first = await read_websocket_frame(reader)
+            demanded.append(np.isfinite(demand.intervals).tolist())
+
+            self.ledstrip.set_pixels(np.array([2]), np.array([0x00ff00]))
+            self.ledstrip.show()
+            self.hub.publish(TOPIC_FRAME)
+            _, second = await asyncio.wait_for(read_websocket_frame(reader), 5)
+
+            writer.close()
+            while self.dashboard.clients:
+                await asyncio.sleep(0.01)
+            server_task.cancel()
+            return response, first, second
+
+        # Execute
+        response, first, second = asyncio.run(browse())
+
+        # Verify (the complete state, followed by the delta of the changed LED)
+        self.assertIn(b'101 Switching Protocols', response)
+        self.assertEqual(decode_message(first)[0], MESSAGE_FULL)
+        message_type, sats, leds = decode_message(second)
+        self.assertEqual(message_type, MESSAGE_DELTA)
+        self.assertEqual(len(sats), 0)
+        self.assertEqual(leds['idx'].tolist(), [2])
+
+        # Verify (all satellites are demanded while the browser is connected only)
+        self.assertEqual(demanded, [[True, True, True]])
+        self.assertFalse(np.any(np.isfinite(demand.intervals)))
+
+    def test_close_on_too_large_frame(self):
+        # Prepare
+        async def browse():
+            server_task = asyncio.create_task(self.dashboard.serve())
+            while self.dashboard.server is None:
+                await asyncio.sleep(0.01)
+            port = self.dashboard.server.sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /ws HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                         b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n')
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(b'\x82\xff' + struct.pack('!Q', 1 << 30) + b'\x01\x02\x03\x04')
+            frames = []
+            while True:
+                opcode, payload = await asyncio.wait_for(read_websocket_frame(reader), 5)
+                frames.append((opcode, payload))
+                if opcode == OPCODE_CLOSE:
+                    break
+            closed = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            server_task.cancel()
+            return frames[-1], closed
+
+        # Execute
+        (opcode, payload), closed = asyncio.run(browse())
+
+        # Verify (closed with status 1009, message too big)
+        self.assertEqual(opcode, OPCODE_CLOSE)
+        self.assertEqual(struct.unpack('!H', payload)[0], CLOSE_MESSAGE_TOO_BIG)
+        self.assertEqual(closed, b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,400 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import os
+import socket
+import tempfile
+import time
+import unittest
+from dataclasses import replace
+from unittest.mock import patch
+
+from dataclass_binder import Binder
+
+from galileo_reference_tree.config import Config, GeneralLEDSettings, LEDs, NetworkLEDSettings, Segment
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.ledbackends import *
+
+
+class TestLedBackends(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.recording = os.path.join(self.tempdir.name, 'frames.bin.gz')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def record_frames(self, path, frames):
+        backend = VirtualBackend(4, path)
+        for frame in frames:
+            backend.set_pixels(np.arange(4), np.array(frame, dtype=np.uint32))
+            backend.show()
+        backend.close()
+
+    def test_strip_type_to_int(self):
+        # Prepare
+        strip_type = "SK6812_STRIP"
+        expected_int = 0x00081000
+
+        # Execute
+        found_int = strip_type_to_int(strip_type)
+
+        # Verify
+        self.assertEqual(found_int, expected_int)
+
+    def test_strip_type_to_int_error(self):
+        # Execute
+        with self.assertRaises(KeyError):
+            strip_type_to_int(None)
+
+    def test_create_backend(self):
+        # Execute
+        pixelstrip = create_backend(LEDs())
+        virtual = create_backend(replace(LEDs(), general=replace(GeneralLEDSettings(), backend='virtual', led_count=5)))
+        network = create_backend(replace(LEDs(), general=replace(GeneralLEDSettings(), backend='network')))
+        network.close()
+
+        # Verify
+        self.assertIsInstance(pixelstrip, PixelStripBackend)
+        self.assertIsInstance(virtual, VirtualBackend)
+        self.assertIsInstance(network, NetworkBackend)
+        self.assertEqual(virtual.numPixels(), 5)
+        with self.assertRaises(KeyError):
+            create_backend(replace(LEDs(), general=replace(GeneralLEDSettings(), backend='unknown')))
+
+    def test_strip_backend_is_abstract(self):
+        # Prepare
+        class IncompleteBackend(StripBackend):
+            def numPixels(self):
+                return 0
+
+        # Execute and verify (a backend without the frame methods cannot be created)
+        with self.assertRaises(TypeError):
+            StripBackend()
+        with self.assertRaises(TypeError):
+            IncompleteBackend()
+
+    def test_pixelstrip_backend(self):
+        # Prepare
+        backend = PixelStripBackend(replace(GeneralLEDSettings(), led_count=3))
+
+        # Execute
+        backend.set_pixels(np.array([1]), np.array([0x00ff00], dtype=np.uint32))
+        backend.show()
+
+        # Verify
+        self.assertEqual(backend.get_pixels().tolist(), [0, 0x00ff00, 0])
+        self.assertEqual(backend.getPixelColorRGB(1).g, 255)
+
+    def test_virtual_backend_shows_on_show(self):
+        # Prepare
+        backend = VirtualBackend(3)
+
+        # Execute
+        backend.set_pixels(np.array([0, 2]), np.array([0xff0000, 0x0000ff], dtype=np.uint32))
+        before_show = backend.get_pixels().tolist()
+        backend.show()
+
+        # Verify
+        self.assertEqual(before_show, [0, 0, 0])
+        self.assertEqual(backend.get_pixels().tolist(), [0xff0000, 0, 0x0000ff])
+        self.assertEqual(backend.getPixelColorRGB(0), RGB(255, 0, 0))
+        self.assertEqual(backend.frames_shown, 1)
+
+    def test_record_and_read(self):
+        # Prepare
+        frames = [[1, 0, 0, 0], [1, 2, 0, 0], [1, 2, 0, 0], [0, 0, 0, 3]]
+
+        # Execute
+        self.record_frames(self.recording, frames)
+        found_frames = [frame.tolist() for _, frame in read_recording(self.recording)]
+
+        # Verify
+        self.assertEqual(found_frames, frames)
+
+    def test_read_truncated_recording(self):
+        # Prepare
+        self.record_frames(self.recording, [[1, 0, 0, 0], [1, 2, 0, 0]])
+        with gzip.open(self.recording, 'rb') as file:
+            data = file.read()
+        with gzip.open(self.recording, 'wb') as file:
+            file.write(data[:-1])
+
+        # Execute
+        found_frames = [frame.tolist() for _, frame in read_recording(self.recording)]
+
+        # Verify (the incomplete last frame is ignored)
+        self.assertEqual(found_frames, [[1, 0, 0, 0]])
+
+    def test_read_invalid_recording(self):
+        # Prepare
+        with gzip.open(self.recording, 'wb') as file:
+            file.write(b'\x00' * RECORDING_HEADER.size)
+
+        # Execute and verify
+        with self.assertRaises(ValueError):
+            list(read_recording(self.recording))
+
+    def test_diff_recordings(self):
+        # Prepare
+        golden = os.path.join(self.tempdir.name, 'golden.bin.gz')
+        self.record_frames(golden, [[1, 0, 0, 0], [1, 2, 0, 0], [1, 2, 3, 0]])
+        self.record_frames(self.recording, [[1, 0, 0, 0], [1, 5, 0, 0]])
+
+        # Execute
+        found_differences = diff_recordings(self.recording, golden)
+
+        # Verify (the second frame differs and the third is missing)
+        self.assertEqual(found_differences, [1, 2])
+        self.assertEqual(diff_recordings(golden, golden), [])
+
+    @patch('galileo_reference_tree.ledbackends.time.sleep')
+    def test_replay_recording(self, mock_sleep):
+        # Prepare
+        self.record_frames(self.recording, [[1, 0, 0, 0], [1, 2, 0, 0]])
+        backend = VirtualBackend(4)
+
+        # Execute
+        replay_recording(self.recording, backend, speed=1000)
+
+        # Verify
+        self.assertEqual(backend.get_pixels().tolist(), [1, 2, 0, 0])
+        self.assertEqual(backend.frames_shown, 2)
+
+
+class TestNetworkBackend(unittest.TestCase):
+    def setUp(self):
+        # Local UDP receiver standing in for the LED controller
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(('127.0.0.1', 0))
+        self.receiver.settimeout(5)
+        self.registry = MetricsRegistry()
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def create_backend(self, protocol, led_count, max_frame_rate=1000.0):
+        config = NetworkLEDSettings(protocol=protocol, port=self.receiver.getsockname()[1], start_universe=3,
+                                    max_frame_rate=max_frame_rate)
+        return NetworkBackend(led_count, config, self.registry)
+
+    def test_colors_to_rgb_bytes(self):
+        # Execute
+        found_bytes = colors_to_rgb_bytes(np.array([0x102030, 0xffffff], dtype=np.uint32))
+
+        # Verify
+        self.assertEqual(found_bytes, bytes([0x10, 0x20, 0x30, 0xff, 0xff, 0xff]))
+
+    def test_ddp_encoder(self):
+        # Prepare
+        colors = np.arange(500, dtype=np.uint32)
+
+        # Execute
+        packets = DdpEncoder().encode(colors)
+
+        # Verify (480 pixels fit in the first packet, the second one pushes the frame)
+        headers = [DDP_HEADER.unpack(packet[:DDP_HEADER.size]) for packet in packets]
+        self.assertEqual(headers, [(DDP_VERSION_1, 1, DDP_TYPE_RGB24, DDP_DESTINATION_DISPLAY, 0, 1440),
+                                   (DDP_VERSION_1 | DDP_PUSH, 1, DDP_TYPE_RGB24, DDP_DESTINATION_DISPLAY, 1440, 60)])
+        self.assertEqual(b''.join(packet[DDP_HEADER.size:] for packet in packets), colors_to_rgb_bytes(colors))
+
+    def test_e131_encoder(self):
+        # Prepare
+        colors = np.arange(200, dtype=np.uint32)
+
+        # Execute
+        packets = E131Encoder(3).encode(colors)
+
+        # Verify (170 pixels per universe, in consecutive universes)
+        headers = [E131_HEADER.unpack(packet[:E131_HEADER.size]) for packet in packets]
+        self.assertEqual([len(packet) for packet in packets], [126 + 510, 126 + 90])
+        self.assertEqual([header[2] for header in headers], [E131_ACN_IDENTIFIER] * 2)
+        self.assertEqual([header[13] for header in headers], [3, 4])  # Universe
+        self.assertEqual([header[19] for header in headers], [511, 91])  # Property value count, including start code
+        self.assertEqual(b''.join(packet[E131_HEADER.size:] for packet in packets), colors_to_rgb_bytes(colors))
+
+    def test_ddp_frames_received(self):
+        # Prepare
+        backend = self.create_backend('ddp', 600)
+        received = []
+
+        # Execute (push 20 frames, each waiting for the complete frame at the receiver)
+        for frame_nr in range(20):
+            colors = np.full(600, frame_nr, dtype=np.uint32)
+            backend.set_pixels(np.arange(600), colors)
+            backend.show()
+            data = bytearray(1800)
+            flags = 0
+            while not flags & DDP_PUSH:
+                packet = self.receiver.recv(2048)
+                flags, _, _, _, offset, length = DDP_HEADER.unpack(packet[:DDP_HEADER.size])
+                data[offset:offset + length] = packet[DDP_HEADER.size:]
+            received.append(bytes(data) == colors_to_rgb_bytes(colors))
+        backend.close()
+
+        # Verify
+        self.assertTrue(all(received))
+        self.assertEqual(self.registry.counter("led_network_packets_sent_total").value, 40)
+
+    def test_e131_frame_received(self):
+        # Prepare
+        backend = self.create_backend('e131', 340)
+        colors = np.arange(340, dtype=np.uint32)
+
+        # Execute
+        backend.set_pixels(np.arange(340), colors)
+        backend.show()
+        packets = [self.receiver.recv(1024) for _ in range(2)]
+        backend.close()
+
+        # Verify
+        universes = {E131_HEADER.unpack(packet[:E131_HEADER.size])[13]: packet[E131_HEADER.size:] for packet in packets}
+        self.assertEqual(universes[3] + universes[4], colors_to_rgb_bytes(colors))
+
+    def test_rate_limit_sends_latest_frame(self):
+        # Prepare
+        backend = self.create_backend('ddp', 4, max_frame_rate=5)
+
+        # Execute (show frames much faster than the maximum frame rate)
+        for frame_nr in range(1, 11):
+            backend.set_pixels(np.arange(4), np.full(4, frame_nr, dtype=np.uint32))
+            backend.show()
+        first = self.receiver.recv(2048)
+        last = self.receiver.recv(2048)
+        backend.close()
+
+        # Verify (the frames shown during the wait are combined into the latest one)
+        self.assertEqual(last[DDP_HEADER.size:], colors_to_rgb_bytes(np.full(4, 10, dtype=np.uint32)))
+        self.assertGreater(self.registry.counter("led_network_frames_combined_total").value, 0)
+        self.assertLessEqual(self.registry.counter("led_network_frames_sent_total").value, 3)
+
+
+class SlowBackend(VirtualBackend):
+    def __init__(self, led_count, show_time):
+        super().__init__(led_count)
+        self.show_time = show_time
+
+    def show(self):
+        time.sleep(self.show_time)
+        super().show()
+
+
+class FailingBackend(VirtualBackend):
+    def show(self):
+        raise OSError('Output failed')
+
+
+class TestSegmentedBackend(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_segments_share_address_space(self):
+        # Prepare
+        segments = [VirtualBackend(3), VirtualBackend(2)]
+        backend = SegmentedBackend(segments, self.registry)
+
+        # Execute
+        backend.set_pixels(np.array([0, 4]), np.array([1, 5], dtype=np.uint32))
+        backend.show()
+        backend.close()
+
+        # Verify
+        self.assertEqual(backend.numPixels(), 5)
+        self.assertEqual(backend.get_pixels().tolist(), [1, 0, 0, 0, 5])
+        self.assertEqual(segments[0].get_pixels().tolist(), [1, 0, 0])
+        self.assertEqual(segments[1].get_pixels().tolist(), [0, 5])
+
+    def test_segments_blocking(self):
+        # Prepare
+        blocking_segment = VirtualBackend(2)
+        blocking_segment.blocking = True
+
+        # Execute
+        backend = SegmentedBackend([VirtualBackend(2), VirtualBackend(2)], self.registry)
+        blocking_backend = SegmentedBackend([VirtualBackend(2), blocking_segment], self.registry)
+        backend.close()
+        blocking_backend.close()
+
+        # Verify (only blocking when any of the segments blocks)
+        self.assertFalse(backend.blocking)
+        self.assertTrue(blocking_backend.blocking)
+
+    def test_unchanged_segments_not_shown(self):
+        # Prepare
+        segments = [VirtualBackend(2), VirtualBackend(2)]
+        backend = SegmentedBackend(segments, self.registry)
+
+        # Execute
+        backend.set_pixels(np.array([3]), np.array([7], dtype=np.uint32))
+        backend.show()
+        backend.close()
+
+        # Verify
+        self.assertEqual([segment.frames_shown for segment in segments], [0, 1])
+
+    def test_segments_shown_in_parallel(self):
+        # Prepare
+        backend = SegmentedBackend([SlowBackend(2, 0.1) for _ in range(4)], self.registry)
+        backend.set_pixels(np.arange(8), np.ones(8, dtype=np.uint32))
+
+        # Execute
+        start = time.monotonic()
+        backend.show()
+        duration = time.monotonic() - start
+        backend.close()
+
+        # Verify (four segments of 100 ms each take about 100 ms together)
+        self.assertLess(duration, 0.3)
+        self.assertEqual(self.registry.histogram("led_segment_show_time_seconds", segment=3).count, 1)
+
+    def test_segment_error_raised(self):
+        # Prepare
+        backend = SegmentedBackend([VirtualBackend(2), FailingBackend(2)], self.registry)
+        backend.set_pixels(np.arange(4), np.ones(4, dtype=np.uint32))
+
+        # Execute and verify
+        with self.assertRaises(OSError):
+            backend.show()
+        backend.close()
+
+    def test_create_segmented_backend(self):
+        # Prepare
+        led_config = replace(LEDs(), general=GeneralLEDSettings(), network=NetworkLEDSettings(),
+                             segments=[Segment(led_count=3, backend='virtual'),
+                                       Segment(led_count=4, backend='pixelstrip', gpio_pin=13, channel=1)])
+
+        # Execute
+        backend = create_backend(led_config)
+        backend.close()
+
+        # Verify
+        self.assertIsInstance(backend, SegmentedBackend)
+        self.assertEqual(backend.numPixels(), 7)
+        self.assertIsInstance(backend.workers[0].backend, VirtualBackend)
+        self.assertIsInstance(backend.workers[1].backend, PixelStripBackend)
+        self.assertEqual(backend.workers[1].start, 3)
+
+    def test_create_segmented_backend_without_network_section(self):
+        # Prepare
+        with tempfile.TemporaryDirectory() as tempdir:
+            config_file = os.path.join(tempdir, 'config.toml')
+            with open(config_file, 'w') as file:
+                file.write('[leds.general]\nled-count = 7\n'
+                           '[[leds.segments]]\nled-count = 3\nbackend = "virtual"\n'
+                           '[[leds.segments]]\nled-count = 4\nbackend = "network"\naddress = "127.0.0.1"\n')
+            led_config = Binder(Config).parse_toml(config_file).leds
+
+        # Execute
+        backend = create_backend(led_config)
+        backend.close()
+
+        # Verify (the default network settings are used for the network segment)
+        self.assertEqual(backend.numPixels(), 7)
+        self.assertIsInstance(backend.workers[1].backend, NetworkBackend)
+        self.assertEqual(backend.workers[1].backend.config.protocol, NetworkLEDSettings.protocol)
+
+
+if __name__ == '__main__':
+    unittest.main()
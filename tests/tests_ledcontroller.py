@@ -3,11 +3,20 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
+import os
+import tempfile
 import unittest
-from unittest.mock import patch
+from dataclasses import replace
+from unittest.mock import patch, AsyncMock
+
+import numpy as np
 
 from galileo_reference_tree import constants
 from galileo_reference_tree.ledcontroller import *
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.propagationdemand import PropagationDemand
+from galileo_reference_tree.statehub import StateHub
 from galileo_reference_tree.satephemeris import SatEphemeris
 
 
@@ -16,22 +25,6 @@ def mocked_count():
 
 
 class TestLedController(unittest.TestCase):
-    def test_strip_type_to_int(self):
-        # Prepare
-        strip_type = "SK6812_STRIP"
-        expected_int = 0x00081000
-
-        # Execute
-        found_int = strip_type_to_int(strip_type)
-
-        # Verify
-        self.assertEqual(found_int, expected_int)
-
-    def test_strip_type_to_int_error(self):
-        # Execute
-        with self.assertRaises(KeyError):
-            strip_type_to_int(None)
-
     def test_rotate_list_left(self):
         # Prepare
         list_before = [1, 2, 3]
@@ -96,7 +89,24 @@ class TestLedController(unittest.TestCase):
         # Verify
         self.assertEqual(found_brightness, expected_brightness)
 
-    def test_set_sat_led_healthy(self):
+    def test_get_change_delays(self):
+        # Prepare (brightness from 0 to 255 over 90 degrees, so the color changes every few tenths of a degree)
+        config = replace(LEDs(), satellites=replace(LEDs.satellites(), min_elev=5.0, min_elev_brightness=0,
+                                                    max_elev=90.0, max_elev_brightness=255, gamma=1.0))
+        ledcontroller = LedController(2, [], [], config)
+        azelev = np.array([[0, 45.0], [0, -20.0], [0, -20.0], [0, 89.0]])
+        rates = np.array([[0, 0.01], [0, 0.01], [0, -0.01], [0, 0]])
+
+        # Execute
+        found_delays = ledcontroller.get_change_delays(np.arange(4), azelev, rates)
+
+        # Verify (until the next brightness step, until rising above the minimum elevation, and never)
+        self.assertTrue(0 < found_delays[0] <= 40)
+        self.assertAlmostEqual(found_delays[1], 2500)
+        self.assertEqual(found_delays[2:].tolist(), [np.inf, np.inf])
+        self.assertIn(5.0, ledcontroller.step_elevations)
+
+    def test_get_sat_color_healthy(self):
         # Prepare
         signal_unhealthy = False
         sat_idx = 0
@@ -106,13 +116,12 @@ class TestLedController(unittest.TestCase):
         expected_color = LEDs.satellites.color_healthy
 
         # Execute
-        ledcontroller.set_sat_led(sat_idx, signal_unhealthy)
-        found_color_rgb = ledcontroller.ledstrip.getPixelColorRGB(ledcontroller.get_led_idx(sat_idx))
+        found_color = ledcontroller.get_sat_color(sat_idx, signal_unhealthy)
 
         # Verify
-        self.assertEqual((found_color_rgb.r, found_color_rgb.g, found_color_rgb.b), expected_color)
+        self.assertEqual(found_color, Color(*expected_color))
 
-    def test_set_sat_led_unhealthy(self):
+    def test_get_sat_color_unhealthy(self):
         # Prepare
         signal_unhealthy = True
         sat_idx = 0
@@ -122,42 +131,216 @@ class TestLedController(unittest.TestCase):
         expected_color = LEDs.satellites.color_unhealthy
 
         # Execute
-        ledcontroller.set_sat_led(sat_idx, signal_unhealthy)
-        found_color_rgb = ledcontroller.ledstrip.getPixelColorRGB(ledcontroller.get_led_idx(sat_idx))
+        found_color = ledcontroller.get_sat_color(sat_idx, signal_unhealthy)
 
         # Verify
-        self.assertEqual((found_color_rgb.r, found_color_rgb.g, found_color_rgb.b), expected_color)
+        self.assertEqual(found_color, Color(*expected_color))
 
-    def test_show_plane(self):
+    def test_get_sat_colors(self):
         # Prepare
-        led_indices = (5, 6, 7, 8, 9)
         ledcontroller = LedController(constants.MAX_SATS, [], [], LEDs)
-        early_late_color = tuple([round(i * LEDs.satellites.brightness_early_late_plane) for i in
-                                  LEDs.satellites.color_plane])
-        prompt_color = LEDs.satellites.color_plane
+        elevations = np.array([90, 90, 90, -10, -0.04])
+        health = np.array([0, -1, 1, 0, 0])
+
+        # Execute
+        found_colors = ledcontroller.get_sat_colors(elevations, health)
+
+        # Verify (one color per health status, and off below the minimum elevation, even if rounded up to it)
+        self.assertEqual(found_colors.tolist(), [Color(*LEDs.satellites.color_healthy),
+                                                 Color(*LEDs.satellites.color_unknown),
+                                                 Color(*LEDs.satellites.color_unhealthy), 0, 0])
 
-        expected_color_5 = (0, 0, 0)
-        expected_color_6 = (0, 0, 0)
-        expected_color_7 = early_late_color
-        expected_color_8 = prompt_color
-        expected_color_9 = early_late_color
+    def test_get_sat_colors_gamma(self):
+        # Prepare
+        satellites = replace(LEDs.satellites(), min_elev_brightness=0, gamma=2.0, color_healthy=(0, 200, 0))
+        config = replace(LEDs(), satellites=satellites)
+        ledcontroller = LedController(constants.MAX_SATS, [], [], config)
 
         # Execute
-        with patch("itertools.count", side_effect=mocked_count):
-            ledcontroller.show_plane(led_indices)
+        found_colors = ledcontroller.get_sat_colors(np.array([45, 90]), np.array([0, 0]))
+
+        # Verify (half brightness becomes a quarter after the gamma correction, full brightness is unaffected)
+        self.assertEqual(found_colors.tolist(), [Color(0, 50, 0), Color(0, 200, 0)])
+
+    def test_plane_layer(self):
+        # Prepare
+        led_indices = (5, 6, 7, 8, 9)
+        plane_layer = PlaneLayer(led_indices, LEDs)
+        frame = [0] * 10
+        early_late_color = Color(*[round(i * LEDs.satellites.brightness_early_late_plane) for i in
+                                   LEDs.satellites.color_plane])
+        prompt_color = Color(*LEDs.satellites.color_plane)
+
+        # Execute (second animation step)
+        plane_layer.render(frame, LEDs.general.plane_interval)
 
         # Verify
-        found_color_5 = ledcontroller.ledstrip.getPixelColorRGB(5)
-        found_color_6 = ledcontroller.ledstrip.getPixelColorRGB(6)
-        found_color_7 = ledcontroller.ledstrip.getPixelColorRGB(7)
-        found_color_8 = ledcontroller.ledstrip.getPixelColorRGB(8)
-        found_color_9 = ledcontroller.ledstrip.getPixelColorRGB(9)
-
-        self.assertEqual((found_color_5.r, found_color_5.g, found_color_5.b), expected_color_5)
-        self.assertEqual((found_color_6.r, found_color_6.g, found_color_6.b), expected_color_6)
-        self.assertEqual((found_color_7.r, found_color_7.g, found_color_7.b), expected_color_7)
-        self.assertEqual((found_color_8.r, found_color_8.g, found_color_8.b), expected_color_8)
-        self.assertEqual((found_color_9.r, found_color_9.g, found_color_9.b), expected_color_9)
+        self.assertEqual(frame[5], 0)
+        self.assertEqual(frame[6], 0)
+        self.assertEqual(frame[7], early_late_color)
+        self.assertEqual(frame[8], prompt_color)
+        self.assertEqual(frame[9], early_late_color)
+
+    def test_plane_layer_wraps_around(self):
+        # Prepare
+        plane_layer = PlaneLayer((5, 6, 7, 8, 9), LEDs)
+        frame = [0] * 10
+
+        # Execute (fourth animation step, so the animation wraps around to the start of the plane)
+        plane_layer.render(frame, 3 * LEDs.general.plane_interval)
+
+        # Verify
+        self.assertEqual([led_idx for led_idx in range(10) if frame[led_idx]], [5, 6, 9])
+
+    def test_plane_layer_excludes_satellites(self):
+        # Prepare
+        plane_layer = PlaneLayer((0, 1, 5, 6), LEDs)
+
+        # Verify (LEDs 0 and 1 are mapped to satellites)
+        self.assertEqual(plane_layer.led_indices, [5, 6])
+
+    def test_plane_layer_follows_argument_of_latitude(self):
+        # Prepare (eight LEDs spread over the orbit, with the LEDs of PRN 1 and 2 excluded from the animation)
+        arglat = [None, 60.0, 300.0]
+        plane_layer = PlaneLayer((0, 5, 6, 7, 1, 8, 9, 10), LEDs, arglat=arglat)
+        frame = np.zeros(11, dtype=np.uint32)
+        prompt_color = Color(*LEDs.satellites.color_plane)
+
+        # Execute (the first member with a known argument of latitude is PRN 2, at 60 degrees)
+        plane_layer.render(frame, 0)
+
+        # Verify (the middle LED is the last LED before 60 degrees, at 45 degrees)
+        self.assertAlmostEqual(plane_layer.get_cursor_angle(), 60)
+        self.assertEqual(np.flatnonzero(frame).tolist(), [5, 6, 10])
+        self.assertEqual(frame[5], prompt_color)
+
+    def test_plane_layer_moves_with_orbit(self):
+        # Prepare (a Galileo satellite advances about 25.6 degrees along its orbit per hour)
+        degrees_per_hour = 360 / (14 + 5 / 60)
+        arglat = [40.0, None, None]
+        plane_layer = PlaneLayer((0, 5, 6, 7, 1, 8, 9, 10), LEDs, arglat=arglat)
+        prompt_color = Color(*LEDs.satellites.color_plane)
+        cursor_angles = []
+        prompt_leds = []
+
+        # Execute (a simulated hour, in steps of a minute)
+        for minute in range(61):
+            arglat[0] = 40.0 + degrees_per_hour * minute / 60
+            frame = np.zeros(11, dtype=np.uint32)
+            plane_layer.render(frame, minute * 60)
+            cursor_angles.append(plane_layer.get_cursor_angle())
+            prompt_leds.append(int(np.flatnonzero(frame == prompt_color)[0]))
+
+        # Verify (forward along the orbit at the orbital rate, from the LED at 315 to the one at 45 degrees)
+        self.assertTrue(np.all(np.diff(cursor_angles) > 0))
+        self.assertAlmostEqual(cursor_angles[-1] - cursor_angles[0], degrees_per_hour)
+        self.assertEqual(prompt_leds[0], 10)
+        self.assertEqual(prompt_leds[-1], 5)
+
+    def test_plane_layer_without_argument_of_latitude(self):
+        # Prepare
+        plane_layer = PlaneLayer((0, 5, 6, 7, 1, 8, 9, 10), LEDs, arglat=[None, None, None])
+        frame = np.zeros(11, dtype=np.uint32)
+
+        # Execute
+        plane_layer.render(frame, 0)
+
+        # Verify (falls back to the timed animation)
+        self.assertIsNone(plane_layer.get_cursor_angle())
+        self.assertEqual(np.flatnonzero(frame).tolist(), [6, 7, 8])
+
+    def test_satellite_layer(self):
+        # Prepare
+        ephem = [SatEphemeris() for _ in range(3)]
+        ephem[0].signalHealth = 0
+        azelev = [[0, 90], [], [0, -10]]  # Visible, not yet propagated and below the horizon
+        ledcontroller = LedController(3, ephem, azelev, LEDs)
+        frame = np.ones(5, dtype=np.uint32)
+
+        # Execute
+        ledcontroller.compositor.layers[-1].render(frame, 0)
+
+        # Verify
+        self.assertEqual(frame[0], Color(*LEDs.satellites.color_healthy))
+        self.assertEqual(frame[1], 1)  # Untouched
+        self.assertEqual(frame[2], 0)  # Off below the horizon
+
+    def test_satellite_layer_shows_propagated_positions(self):
+        # Prepare
+        azelev = [[356, 10], []]
+        ledcontroller = LedController(2, [SatEphemeris(), SatEphemeris()], azelev, LEDs)
+        satellite_layer = ledcontroller.compositor.layers[-1]
+
+        # Execute (without a propagation demand, e.g. when rendering offline)
+        azimuths, elevations = satellite_layer.get_positions(0.0)
+
+        # Verify
+        self.assertEqual(azimuths[0], 356)
+        self.assertEqual(elevations[0], 10)
+        self.assertTrue(np.isnan(elevations[1]))
+
+    def test_satellite_layer_display_lag(self):
+        # Prepare (a satellite rising 0.01 degrees per second, only propagated once a minute)
+        demand = PropagationDemand(3, MetricsRegistry(), StateHub(MetricsRegistry()))
+        ledcontroller = LedController(3, [SatEphemeris() for _ in range(3)], [[], [], []], LEDs, demand=demand)
+        demand.declare('leds', ledcontroller.mapped_sat_indices, 1.0, 60.0,
+                       lambda sat_indices, azelev, rates: np.full(len(sat_indices), np.inf))
+        satellite_layer = ledcontroller.compositor.layers[-1]
+        start_time = ledcontroller.compositor.start_time
+        elevation_at = lambda elapsed: 10 + 0.01 * elapsed
+        propagation_times = []
+        errors = []
+
+        # Execute (a frame every second for five minutes)
+        for elapsed in np.arange(300.0):
+            if 0 in demand.get_due(start_time + elapsed):
+                demand.mark_propagated(np.array([0]), start_time + elapsed, [[180, elevation_at(elapsed)]])
+                propagation_times.append(elapsed)
+            _, elevations = satellite_layer.get_positions(elapsed)
+            errors.append(elevations[0] - elevation_at(elapsed))
+
+        # Verify (the LEDs show the current elevation in between propagations, instead of the previous propagation)
+        self.assertEqual(propagation_times, [0, 1, 61, 121, 181, 241])
+        self.assertLess(np.max(np.abs(errors)), 1e-6)
+
+    def test_satellite_layer_fades_health(self):
+        # Prepare
+        ledcontroller = LedController(1, [SatEphemeris()], [[0, 90]], LEDs)
+        satellite_layer = ledcontroller.compositor.layers[-1]
+        healthy = np.array(LEDs.satellites.color_healthy, dtype=float)
+        unhealthy = np.array(LEDs.satellites.color_unhealthy, dtype=float)
+
+        # Execute
+        before = satellite_layer.fade_health_colors(np.array([0]), 0.0)
+        at_change = satellite_layer.fade_health_colors(np.array([1]), 1.0)
+        halfway = satellite_layer.fade_health_colors(np.array([1]), 1.0 + constants.HEALTH_FADE_DURATION / 2)
+        after = satellite_layer.fade_health_colors(np.array([1]), 1.0 + constants.HEALTH_FADE_DURATION)
+
+        # Verify
+        np.testing.assert_array_equal(before[0], healthy)
+        np.testing.assert_array_equal(at_change[0], healthy)
+        np.testing.assert_array_equal(halfway[0], (healthy + unhealthy) / 2)
+        np.testing.assert_array_equal(after[0], unhealthy)
+
+    def test_satellite_layer_geometry(self):
+        # Prepare
+        ephem = [SatEphemeris() for _ in range(3)]
+        azelev = [[90, 30], [270, 30], [180, -10]]  # East, west and below the horizon
+        with tempfile.TemporaryDirectory() as tempdir:
+            geometry_file = os.path.join(tempdir, 'geometry.csv')
+            with open(geometry_file, 'w') as file:
+                file.write('led,x,y,z\n4,1,0,0\n5,-1,0,0\n6,0,1,1\n7,0,-1,0\n')
+            config = replace(LEDs(), satellites=replace(LEDs.satellites(), geometry_file=geometry_file))
+            ledcontroller = LedController(3, ephem, azelev, config)
+        frame = np.ones(10, dtype=np.uint32)
+
+        # Execute
+        ledcontroller.compositor.layers[-1].render(frame, 0)
+
+        # Verify (satellites on the LEDs nearest to their position, the one below the horizon not drawn)
+        self.assertNotEqual(frame[4], 1)
+        self.assertNotEqual(frame[5], 1)
+        self.assertEqual(frame[[0, 1, 2, 3, 6, 7, 8, 9]].tolist(), [1] * 8)
 
     def test_update_leds(self):
         # Prepare
@@ -171,13 +354,22 @@ class TestLedController(unittest.TestCase):
         ledcontroller = LedController(max_sats, [ephem], azelev, LEDs)
 
         # Execute
-        with patch("itertools.count", side_effect=mocked_count):
-            ledcontroller.update_leds()
+        with patch("galileo_reference_tree.compositor.itertools", **{"count.side_effect": mocked_count}), \
+                patch("asyncio.sleep", new_callable=AsyncMock):
+            asyncio.run(ledcontroller.update_leds())
             found_pixel_color = ledcontroller.ledstrip.getPixelColorRGB(0)
 
         # Verify
         self.assertEqual((found_pixel_color.r, found_pixel_color.g, found_pixel_color.b), expected_color)
 
+    def test_layer_priority(self):
+        # Prepare
+        ledcontroller = LedController(constants.MAX_SATS, [], [], LEDs)
+
+        # Verify (planes first, satellites on top)
+        priorities = [layer.priority for layer in ledcontroller.compositor.layers]
+        self.assertEqual(priorities, [constants.PLANE_LAYER_PRIORITY] * 3 + [constants.SATELLITE_LAYER_PRIORITY])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import os
+import tempfile
+import unittest
+
+from galileo_reference_tree.ledgeometry import *
+
+
+class TestLedGeometry(unittest.TestCase):
+    def setUp(self):
+        # Four LEDs around the bottom of the tree (north, east, south, west) and one at the top
+        self.led_indices = [10, 11, 12, 13, 14]
+        self.positions = [[0, 1, 0], [1, 0, 0], [0, -1, 0], [-1, 0, 0], [0, 0, 2]]
+
+    def test_azelev_to_unit_vectors(self):
+        # Execute
+        found_vectors = azelev_to_unit_vectors(np.array([0, 90]), np.array([0, 90]))
+
+        # Verify
+        np.testing.assert_array_almost_equal(found_vectors, [[0, 1, 0], [0, 0, 1]])
+
+    def test_led_azelev(self):
+        # Execute
+        geometry = LedGeometry(self.led_indices, self.positions)
+
+        # Verify (the center of the LEDs is the trunk, the highest LED is the zenith)
+        np.testing.assert_array_almost_equal(geometry.led_azelev[:, 0] % 360, [0, 90, 180, 270, 0])
+        np.testing.assert_array_almost_equal(geometry.led_azelev[:, 1], [0, 0, 0, 0, 90])
+
+    def test_nearest_leds(self):
+        # Prepare
+        geometry = LedGeometry(self.led_indices, self.positions)
+
+        # Execute
+        found_leds = geometry.nearest_leds(np.array([5, 95, 185, 359.8, 0, 200]), np.array([10, 10, 10, 10, 80, -5]))
+
+        # Verify (wrapping around north, and below the horizon treated as on the horizon)
+        self.assertEqual(found_leds.tolist(), [10, 11, 12, 10, 14, 12])
+
+    def test_get_cell_change_delays(self):
+        # Prepare
+        geometry = LedGeometry(self.led_indices, self.positions)
+
+        # Execute
+        found_delays = geometry.get_cell_change_delays(np.array([10.2, 359.8, 90]), np.array([10, 10, 10.2]),
+                                                       np.array([0.1, 0.2, 0]), np.array([0, 0, -0.1]))
+
+        # Verify (crossing halfway between two grid points, wrapping around north)
+        np.testing.assert_array_almost_equal(found_delays, [3, 3.5, 7])
+
+    def test_from_file(self):
+        # Prepare
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, 'geometry.csv')
+            with open(path, 'w') as file:
+                file.write('led,x,y,z\n')
+                for led_idx, position in zip(self.led_indices, self.positions):
+                    file.write('%d,%f,%f,%f\n' % (led_idx, *position))
+
+            # Execute
+            geometry = LedGeometry.from_file(path)
+
+        # Verify
+        self.assertEqual(geometry.led_indices.tolist(), self.led_indices)
+        self.assertEqual(geometry.nearest_leds(np.array([90]), np.array([0])).tolist(), [11])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,13 +3,19 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
 import datetime
 import unittest
 from unittest.mock import patch, MagicMock
 
+import numpy as np
+
 from galileo_reference_tree import constants
 from galileo_reference_tree.config import Location
-from main import getCurrentToW, propagate_all
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.propagationdemand import PropagationDemand
+from galileo_reference_tree.statehub import StateHub, AsyncSubscription, TOPIC_AZELEV, TOPIC_EPHEMERIS, TOPIC_FRAME
+from main import getCurrentToW, propagate_all, predict_all, publish_plot_state
 
 
 class TestMainFunctions(unittest.TestCase):
@@ -41,18 +47,125 @@ class TestMainFunctions(unittest.TestCase):
         for i, eph in enumerate(all_ephem):
             eph.toe = (i % 2 == 0)
             eph.propagate.side_effect = lambda wn, tow: (wn + 10, tow + 20, 30)
+            eph.get_argument_of_latitude.return_value = 10.0 * i
 
         all_azelev = [[0, 0] for _ in range(5)]
+        all_arglat = [None] * 5
         location = Location(latitude_deg=50.0, longitude_deg=8.0, altitude_m=200.0)
+        hub = StateHub(MetricsRegistry())
 
-        # Execute and verify (run only one loop using time.sleep mock)
-        with patch('main.time.sleep', side_effect=KeyboardInterrupt):
-            with self.assertRaises(KeyboardInterrupt):
-                propagate_all(all_ephem, all_azelev, location, simulation_speed)
+        # Execute and verify (run only one loop using a mock of the wait for an ephemeris change)
+        with patch.object(AsyncSubscription, 'wait', side_effect=asyncio.CancelledError) as mock_wait:
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(propagate_all(all_ephem, all_azelev, location, simulation_speed, all_arglat, hub))
+        mock_wait.assert_called_once()
+        self.assertTrue(0 < mock_wait.call_args.args[0] <= 0.01)  # Until the deadline one interval after the start
+        self.assertEqual(hub.get_version(TOPIC_AZELEV), 1)
 
         for i, eph in enumerate(all_ephem):
             if eph.toe:
                 eph.propagate.assert_called_once_with(2000, 432000)
+        self.assertEqual(all_arglat, [0.0, 10.0, 20.0, 30.0, 40.0])
+
+    @patch('main.constants.MAX_SATS', 4)
+    @patch('main.getCurrentToW')
+    @patch('main.ecef2aer')
+    def test_propagate_all_demanded_satellites(self, mock_ecef2aer, mock_getCurrentToW):
+        # Prepare
+        mock_getCurrentToW.return_value = (2000, 432000)
+        mock_ecef2aer.side_effect = lambda x, y, z, lat, lon, alt: (x, y, z)
+        all_ephem = [MagicMock(toe=1) for _ in range(4)]
+        for eph in all_ephem:
+            eph.propagate.return_value = (1, 2, 3)
+        all_azelev = [[] for _ in range(4)]
+        location = Location(latitude_deg=50.0, longitude_deg=8.0, altitude_m=200.0)
+        hub = StateHub(MetricsRegistry())
+        demand = PropagationDemand(4, hub=hub)
+        demand.declare('leds', [1], 1.0)
+        demand.declare('skyplot', [1, 2], 10.0)
+
+        # Execute (run only one loop using a mock of the wait for an ephemeris change)
+        with patch.object(AsyncSubscription, 'wait', side_effect=asyncio.CancelledError) as mock_wait:
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(propagate_all(all_ephem, all_azelev, location, hub=hub, demand=demand))
+
+        # Verify (only the demanded satellites, until the first of them is due again)
+        self.assertEqual([bool(eph.propagate.called) for eph in all_ephem], [False, True, True, False])
+        self.assertEqual(all_azelev, [[], [1, 2], [1, 2], []])
+        self.assertTrue(0.9 < mock_wait.call_args.args[0] <= 1.0)
+
+    @patch('main.constants.MAX_SATS', 3)
+    @patch('main.getCurrentToW')
+    @patch('main.ecef2aer')
+    def test_propagate_all_changed_ephemeris(self, mock_ecef2aer, mock_getCurrentToW):
+        # Prepare
+        mock_getCurrentToW.return_value = (2000, 432000)
+        mock_ecef2aer.side_effect = lambda x, y, z, lat, lon, alt: (x, y, z)
+        all_ephem = [MagicMock(toe=1, gst=100) for _ in range(3)]
+        for eph in all_ephem:
+            eph.propagate.return_value = (1, 2, 3)
+        all_azelev = [[] for _ in range(3)]
+        location = Location(latitude_deg=50.0, longitude_deg=8.0, altitude_m=200.0)
+        hub = StateHub(MetricsRegistry())
+
+        def receive_ephemeris(timeout):
+            if all_ephem[1].gst == 200:
+                raise asyncio.CancelledError
+            all_ephem[1].gst = 200
+            return [TOPIC_EPHEMERIS]
+
+        # Execute (receive a new ephemeris of one satellite during the first wait, and stop during the second)
+        with patch.object(AsyncSubscription, 'wait', side_effect=receive_ephemeris):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(propagate_all(all_ephem, all_azelev, location, hub=hub))
+
+        # Verify (only the satellite with the new ephemeris is propagated again)
+        self.assertEqual([eph.propagate.call_count for eph in all_ephem], [1, 2, 1])
+
+    @patch('main.constants.MAX_SATS', 2)
+    @patch('main.getCurrentToW')
+    @patch('main.ecef2aer')
+    def test_predict_all(self, mock_ecef2aer, mock_getCurrentToW):
+        # Prepare
+        mock_getCurrentToW.return_value = (2000, 432000)
+        mock_ecef2aer.side_effect = lambda x, y, z, lat, lon, alt: (x, y, z)
+        all_ephem = [MagicMock(toe=1), MagicMock(toe=0, tle=None)]
+        all_ephem[0].propagate_batch.side_effect = lambda wn, tows: (tows - 432000, tows * 0 + 10, tows)
+        location = Location(latitude_deg=50.0, longitude_deg=8.0, altitude_m=200.0)
+
+        # Execute
+        predicted = predict_all(all_ephem, location, 3, simulation_speed=2)
+
+        # Verify (a sample every interval, sped up with the simulation, and nothing for the unknown satellite)
+        step = constants.TRACK_SAMPLE_INTERVAL * 2
+        self.assertEqual(predicted.shape, (2, 3, 2))
+        np.testing.assert_array_equal(predicted[0], [[0, 10], [step, 10], [2 * step, 10]])
+        self.assertTrue(np.all(np.isnan(predicted[1])))
+        all_ephem[1].propagate_batch.assert_not_called()
+
+    @patch('main.predict_all')
+    def test_publish_plot_state(self, mock_predict_all):
+        # Prepare
+        mock_state = MagicMock()
+        location = Location(latitude_deg=50.0, longitude_deg=8.0, altitude_m=200.0)
+        hub = StateHub(MetricsRegistry())
+
+        async def publish_twice():
+            task = asyncio.create_task(publish_plot_state(mock_state, [], [], None, location, 3, hub=hub))
+            while mock_state.publish.call_count < 1:
+                await asyncio.sleep(0.01)
+            hub.publish(TOPIC_FRAME)
+            while mock_state.publish.call_count < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        # Execute
+        asyncio.run(publish_twice())
+
+        # Verify (published again on the change, but the tracks are only predicted once per sample interval)
+        mock_predict_all.assert_called_once_with([], location, 3, 1)
+        self.assertIs(mock_state.publish.call_args.args[3], mock_predict_all.return_value)
+
 
 if __name__ == '__main__':
     unittest.main()
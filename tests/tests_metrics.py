@@ -0,0 +1,123 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import unittest
+from unittest.mock import patch
+
+from galileo_reference_tree.metrics import *
+
+
+class TestMetrics(unittest.TestCase):
+    def test_format_labels(self):
+        # Execute
+        found_empty = format_labels({})
+        found_labels = format_labels({'prn': 11, 'msg_type': 1046})
+
+        # Verify
+        self.assertEqual(found_empty, '')
+        self.assertEqual(found_labels, '{msg_type="1046",prn="11"}')
+
+    def test_counter(self):
+        # Prepare
+        counter = Counter()
+
+        # Execute
+        counter.inc()
+        counter.inc(5)
+
+        # Verify
+        self.assertEqual(counter.sample(), 6)
+
+    def test_gauge_callback(self):
+        # Prepare
+        gauge = Gauge(callback=lambda: 42)
+
+        # Execute
+        gauge.set(1)
+
+        # Verify
+        self.assertEqual(gauge.sample(), 42)
+
+    @patch('galileo_reference_tree.metrics.time.monotonic')
+    def test_meter(self, mock_monotonic):
+        # Prepare
+        mock_monotonic.side_effect = [0.0, 0.5, 0.6, 2.0, 2.1]
+        meter = Meter(window=1.0)
+
+        # Execute
+        meter.mark(100)  # Within the first window, no rate yet
+        rate_first_window = meter.sample()
+        meter.mark(300)  # Closes the window after 2 seconds
+
+        # Verify
+        self.assertEqual(rate_first_window, 0.0)
+        self.assertEqual(meter.sample(), 200)
+        self.assertEqual(meter.total, 400)
+
+    @patch('galileo_reference_tree.metrics.time.monotonic')
+    def test_meter_silence(self, mock_monotonic):
+        # Prepare
+        mock_monotonic.side_effect = [0.0, 0.5, 2.0, 3.5]
+        meter = Meter(window=1.0)
+        meter.mark(100)
+
+        # Execute (sampled after the window expired, and again after a window without any data)
+        rate_expired_window = meter.sample()
+        rate_silent_window = meter.sample()
+
+        # Verify
+        self.assertEqual(rate_expired_window, 50)
+        self.assertEqual(rate_silent_window, 0)
+
+    def test_histogram(self):
+        # Prepare
+        histogram = Histogram(bounds=(1, 2, 3))
+
+        # Execute
+        for value in [0.5, 1.5, 1.5, 2.5, 10]:
+            histogram.observe(value)
+
+        # Verify
+        self.assertEqual(histogram.buckets, [1, 2, 1, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 16)
+        self.assertEqual(histogram.quantile(0.5), 2)
+        self.assertEqual(histogram.quantile(1.0), float('inf'))
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+
+    def test_registry_returns_same_metric(self):
+        # Prepare
+        registry = MetricsRegistry()
+
+        # Execute
+        counter_a = registry.counter('frames', msg_type=1046)
+        counter_b = registry.counter('frames', msg_type=1046)
+        counter_c = registry.counter('frames', msg_type=1045)
+
+        # Verify
+        self.assertIs(counter_a, counter_b)
+        self.assertIsNot(counter_a, counter_c)
+
+    def test_registry_snapshot_and_render(self):
+        # Prepare
+        registry = MetricsRegistry()
+        registry.counter('frames', msg_type=1046).inc(3)
+        registry.gauge('age', callback=lambda: 1.5, prn=11)
+        registry.histogram('decode', bounds=(1,)).observe(0.5)
+
+        # Execute
+        snapshot = registry.snapshot()
+        rendered = registry.render()
+
+        # Verify
+        self.assertEqual(snapshot['frames{msg_type="1046"}'], 3)
+        self.assertEqual(snapshot['age{prn="11"}'], 1.5)
+        self.assertEqual(snapshot['decode']['count'], 1)
+        self.assertIn('frames{msg_type="1046"} 3', rendered)
+        self.assertIn('decode count=1', rendered)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
 
@@ -42,6 +43,22 @@ class TestCheckConnectionResponse(unittest.TestCase):
         self.assertEqual(str(thrown_error.exception), "SOURCETABLE\nCould not connect to mountpoint\n")
 
 
+class TestRtcmFrames(unittest.TestCase):
+    def test_get_frame_size(self):
+        # Execute and verify (header, 10-bit payload length and CRC, ignoring the reserved bits)
+        self.assertEqual(get_frame_size(b"\xd3\x00\x02"), 8)
+        self.assertEqual(get_frame_size(b"\xd3\xfd\x2a"), 3 + 0x12a + 3)
+
+    def test_check_frame_crc(self):
+        # Prepare
+        frame = b"\xd3\x00\x02\x41\xe0"
+        frame += pyrtcm.calc_crc24q(frame).to_bytes(3, "big")
+
+        # Execute and verify
+        self.assertTrue(check_frame_crc(frame))
+        self.assertFalse(check_frame_crc(frame[:-1] + b"\x00"))
+
+
 class TestNtripClient(unittest.TestCase):
     def setUp(self):
         # Sample configuration
@@ -91,39 +108,101 @@ class TestNtripClient(unittest.TestCase):
         self.assertIn(f"Host: {self.ntrip_config.address}:{self.ntrip_config.port}", request)
         self.assertIn("Ntrip-Version: Ntrip/2.0", request)
 
-    @patch("pyrtcm.RTCMReader")
+    @patch("pyrtcm.RTCMReader.parse")
     @patch("galileo_reference_tree.ntripclient.NtripClient.connect_to_server")
-    def test_get_ephemeris_loop(self, mock_connect_to_server, mock_rtcm_reader):
+    def test_get_ephemeris_loop(self, mock_connect_to_server, mock_parse):
         # Prepare
         # Mock an ephemeris entry with a 'gst' property and a 'map_to_ephemeris' method
         mock_ephemeris_entry = MagicMock()
         mock_ephemeris_entry.gst = 0
         self.ephem[0] = mock_ephemeris_entry  # Assume satID is 1, so index 0 is used
 
-        # Mock RTCMReader to provide a fake parsed data entry
+        # Mock the parser to return a fake parsed data entry
         mock_parsed_data = MagicMock()
         mock_parsed_data.DF002 = constants.DF_GALILEO_EPH
         mock_parsed_data.DF252 = 1  # satID
         mock_parsed_data.DF289 = 2
         mock_parsed_data.DF293 = 3
-
-        # Set the mocked RTCMReader to yield the mocked parsed data
-        mock_reader = MagicMock()
-        mock_reader.__iter__.return_value = [(None, mock_parsed_data)]
-        mock_rtcm_reader.return_value = mock_reader
+        mock_parse.return_value = mock_parsed_data
 
         # Execute
-        # Create the client and invoke get_ephemeris_loop
-        client = NtripClient(self.ephem, self.ntrip_config)
-        client.get_ephemeris_loop()
+        # Create the client and invoke get_ephemeris_loop on a stream with a single frame, preceded by a stray byte
+        registry = metrics.MetricsRegistry()
+        client = NtripClient(self.ephem, self.ntrip_config, registry)
+        frame = b"\xd3\x00\x02\x41\x60"
+        frame += pyrtcm.calc_crc24q(frame).to_bytes(3, "big")
+
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"\x00" + frame)
+            reader.feed_eof()
+            await client.get_ephemeris_loop(reader)
+
+        asyncio.run(read())
 
         # Verify
-        # Ensure RTCMReader was initialized correctly
-        mock_rtcm_reader.assert_called_with(client.socket, quitonerror=2)
+        # Ensure the complete frame was parsed
+        mock_parse.assert_called_once_with(frame)
 
         # Check if the ephemeris entry was updated with new GST
         mock_ephemeris_entry.map_to_ephemeris.assert_called_once_with(mock_parsed_data)
 
+        # Check the telemetry recorded for the message
+        self.assertEqual(registry.counter("ntrip_frames_total", msg_type=constants.DF_GALILEO_EPH).value, 1)
+        self.assertEqual(registry.counter("ntrip_ephemeris_updates_total", prn=1).value, 1)
+        self.assertEqual(registry.histogram("ntrip_decode_time_seconds").count, 1)
+        self.assertEqual(registry.meter("ntrip_bytes_per_second").total, 9)
+        self.assertGreaterEqual(client.get_ephemeris_age(1), 0)
+
+    @patch("galileo_reference_tree.ntripclient.NtripClient.connect_to_server")
+    def test_get_ephemeris_loop_skips_crc_failure(self, mock_connect_to_server):
+        # Prepare
+        registry = metrics.MetricsRegistry()
+        client = NtripClient(self.ephem, self.ntrip_config, registry)
+        frame = b"\xd3\x00\x02\x41\xe0"
+        frame += pyrtcm.calc_crc24q(frame).to_bytes(3, "big")
+
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(frame[:-1] + b"\x00" + frame)
+            reader.feed_eof()
+            await client.get_ephemeris_loop(reader)
+
+        # Execute
+        asyncio.run(read())
+
+        # Verify (the corrupted frame is counted and skipped, the next one is parsed)
+        self.assertEqual(registry.counter("ntrip_crc_failures_total").value, 1)
+        self.assertEqual(registry.histogram("ntrip_decode_time_seconds").count, 1)
+
+    @patch("galileo_reference_tree.ntripclient.NtripClient.connect_to_server")
+    def test_handle_reader_error(self, mock_connect_to_server):
+        # Prepare
+        registry = metrics.MetricsRegistry()
+        client = NtripClient(self.ephem, self.ntrip_config, registry)
+
+        # Execute
+        client.handle_reader_error(pyrtcm.RTCMParseError("RTCM3 message invalid - failed CRC: b'\\x00'"))
+        client.handle_reader_error(pyrtcm.RTCMParseError("Unknown protocol header b'\\xd3\\xff'."))
+
+        # Verify
+        self.assertEqual(registry.counter("ntrip_crc_failures_total").value, 1)
+        self.assertEqual(registry.counter("ntrip_parse_errors_total").value, 1)
+
+    def test_metered_stream(self):
+        # Prepare
+        mock_socket = MagicMock()
+        mock_socket.recv.side_effect = [b"\xd3\x00\x01", b""]
+        meter = metrics.Meter()
+
+        # Execute
+        stream = MeteredStream(mock_socket, meter)
+        data = stream.read(2)
+
+        # Verify
+        self.assertEqual(data, b"\xd3\x00")
+        self.assertEqual(meter.total, 2)
+
     @patch("socket.create_connection")
     def test_connect_to_server_with_socket_error(self, mock_create_connection):
         # Prepare
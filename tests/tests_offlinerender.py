@@ -0,0 +1,112 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import csv
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from skyfield.api import EarthSatellite, load
+
+from galileo_reference_tree.config import General, GeneralLEDSettings, LEDs, NetworkLEDSettings, Render, \
+    SatellitesLEDSettings
+from galileo_reference_tree.offlinerender import *
+from galileo_reference_tree.skyplot import SkyPlot
+
+MOCK_TLE = """OBJECT_NAME,OBJECT_ID,EPOCH,MEAN_MOTION,ECCENTRICITY,INCLINATION,RA_OF_ASC_NODE,ARG_OF_PERICENTER,MEAN_ANOMALY,EPHEMERIS_TYPE,CLASSIFICATION_TYPE,NORAD_CAT_ID,ELEMENT_SET_NO,REV_AT_EPOCH,BSTAR,MEAN_MOTION_DOT,MEAN_MOTION_DDOT
+GSAT0211 (GALILEO 14),2016-030A,2024-12-15T22:14:03.283296,1.70473113,.0003845,55.2859,236.7768,4.5714,355.5270,0,U,41549,999,5330,0,.28E-6,0"""
+
+
+def set_mock_tle(ephemeris):
+    fields = next(csv.DictReader(io.StringIO(MOCK_TLE)))
+    ephemeris[1].tle = EarthSatellite.from_omm(load.timescale(), fields)
+
+
+class TestOfflineRender(unittest.TestCase):
+    def test_split_frames(self):
+        # Execute and verify (contiguous slices covering all frames, without empty slices)
+        self.assertEqual(split_frames(10, 3), [(0, 3), (3, 7), (7, 10)])
+        self.assertEqual(split_frames(2, 4), [(0, 1), (1, 2)])
+
+    def test_get_trail_frames(self):
+        # Execute and verify (a sample every frame for long steps, and every few frames for short steps)
+        np.testing.assert_array_equal(get_trail_frames(5, 60.0, 4), [2, 3, 4])
+        np.testing.assert_array_equal(get_trail_frames(0, 60.0, 4), [-3, -2, -1])
+        np.testing.assert_array_equal(get_trail_frames(5, 20.0, 4), [0, 2, 4])
+        np.testing.assert_array_equal(get_trail_frames(6, 20.0, 4), [0, 2, 4])
+        self.assertEqual(len(get_trail_frames(5, 60.0, 0)), 0)
+
+    def test_propagate_frames(self):
+        # Prepare
+        ephemeris = [SatEphemeris() for _ in range(3)]
+        set_mock_tle(ephemeris)
+        location = Location(latitude_deg=52.0, longitude_deg=4.0, altitude_m=0.0)
+        gps_times = Time(datetime.datetime(2024, 12, 16, tzinfo=datetime.UTC), format='datetime').to_value('gps') + \
+            np.array([0, 600])
+
+        # Execute
+        azelev, arglat = propagate_frames(ephemeris, location, gps_times)
+
+        # Verify (the same as propagating to every time separately, and nothing for satellites without data)
+        wn = floor(gps_times[0] / constants.SEC_IN_WEEK)
+        for idx, gps_time in enumerate(gps_times):
+            tow = gps_time - wn * constants.SEC_IN_WEEK
+            az, elev, r = ecef2aer(*ephemeris[1].propagate(wn, tow), 52.0, 4.0, 0.0)
+            self.assertAlmostEqual(azelev[1, idx, 0], az, places=3)
+            self.assertAlmostEqual(azelev[1, idx, 1], elev, places=3)
+            self.assertAlmostEqual(arglat[1, idx], ephemeris[1].get_argument_of_latitude(wn, tow))
+        self.assertTrue(np.all(np.isnan(azelev[[0, 2]])))
+
+    @patch('galileo_reference_tree.offlinerender.TwoLineElements')
+    def test_render_slice(self, mock_tle):
+        # Prepare
+        mock_tle.return_value.set_tle.side_effect = set_mock_tle
+        with tempfile.TemporaryDirectory() as tempdir:
+            config = Config(general=General(location=Location(latitude_deg=52.0, longitude_deg=4.0),
+                                            trail_minutes=2.0),
+                            leds=LEDs(general=GeneralLEDSettings(led_count=70), satellites=SatellitesLEDSettings(),
+                                      network=NetworkLEDSettings()),
+                            render=Render(step=60.0, output_dir=tempdir))
+            start = datetime.datetime(2024, 12, 16, tzinfo=datetime.UTC)
+
+            sample_times = []
+            update_tracks = SkyPlot.update_tracks
+
+            def record_tracks(plot, coords, predicted, now):
+                changed = update_tracks(plot, coords, predicted, now)
+                sample_times.append(plot.trail_time)
+                return changed
+
+            # Execute (the second slice of a time range)
+            with patch.object(SkyPlot, 'update_tracks', record_tracks):
+                written = render_slice(config, start, 2, 4)
+
+            # Verify (the replayed trail samples continue on the grid of the frames)
+            self.assertEqual(written, 2)
+            np.testing.assert_allclose(np.diff(np.unique(sample_times)), 60.0)
+            self.assertAlmostEqual(max(sample_times), start.timestamp() + 3 * 60.0)
+            self.assertEqual(len(np.unique(sample_times)), 6)
+            self.assertEqual(sorted(os.listdir(tempdir)), ['leds_000002.png', 'leds_000003.png',
+                                                           'skyplot_000002.png', 'skyplot_000003.png'])
+
+
+    @patch('galileo_reference_tree.offlinerender.TwoLineElements')
+    def test_render_offline_without_frames(self, mock_tle):
+        # Prepare
+        with tempfile.TemporaryDirectory() as tempdir:
+            config = Config(render=Render(duration_hours=0.001, step=60.0, output_dir=tempdir))
+
+            # Execute and verify (nothing to render instead of a pool without workers)
+            with self.assertWarns(UserWarning):
+                self.assertEqual(render_offline(config), 0)
+            with self.assertRaises(ValueError):
+                render_offline(Config(render=Render(step=0.0, output_dir=tempdir)))
+        mock_tle.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,24 +17,15 @@ class TestLedPlot(unittest.TestCase):
         self.mock_strip.numPixels.return_value = 100  # Example: 100 LEDs
         self.mock_strip.getBrightness.return_value = 255
 
-        # Mock the getPixelColorRGB method by mocking an RGB class
-        class MockRGB:
-            def __init__(self, r, g, b):
-                self.r = r
-                self.g = g
-                self.b = b
-
-        # Mock the getPixelColorRGB function to return red and blue alternating
-        self.mock_strip.getPixelColorRGB.side_effect = \
-            lambda idx: MockRGB(255, 0, 0) if idx % 2 == 0 else MockRGB(0, 0, 255)
+        # Mock the snapshot of the strip to return red and blue alternating
+        self.mock_strip.get_pixels.return_value = np.array([0xff0000, 0x0000ff] * 50, dtype=np.uint32)
 
         self.led_plot = LedPlot(width=10, strip=self.mock_strip)
 
-    @patch("matplotlib.pyplot.plot")
     @patch("matplotlib.pyplot.subplots")
-    def test_initialization(self, mock_subplots, mock_plot):
+    def test_initialization(self, mock_subplots):
         # Prepare
-        # Mock subplots and plot to avoid real plotting
+        # Mock subplots to avoid real plotting
         mock_ax = MagicMock()
         mock_fig = MagicMock()
         mock_subplots.return_value = (mock_fig, mock_ax)
@@ -48,33 +39,66 @@ class TestLedPlot(unittest.TestCase):
         self.assertEqual(led_plot.numleds, 100)
         self.assertEqual(led_plot.height, 10)
 
-        # Check annotation and plot initialization
+        # Check annotation and plot initialization (a single collection for all LEDs)
         self.assertEqual(len(led_plot.annot), 100)
-        self.assertEqual(len(led_plot.leds_plot), 100)
-        mock_plot.assert_called()
+        mock_ax.scatter.assert_called_once()
+        self.assertEqual(len(mock_ax.scatter.call_args[0][0]), 100)
+        mock_fig.canvas.mpl_connect.assert_called_once_with('draw_event', led_plot.on_draw)
 
-    @patch("matplotlib.lines.Line2D.set_color")
-    def test_update_plot(self, mock_set_color):
+    @patch("matplotlib.pyplot.show")
+    def test_update_plot(self, mock_show):
         # Execute
         self.led_plot.update_plot()
 
         # Verify
-        # Check that the plot updates for each LED
-        self.assertEqual(mock_set_color.call_count, self.mock_strip.numPixels())
+        # Check that the strip is read in one snapshot
+        self.mock_strip.get_pixels.assert_called_once()
+        self.mock_strip.getPixelColorRGB.assert_not_called()
 
         # Ensure colors are set correctly for even and odd LEDs
-        expected_calls = [
-                             [1, 0, 0, 1],  # Bright red
-                             [0, 0, 1, 1]  # Bright blue
-                         ] * (self.mock_strip.numPixels() // 2)
-        actual_calls = [call[0] for call in mock_set_color.call_args_list]
-        rgb_alpha_values = [call[1] for call in actual_calls]
-        self.assertListEqual(rgb_alpha_values, expected_calls)
+        expected_colors = [
+                              [1, 0, 0, 1],  # Bright red
+                              [0, 0, 1, 1]  # Bright blue
+                          ] * (self.mock_strip.numPixels() // 2)
+        self.assertEqual(self.led_plot.leds_plot.get_facecolor().tolist(), expected_colors)
+        self.assertIsNotNone(self.led_plot.background)
 
         # Verify the plot title
-        updated_title = self.led_plot.ax.get_title()
+        updated_title = self.led_plot.title.get_text()
         self.assertIn('Latest update', updated_title)
 
+    def test_get_led_colors(self):
+        # Prepare (a dimmed orange, an off LED and a full white LED at half the strip brightness)
+        self.mock_strip.getBrightness.return_value = 127.5
+        pixels = np.array([0x7f5300, 0, 0xffffff], dtype=np.uint32)
+
+        # Execute
+        found_colors = self.led_plot.get_led_colors(pixels)
+
+        # Verify (the brightest channel is scaled to 1, the brightness is shown through the transparency)
+        np.testing.assert_array_almost_equal(found_colors, [[1, 0x53 / 0x7f, 0, 0x7f / 255 / 2],
+                                                            [0, 0, 0, 1],
+                                                            [1, 1, 1, 0.5]])
+
+    @patch("matplotlib.pyplot.show")
+    def test_update_plot_skips_unchanged_frames(self, mock_show):
+        # Prepare
+        with patch('galileo_reference_tree.plotleds.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value.strftime.return_value = '2024/12/15 - 12:30:00'
+            self.led_plot.update_plot()
+
+            # Execute
+            with patch.object(self.led_plot.leds_plot, 'set_color') as mock_set_color:
+                self.led_plot.update_plot()
+                unchanged_updates = mock_set_color.call_count
+                self.mock_strip.get_pixels.return_value = np.zeros(100, dtype=np.uint32)
+                self.led_plot.update_plot()
+                changed_updates = mock_set_color.call_count - unchanged_updates
+
+        # Verify
+        self.assertEqual(unchanged_updates, 0)
+        self.assertEqual(changed_updates, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,131 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import multiprocessing
+import unittest
+from unittest.mock import MagicMock, patch
+
+from galileo_reference_tree.ledbackends import VirtualBackend
+from galileo_reference_tree.plotprocess import *
+
+
+def read_in_child(name, queue):
+    state = SharedState(3, 4, name=name)
+    snapshot = state.read()
+    queue.put((snapshot.azelev.tolist(), snapshot.pixels.tolist()))
+    state.close()
+
+
+class TestSharedState(unittest.TestCase):
+    def setUp(self):
+        self.state = SharedState(3, 4)
+
+    def tearDown(self):
+        self.state.close()
+        self.state.unlink()
+
+    def test_initial_state(self):
+        # Execute
+        snapshot = self.state.read()
+
+        # Verify (nothing propagated yet and the health unknown)
+        self.assertEqual(snapshot.sequence, 0)
+        self.assertTrue(np.all(np.isnan(snapshot.azelev)))
+        self.assertEqual(snapshot.health.tolist(), [-1, -1, -1])
+
+    def test_publish(self):
+        # Prepare
+        ephemeris = [MagicMock(signalHealth=health) for health in [0, -1, 1]]
+        azelev = [[10, 20], [], [30, -5]]
+        ledstrip = VirtualBackend(4)
+        ledstrip.set_pixels(np.array([1, 3]), np.array([0xff0000, 0x00ff00]))
+        ledstrip.show()
+
+        # Execute
+        self.state.publish(ephemeris, azelev, ledstrip)
+        snapshot = self.state.read()
+
+        # Verify (a completed snapshot has an even sequence number)
+        self.assertEqual(snapshot.sequence, 2)
+        np.testing.assert_array_equal(snapshot.azelev, [[10, 20], [np.nan, np.nan], [30, -5]])
+        self.assertEqual(snapshot.health.tolist(), [0, -1, 1])
+        self.assertEqual(snapshot.pixels.tolist(), [0, 0xff0000, 0, 0x00ff00])
+        self.assertEqual(snapshot.brightness, 255)
+
+    def test_predictions(self):
+        # Prepare
+        state = SharedState(3, 4, prediction_length=2)
+        predicted = np.arange(12, dtype=float).reshape(3, 2, 2)
+
+        # Execute (the predictions are left unchanged when not given)
+        state.write(np.zeros((3, 2)), [0, 0, 0], np.zeros(4), 255, predicted)
+        state.write(np.ones((3, 2)), [0, 0, 0], np.zeros(4), 255)
+        snapshot = state.read()
+        state.close()
+        state.unlink()
+
+        # Verify
+        np.testing.assert_array_equal(snapshot.azelev, np.ones((3, 2)))
+        np.testing.assert_array_equal(snapshot.predicted, predicted)
+
+    def test_get_track_length(self):
+        # Execute and verify (a sample every 30 seconds, including the start of the track)
+        self.assertEqual(get_track_length(0), 0)
+        self.assertEqual(get_track_length(15), 31)
+
+    def test_read_during_write(self):
+        # Prepare (a writer which is halfway a snapshot)
+        self.state.sequence[0] = 1
+
+        # Execute
+        snapshot = self.state.read(retries=3)
+
+        # Verify
+        self.assertIsNone(snapshot)
+
+    @patch('galileo_reference_tree.plotprocess.time.sleep')
+    def test_wait_read_during_write(self, mock_sleep):
+        # Prepare (a writer which finishes its snapshot while the reader waits)
+        self.state.sequence[0] = 1
+        mock_sleep.side_effect = lambda interval: self.state.sequence.__setitem__(0, 2) if interval else None
+
+        # Execute
+        snapshot = self.state.wait_read()
+
+        # Verify
+        self.assertEqual(snapshot.sequence, 2)
+        mock_sleep.assert_any_call(constants.PLOTTING_INTERVAL)
+
+    def test_read_from_other_process(self):
+        # Prepare
+        self.state.write(np.array([[1, 2], [3, 4], [5, 6]]), [0, 0, 0], np.array([7, 8, 9, 10]), 255)
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+
+        # Execute
+        process = context.Process(target=read_in_child, args=(self.state.name, queue))
+        process.start()
+        azelev, pixels = queue.get(timeout=60)
+        process.join(timeout=60)
+
+        # Verify
+        self.assertEqual(azelev, [[1, 2], [3, 4], [5, 6]])
+        self.assertEqual(pixels, [7, 8, 9, 10])
+
+    def test_snapshot_strip(self):
+        # Prepare
+        self.state.write(np.zeros((3, 2)), [0, 0, 0], np.array([7, 8, 9, 10]), 127)
+
+        # Execute
+        strip = SnapshotStrip(self.state.read())
+
+        # Verify
+        self.assertEqual(strip.numPixels(), 4)
+        self.assertEqual(strip.get_pixels().tolist(), [7, 8, 9, 10])
+        self.assertEqual(strip.getBrightness(), 127)
+
+
+if __name__ == '__main__':
+    unittest.main()
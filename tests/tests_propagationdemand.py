@@ -0,0 +1,134 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import unittest
+
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.propagationdemand import *
+from galileo_reference_tree.statehub import StateHub, TOPIC_DEMAND
+
+
+class TestPropagationDemand(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.hub = StateHub(self.registry)
+        self.demand = PropagationDemand(5, self.registry, self.hub)
+
+    def test_union_of_demands(self):
+        # Execute
+        self.demand.declare('leds', [0, 1], 1.0)
+        self.demand.declare('skyplot', range(4), 10.0)
+
+        # Verify (only the union is demanded, each satellite at the shortest interval requested for it)
+        self.assertEqual(self.demand.intervals.tolist(), [1.0, 1.0, 10.0, 10.0, np.inf])
+        self.assertEqual(self.demand.get_due(0).tolist(), [0, 1, 2, 3])
+        self.assertEqual(self.registry.gauge("propagation_demanded_satellites").sample(), 4)
+        self.assertEqual(self.hub.get_version(TOPIC_DEMAND), 2)
+
+    def test_withdraw(self):
+        # Prepare
+        self.demand.declare('leds', [0, 1], 1.0)
+        self.demand.declare('skyplot', range(4), 10.0)
+        self.demand.mark_propagated(np.arange(4), 0)
+
+        # Execute
+        self.demand.withdraw('leds')
+        self.demand.withdraw('unknown')
+
+        # Verify (the remaining demand applies, without publishing the withdrawal of the unknown consumer)
+        self.assertEqual(self.demand.intervals.tolist(), [10.0, 10.0, 10.0, 10.0, np.inf])
+        self.assertEqual(self.hub.get_version(TOPIC_DEMAND), 3)
+
+    def test_schedule(self):
+        # Prepare
+        self.demand.declare('leds', [0], 1.0)
+        self.demand.declare('skyplot', [0, 1], 10.0)
+
+        # Execute
+        self.demand.mark_propagated(self.demand.get_due(100.0), 100.0)
+        due_soon = self.demand.get_due(100.5)
+        due_next = self.demand.get_due(101.0)
+        self.demand.mark_propagated(due_next, 101.2)
+        next_due = self.demand.get_next_due()
+
+        # Verify (every satellite at its own interval, with deadlines which do not drift)
+        self.assertEqual(due_soon.tolist(), [])
+        self.assertEqual(due_next.tolist(), [0])
+        self.assertEqual(next_due, 102.0)
+        self.assertEqual(self.demand.next_due[1], 110.0)
+        self.assertEqual(self.demand.propagations.value, 3)
+
+    def test_invalidate(self):
+        # Prepare
+        self.demand.declare('leds', [0, 1], 1.0)
+        self.demand.mark_propagated(np.array([0, 1]), 100.0)
+
+        # Execute
+        self.demand.invalidate()
+
+        # Verify
+        self.assertEqual(self.demand.get_due(100.0).tolist(), [0, 1])
+
+    def test_adaptive_interval(self):
+        # Prepare (a satellite rising 0.01 degrees per second, which the consumer needs again after 5 degrees)
+        get_delays = lambda sat_indices, azelev, rates: (45 - azelev[:, 1]) / rates[:, 1]
+        self.demand.declare('leds', [0, 1], 1.0, 60.0, get_delays)
+        self.demand.mark_propagated(np.array([0, 1]), 100.0, [[10, 40], [10, 40]])
+        first_due = self.demand.next_due.tolist()[:2]
+
+        # Execute
+        self.demand.mark_propagated(np.array([0, 1]), 101.0, [[10, 40.01], [10, 40.9]])
+
+        # Verify (the minimum interval while the rate is unknown, then the estimate capped by the maximum interval)
+        self.assertEqual(first_due, [101.0, 101.0])
+        np.testing.assert_array_almost_equal(self.demand.rates[:2], [[0, 0.01], [0, 0.9]])
+        np.testing.assert_array_almost_equal(self.demand.next_due[:2], [161.0, 101.0 + 4.1 / 0.9])
+
+    def test_shorter_interval_due_early(self):
+        # Prepare
+        self.demand.declare('leds', [0], 1.0, 60.0, lambda sat_indices, azelev, rates: np.full(len(sat_indices), 60))
+        self.demand.mark_propagated(np.array([0]), 100.0, [[10, 40]])
+        self.demand.mark_propagated(np.array([0]), 101.0, [[10, 40.01]])
+
+        # Execute
+        self.demand.declare('dashboard', [0], 10.0)
+
+        # Verify (due one interval of the new consumer after the last propagation, instead of after the estimate)
+        self.assertEqual(self.demand.get_next_due(), 111.0)
+
+    def test_extrapolate(self):
+        # Prepare (a satellite rising 0.01 degrees per second and one crossing north, propagated once a minute)
+        self.demand.declare('leds', [0, 1, 2], 1.0, 60.0, lambda sat_indices, azelev, rates: np.full(len(sat_indices),
+                                                                                                     np.inf))
+        self.demand.mark_propagated(np.array([0, 1]), 100.0, [[10, 40], [358, 20]])
+        self.demand.mark_propagated(np.array([0, 1]), 101.0, [[10, 40.01], [359, 20]])
+
+        # Execute
+        at_propagation = self.demand.extrapolate(np.arange(3), 101.0)
+        halfway = self.demand.extrapolate(np.arange(3), 131.0)
+        overdue = self.demand.extrapolate(np.arange(3), 200.0)
+
+        # Verify (up to the next propagation, the shortest way around in azimuth, and NaN if never propagated)
+        np.testing.assert_array_almost_equal(at_propagation[:2], [[10, 40.01], [359, 20]])
+        np.testing.assert_array_almost_equal(halfway[:2], [[10, 40.31], [29, 20]])
+        np.testing.assert_array_almost_equal(overdue[:2], [[10, 40.61], [59, 20]])
+        self.assertTrue(np.all(np.isnan(overdue[2])))
+
+    def test_get_crossing_delays(self):
+        # Execute
+        found_delays = get_crossing_delays(np.array([1.0, 1.0, 1.0, 3.5, 0.0]), np.array([0.5, -2.0, 0, 1.0, -1.0]),
+                                           np.array([0.0, 2.0, 3.0]))
+
+        # Verify (towards the next boundary in the direction of movement, inf if there is none)
+        self.assertEqual(found_delays.tolist(), [2.0, 0.5, np.inf, np.inf, np.inf])
+
+    def test_no_demand(self):
+        # Execute and verify (nothing is due, ever)
+        self.assertEqual(self.demand.get_due(np.inf).tolist(), [])
+        self.assertEqual(self.demand.get_next_due(), np.inf)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import io
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from pyrtcm import RTCMMessage
+
+from galileo_reference_tree.config import Relay
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.rtcmrelay import *
+
+
+class TestRtcmRelay(unittest.TestCase):
+    def setUp(self):
+        # One of the received Galileo ephemeris messages, serialized to a complete RTCM3 frame
+        self.frame = RTCMMessage(
+            payload=b'A`\x94\xa4Kk\xd5\xa8.\xe0\x00\x01\x9e\x00\xbfZ\xa0\x1a\xa8}\xe8\xd5B\xda\xd8\x13\x94\x00\xf5&`f\x92\xa8\x13\xfd\x10.\xef\xfe\xc6\xc9\xb3P\xbf\xfd\xc2u35\x90\xa6Q\x99\x93\xc8\xef\xfc~\xdf\xbb\xed\x00').serialize()
+        self.registry = MetricsRegistry()
+        self.relay_config = Relay(address='127.0.0.1', port=0, max_client_frames=2)
+
+    def test_get_message_type(self):
+        # Execute
+        found_type = get_message_type(self.frame)
+
+        # Verify
+        self.assertEqual(found_type, 1046)
+
+    def test_read_frames(self):
+        # Prepare
+        corrupt_frame = self.frame[:-1] + bytes([self.frame[-1] ^ 0xff])
+        stream = io.BytesIO(b'\x00\x01' + self.frame + corrupt_frame + self.frame + self.frame[:10])
+
+        # Execute
+        found_frames = list(read_frames(stream, self.registry))
+
+        # Verify (garbage skipped, corrupt frame counted, truncated frame at the end ignored)
+        self.assertEqual(found_frames, [self.frame, self.frame])
+        self.assertEqual(self.registry.counter("relay_crc_failures_total").value, 1)
+
+    def test_relay_client_drops_oldest_frames(self):
+        # Prepare
+        client = RelayClient(MagicMock(), 2, self.registry)
+
+        # Execute
+        for frame in [b'1', b'2', b'3']:
+            client.enqueue(frame)
+
+        # Verify
+        self.assertEqual(list(client.frames), [b'2', b'3'])
+        self.assertEqual(self.registry.counter("relay_frames_dropped_total").value, 1)
+
+    def test_forward_filters_message_types(self):
+        # Prepare
+        relay = RtcmRelay(MagicMock(), self.relay_config, self.registry)
+        client = RelayClient(MagicMock(), 2, self.registry)
+        closed_client = RelayClient(MagicMock(), 2, self.registry)
+        closed_client.closed = True
+        relay.clients = [client, closed_client]
+        msm_frame = bytes([0xd3, 0x00, 0x02, 0x44, 0x70])  # Header of a message of type 1095 (Galileo MSM5)
+
+        # Execute
+        relay.forward(self.frame)
+        relay.forward(msm_frame)
+
+        # Verify
+        self.assertEqual(list(client.frames), [self.frame])
+        self.assertEqual(relay.clients, [client])
+
+    def start_relay(self):
+        relay = RtcmRelay(MagicMock(), self.relay_config, self.registry)
+        relay.listen()
+        self.addCleanup(relay.server.close)
+        threading.Thread(target=relay.accept_loop, daemon=True).start()
+        return relay
+
+    def connect(self, relay):
+        local_client = socket.create_connection(relay.server.getsockname(), timeout=5)
+        self.addCleanup(local_client.close)
+        return local_client
+
+    def wait_for_clients(self, relay, count):
+        deadline = time.monotonic() + 5
+        while len(relay.clients) < count:
+            self.assertLess(time.monotonic(), deadline, "Local client was not accepted")
+            time.sleep(0.01)
+
+    def test_relay_to_local_client(self):
+        # Prepare
+        relay = self.start_relay()
+        local_client = self.connect(relay)
+        upstream, upstream_peer = socket.socketpair()
+        self.addCleanup(upstream.close)
+
+        # Execute
+        local_client.sendall(b"GET /RELAY HTTP/1.1\r\n\r\n")
+        response = local_client.recv(len(CONNECTION_RESPONSE))
+        self.wait_for_clients(relay, 1)
+        upstream_peer.sendall(self.frame)
+        upstream_peer.close()
+        relay.relay_loop(upstream)
+        received = b''
+        while len(received) < len(self.frame):
+            received += local_client.recv(4096)
+
+        # Verify
+        self.assertEqual(response, CONNECTION_RESPONSE)
+        self.assertEqual(received, self.frame)
+
+        # Clean up
+        for client in relay.clients:
+            client.close()
+
+    def test_idle_client_does_not_block_others(self):
+        # Prepare (a client which connects but never sends its request)
+        relay = self.start_relay()
+        self.connect(relay)
+        local_client = self.connect(relay)
+
+        # Execute
+        local_client.sendall(b"GET /RELAY HTTP/1.1\r\n\r\n")
+        response = local_client.recv(len(CONNECTION_RESPONSE))
+
+        # Verify (answered well within the handshake timeout of the idle client)
+        self.assertEqual(response, CONNECTION_RESPONSE)
+        self.wait_for_clients(relay, 1)
+
+        # Clean up
+        for client in relay.clients:
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.runtime import *
+
+
+class TestRuntime(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.runtime = Runtime(self.registry)
+        self.cleaned_up = []
+
+    async def run_forever(self, name):
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self.cleaned_up.append(name)
+
+    async def fail(self):
+        await asyncio.sleep(0.01)
+        raise ValueError("Task failed")
+
+    async def use_hardware(self):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.runtime.hardware_executor, threading.current_thread)
+
+    def test_failure_cancels_all_tasks(self):
+        # Prepare
+        self.runtime.add_task('first', self.run_forever('first'))
+        self.runtime.add_task('second', self.run_forever('second'))
+        self.runtime.add_task('failing', self.fail())
+
+        # Execute and verify (the error of the failed task is raised once the others finished their cleanup)
+        with self.assertRaises(ValueError):
+            self.runtime.run()
+        self.assertEqual(sorted(self.cleaned_up), ['first', 'second'])
+        self.assertEqual(self.runtime.tasks, [])
+
+    def test_stop_on_signal(self):
+        # Prepare
+        self.runtime.add_task('first', self.run_forever('first'))
+        threading.Timer(0.05, os.kill, args=[os.getpid(), signal.SIGTERM]).start()
+
+        # Execute
+        self.runtime.run()
+
+        # Verify (stopped cleanly, with the default signal handling restored)
+        self.assertEqual(self.cleaned_up, ['first'])
+        self.assertEqual(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+
+    @patch('asyncio.SelectorEventLoop.add_signal_handler', side_effect=NotImplementedError)
+    def test_stop_on_signal_without_loop_support(self, mock_add_signal_handler):
+        # Prepare (an event loop without signal handlers, as on Windows)
+        self.runtime.add_task('first', self.run_forever('first'))
+        threading.Timer(0.05, os.kill, args=[os.getpid(), signal.SIGTERM]).start()
+
+        # Execute
+        self.runtime.run()
+
+        # Verify (stopped cleanly through the signal module, with the default signal handling restored)
+        mock_add_signal_handler.assert_called_once()
+        self.assertEqual(self.cleaned_up, ['first'])
+        self.assertEqual(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+        self.assertEqual(signal.getsignal(signal.SIGINT), signal.default_int_handler)
+
+    @patch('galileo_reference_tree.runtime.constants.LOOP_LAG_INTERVAL', 0.01)
+    def test_finished_task_does_not_stop_others(self):
+        # Prepare
+        async def stop_later():
+            await asyncio.sleep(0.1)
+            self.runtime.stop()
+
+        hardware_thread = []
+
+        async def use_hardware():
+            hardware_thread.append(await self.use_hardware())
+
+        self.runtime.add_task('hardware', use_hardware())
+        self.runtime.add_task('first', self.run_forever('first'))
+        self.runtime.add_task('stop', stop_later())
+
+        # Execute
+        self.runtime.run()
+
+        # Verify (the blocking call ran in the hardware thread, and the scheduling latency was sampled meanwhile)
+        self.assertEqual(self.cleaned_up, ['first'])
+        self.assertTrue(hardware_thread[0].name.startswith('hardware'))
+        self.assertGreater(self.runtime.loop_lag.count, 0)
+        self.assertIn('Event loop lag', self.runtime.timing_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,14 +5,16 @@
 
 import io
 import unittest
-from math import pi
+from math import pi, sqrt, sin, radians
 from unittest.mock import patch
 
+import numpy as np
+
 from pyrtcm import RTCMMessage
 
 from galileo_reference_tree import constants
 from galileo_reference_tree.satephemeris import SatEphemeris, correct_wn_for_rollover
-from galileo_reference_tree.twolineelements import TwoLineElements
+from galileo_reference_tree.twolineelements import TwoLineElements, TLE_FILENAME
 
 
 class TestSatEphemeris(unittest.TestCase):
@@ -98,7 +100,9 @@ class TestSatEphemeris(unittest.TestCase):
 
     @patch('galileo_reference_tree.twolineelements.requests.get')
     @patch('galileo_reference_tree.twolineelements.load.open')
-    def test_propagate_tle(self, mock_open_file, mock_requests_get):
+    @patch('galileo_reference_tree.twolineelements.load.exists', side_effect=lambda name: name == TLE_FILENAME)
+    @patch('galileo_reference_tree.twolineelements.save_tle_cache')
+    def test_propagate_tle(self, mock_save_tle_cache, mock_exists, mock_open_file, mock_requests_get):
         # Prepare
         # Mocking TLE object is complex. As the TLE loader is already covered by another UT, it can be used here instead
         mock_tle = """OBJECT_NAME,OBJECT_ID,EPOCH,MEAN_MOTION,ECCENTRICITY,INCLINATION,RA_OF_ASC_NODE,ARG_OF_PERICENTER,MEAN_ANOMALY,EPHEMERIS_TYPE,CLASSIFICATION_TYPE,NORAD_CAT_ID,ELEMENT_SET_NO,REV_AT_EPOCH,BSTAR,MEAN_MOTION_DOT,MEAN_MOTION_DDOT
@@ -128,11 +132,52 @@ GSAT0211 (GALILEO 14),2016-030A,2024-12-15T22:14:03.283296,1.70473113,.0003845,5
         # Execute, by propagating both the TLE and the ephemeris
         x, y, z = sat_ephemeris[1].propagate_ephemeris(sat_ephemeris[1].toe + 600)
         x_tle, y_tle, z_tle = sat_ephemeris[1].propagate_tle(sat_ephemeris[1].wn, sat_ephemeris[1].toe + 600)
+        wn = sat_ephemeris[1].wn
+        sat_ephemeris[1].wn = 0  # Without a week number, the TLE is used
+        x_batch, y_batch, z_batch = sat_ephemeris[1].propagate_batch(wn, sat_ephemeris[1].toe + np.array([0, 600]))
+        sat_ephemeris[1].wn = wn
+        wn = sat_ephemeris[1].wn
+        arglat = sat_ephemeris[1].get_argument_of_latitude(wn, sat_ephemeris[1].toe + 600)
+        sat_ephemeris[1].wn = 0  # Without a week number, the TLE is used
+        arglat_tle = sat_ephemeris[1].get_argument_of_latitude(wn, sat_ephemeris[1].toe + 600)
 
         # Verify, with a margin of 5km due to TLE inaccuracy
         self.assertAlmostEqual(x, x_tle, delta=5e3)
         self.assertAlmostEqual(y, y_tle, delta=5e3)
         self.assertAlmostEqual(z, z_tle, delta=5e3)
+        self.assertAlmostEqual(x_batch[1], x_tle, delta=1)  # The vectorized TLE propagation gives the same result
+        self.assertAlmostEqual(y_batch[1], y_tle, delta=1)
+        self.assertAlmostEqual(z_batch[1], z_tle, delta=1)
+        self.assertAlmostEqual(arglat, arglat_tle, delta=0.5)  # The TLE gives the mean argument of latitude
+
+    def test_propagate_batch(self):
+        # Prepare
+        sat_ephemeris = SatEphemeris()
+        sat_ephemeris.map_to_ephemeris(self.rtcm)
+        tows = sat_ephemeris.toe + np.array([0, 600])
+
+        # Execute
+        x, y, z = sat_ephemeris.propagate_batch(sat_ephemeris.wn, tows)
+
+        # Verify (the same as propagating to every time separately)
+        for idx, tow in enumerate(tows):
+            expected_x, expected_y, expected_z = sat_ephemeris.propagate(sat_ephemeris.wn, tow)
+            self.assertAlmostEqual(x[idx], expected_x)
+            self.assertAlmostEqual(y[idx], expected_y)
+            self.assertAlmostEqual(z[idx], expected_z)
+
+    def test_get_argument_of_latitude(self):
+        # Prepare
+        sat_ephemeris = SatEphemeris()
+        sat_ephemeris.map_to_ephemeris(self.rtcm)
+        x, y, z = sat_ephemeris.propagate(sat_ephemeris.wn, sat_ephemeris.toe)
+        radius = sqrt(x ** 2 + y ** 2 + z ** 2)
+
+        # Execute
+        found_arglat = sat_ephemeris.get_argument_of_latitude(sat_ephemeris.wn, sat_ephemeris.toe)
+
+        # Verify (the height above the equator follows from the argument of latitude and the inclination)
+        self.assertAlmostEqual(radius * sin(radians(found_arglat)) * sin(sat_ephemeris.i0), z, delta=1e3)
 
     @patch("astropy.time.Time.to_value")
     def test_get_time_with_rollover(self, mock_to_value):
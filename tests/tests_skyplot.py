@@ -4,11 +4,38 @@
 #  For details, see the LICENSE file in the project root.
 
 import unittest
+from math import pi
 from unittest.mock import patch, MagicMock
 
+from matplotlib.colors import to_hex
+
 from galileo_reference_tree.skyplot import *
 
 
+class TestTrackBuffer(unittest.TestCase):
+    def test_ring_buffer(self):
+        # Prepare
+        buffer = TrackBuffer(2, 3)
+
+        # Execute (four samples in a buffer of three)
+        for sample in range(4):
+            buffer.append(np.array([[sample, 10], [sample, 20]]))
+        tracks = buffer.get_tracks()
+
+        # Verify (the oldest sample is overwritten, the rest is ordered from old to new)
+        self.assertEqual(buffer.points.shape, (2, 3, 2))
+        np.testing.assert_array_equal(tracks[0], [[1, 10], [2, 10], [3, 10]])
+        np.testing.assert_array_equal(tracks[1], [[1, 20], [2, 20], [3, 20]])
+
+    def test_to_polar(self):
+        # Execute
+        polar = to_polar(np.array([[90, 45], [180, -5], [np.nan, np.nan]]))
+
+        # Verify (below the horizon and unknown positions are not drawn)
+        np.testing.assert_array_almost_equal(polar[0], [pi / 2, 45])
+        self.assertTrue(np.all(np.isnan(polar[1:])))
+
+
 class TestSkyPlot(unittest.TestCase):
 
     @patch('matplotlib.pyplot.subplots')
@@ -24,7 +51,8 @@ class TestSkyPlot(unittest.TestCase):
         # Test that max_sats, annot, and sats_plot are initialized correctly
         self.assertEqual(plot.max_sats, max_sats)
         self.assertEqual(len(plot.annot), max_sats)
-        self.assertEqual(len(plot.sats_plot), max_sats)
+        mock_ax.scatter.assert_called_once()
+        self.assertEqual(plot.sats_plot, mock_ax.scatter.return_value)
 
         # Check that the polar plot setup is correct
         mock_subplots.assert_called_once_with(subplot_kw={'projection': 'polar'})
@@ -33,35 +61,32 @@ class TestSkyPlot(unittest.TestCase):
         mock_ax.set_ylim.assert_called_with([90, 0])
         mock_ax.set_yticks.assert_called_with([0, 15, 30, 45, 60, 90])
 
-        # Check that the annotation and satellite plot setup loop works correctly
-        for satIdx in range(max_sats):
-            self.assertEqual(len(plot.sats_plot[satIdx]), 1)
-            self.assertEqual(plot.sats_plot[satIdx][0]._color, 'green')
+        # Check that the background is cached on every full redraw
+        mock_fig.canvas.mpl_connect.assert_called_once_with('draw_event', plot.on_draw)
 
         # Ensure ion is called to enable interactive mode
         mock_ion.assert_called_once()
 
-    @patch('matplotlib.pyplot.draw')
-    @patch('matplotlib.pyplot.pause')
     @patch('matplotlib.pyplot.show')
-    def test_update_plot(self, mock_show, mock_pause, mock_draw):
+    def test_update_plot(self, mock_show):
         # Prepare
-        max_sats = 4
+        max_sats = 5
         plot = SkyPlot(max_sats)
-        default_coords = (-5, -5)
 
         # Mock data for ephemeris and azelev
         ephemeris = [
             MagicMock(signalHealth=0),
             MagicMock(signalHealth=1),
             MagicMock(signalHealth=0),
-            MagicMock(signalHealth=-1)
+            MagicMock(signalHealth=-1),
+            MagicMock(signalHealth=0)
         ]
         azelev = [
             [45, 20],  # Azimuth 45, Elevation 20
             [90, 15],  # Azimuth 90, Elevation 15
             [180, -10],  # Azimuth 180, Elevation -10 (should not be plotted)
-            [0, 0]  # Azimuth 0, Elevation 0
+            [0, 0],  # Azimuth 0, Elevation 0
+            []  # Not propagated yet (should not be plotted)
         ]
 
         # Execute
@@ -69,25 +94,67 @@ class TestSkyPlot(unittest.TestCase):
 
         # Verify
         mock_show.assert_called_once()
-        mock_draw.assert_called_once()
-        mock_pause.assert_called_once()
+        self.assertIsNotNone(plot.background)
 
-        # Check if the alpha values are set correctly
-        self.assertEqual(plot.sats_plot[0][0]._alpha, 1)  # Visible satellite
-        self.assertEqual(plot.sats_plot[1][0]._alpha, 1)  # Visible satellite
-        self.assertEqual(plot.sats_plot[2][0]._alpha, 0)  # Invisible satellite (below horizon)
+        # Check that the hidden satellites have no position
+        offsets = np.asarray(plot.sats_plot.get_offsets())
+        np.testing.assert_array_almost_equal(offsets[[0, 1, 3]], [[pi / 4, 20], [pi / 2, 15], [0, 0]])
+        self.assertTrue(np.all(np.isnan(offsets[[2, 4]])))
 
         # Check that the color of the satellite is set correctly based on signalHealth
-        self.assertEqual(plot.sats_plot[0][0]._color, 'green')  # Healthy satellite
-        self.assertEqual(plot.sats_plot[1][0]._color, 'red')  # Unhealthy satellite
-        self.assertEqual(plot.sats_plot[2][0]._color, 'green')  # Healthy satellite
-        self.assertEqual(plot.sats_plot[3][0]._color, 'orange')  # Unknown status satellite
+        colors = plot.sats_plot.get_facecolor()
+        self.assertEqual(to_hex(colors[0]), to_hex('green'))  # Healthy satellite
+        self.assertEqual(to_hex(colors[1]), to_hex('red'))  # Unhealthy satellite
+        self.assertEqual(to_hex(colors[3]), to_hex('orange'))  # Unknown status satellite
 
         # Check that the annotation is updated with the correct coordinates
-        self.assertEqual(plot.annot[0].xy, [azelev[0][0] / 180 * pi, azelev[0][1]])
-        self.assertEqual(plot.annot[1].xy, [azelev[1][0] / 180 * pi, azelev[1][1]])
-        self.assertEqual(plot.annot[2].xy, (default_coords[0], default_coords[1]))
-        self.assertEqual(plot.annot[3].xy, [azelev[3][0] / 180 * pi, azelev[3][1]])
+        self.assertEqual(plot.annot[0].get_position(), (azelev[0][0] / 180 * pi, azelev[0][1]))
+        self.assertEqual(plot.annot[1].get_position(), (azelev[1][0] / 180 * pi, azelev[1][1]))
+        self.assertEqual(plot.annot[3].get_position(), (azelev[3][0] / 180 * pi, azelev[3][1]))
+        self.assertEqual([annot.get_visible() for annot in plot.annot], [True, True, False, True, False])
+        self.assertIn('Latest update', plot.title.get_text())
+
+    @patch('matplotlib.pyplot.show')
+    def test_update_plot_redraws_moved_labels(self, mock_show):
+        # Prepare (with a fixed time, so the title does not change)
+        ephemeris = [MagicMock(signalHealth=0) for _ in range(2)]
+        plot = SkyPlot(2)
+        with patch('galileo_reference_tree.skyplot.datetime') as mock_datetime:
+            mock_datetime.datetime.now.return_value.strftime.return_value = '2024/12/15 - 12:30:00'
+            plot.update_plot(ephemeris, [[45, 20], [90, 15]])
+
+            # Execute (a small move of both satellites, followed by a larger move of the second satellite)
+            with patch.object(plot, 'draw_overlay', wraps=plot.draw_overlay) as mock_draw_overlay:
+                plot.update_plot(ephemeris, [[45.1, 20.1], [90.1, 15.1]])
+                small_move_draws = mock_draw_overlay.call_count
+                plot.update_plot(ephemeris, [[45.1, 20.1], [95, 15.1]])
+                large_move_draws = mock_draw_overlay.call_count - small_move_draws
+
+        # Verify
+        self.assertEqual(small_move_draws, 0)
+        self.assertEqual(large_move_draws, 1)
+        self.assertEqual(plot.annot[0].get_position(), (pi / 4, 20))
+        self.assertAlmostEqual(plot.annot[1].get_position()[0], np.radians(95))
+
+    @patch('matplotlib.pyplot.show')
+    @patch('galileo_reference_tree.skyplot.time.monotonic')
+    def test_update_tracks(self, mock_monotonic, mock_show):
+        # Prepare
+        plot = SkyPlot(2, trail_length=3)
+        health = np.zeros(2)
+        predicted = np.array([[[45, 20], [50, 25]], [[90, 15], [95, -1]]], dtype=float)
+
+        # Execute (the second update comes before the sample interval passed, the third after)
+        for now, azimuth in [(0, 45), (1, 46), (constants.TRACK_SAMPLE_INTERVAL, 47)]:
+            mock_monotonic.return_value = now
+            plot.update_satellites(np.array([[azimuth, 20], [90, 15]], dtype=float), health, predicted)
+
+        # Verify
+        trails = plot.trails.get_tracks()
+        np.testing.assert_array_equal(trails[0, 1:], [[45, 20], [47, 20]])
+        self.assertEqual(len(plot.trails_plot.get_segments()), 2)
+        np.testing.assert_array_equal(plot.predicted, predicted)
+        self.assertEqual(len(plot.predictions_plot.get_segments()), 2)
 
 
 if __name__ == '__main__':
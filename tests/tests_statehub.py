@@ -0,0 +1,100 @@
+#  Copyright (c) 2025, Aram Vroom.
+#
+#  This software is licensed under the MIT License.
+#  For details, see the LICENSE file in the project root.
+
+import asyncio
+import threading
+import time
+import unittest
+
+from galileo_reference_tree.metrics import MetricsRegistry
+from galileo_reference_tree.statehub import *
+
+
+class TestStateHub(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.hub = StateHub(self.registry)
+
+    def test_publish(self):
+        # Execute
+        self.hub.publish(TOPIC_AZELEV)
+        self.hub.publish(TOPIC_AZELEV)
+
+        # Verify
+        self.assertEqual(self.hub.get_version(TOPIC_AZELEV), 2)
+        self.assertEqual(self.hub.get_version(TOPIC_FRAME), 0)
+        self.assertEqual(self.registry.counter("state_updates_total", topic=TOPIC_AZELEV).value, 2)
+
+    def test_wait_for_published_topics(self):
+        # Prepare
+        subscription = self.hub.subscribe(TOPIC_EPHEMERIS, TOPIC_AZELEV)
+        self.hub.publish(TOPIC_FRAME)
+        self.hub.publish(TOPIC_AZELEV)
+        self.hub.publish(TOPIC_AZELEV)
+
+        # Execute (the publications before waiting are not missed, and only seen once)
+        first = subscription.wait(0)
+        second = subscription.wait(0)
+
+        # Verify
+        self.assertEqual(first, [TOPIC_AZELEV])
+        self.assertEqual(second, [])
+
+    def test_wait_wakes_on_publish(self):
+        # Prepare
+        subscription = self.hub.subscribe(TOPIC_EPHEMERIS)
+        publisher = threading.Timer(0.05, self.hub.publish, args=[TOPIC_EPHEMERIS])
+
+        # Execute
+        start = time.monotonic()
+        publisher.start()
+        changed = subscription.wait(5)
+        waited = time.monotonic() - start
+
+        # Verify (woken by the publication, long before the timeout)
+        self.assertEqual(changed, [TOPIC_EPHEMERIS])
+        self.assertLess(waited, 1)
+        self.assertEqual(self.hub.wake_latency.count, 1)
+
+    def test_async_wait_wakes_on_publish(self):
+        async def wait():
+            subscription = self.hub.subscribe_async(TOPIC_EPHEMERIS)
+            self.hub.publish(TOPIC_EPHEMERIS)
+            already_published = await subscription.wait(0)
+            threading.Timer(0.05, self.hub.publish, args=[TOPIC_EPHEMERIS]).start()
+            published_by_thread = await subscription.wait(5)
+            timed_out = await subscription.wait(0.01)
+            subscription.close()
+            return already_published, published_by_thread, timed_out
+
+        # Execute
+        start = time.monotonic()
+        already_published, published_by_thread, timed_out = asyncio.run(wait())
+
+        # Verify (woken by the publication of the other thread long before the timeout, and no listener is left)
+        self.assertEqual(already_published, [TOPIC_EPHEMERIS])
+        self.assertEqual(published_by_thread, [TOPIC_EPHEMERIS])
+        self.assertEqual(timed_out, [])
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(self.hub.wake_latency.count, 2)
+        self.assertEqual(self.hub.listeners, [])
+
+    def test_listeners(self):
+        # Prepare
+        received = []
+        self.hub.add_listener((TOPIC_EPHEMERIS, TOPIC_FRAME), received.append)
+
+        # Execute (only the topics of the listener are received, until it is removed)
+        self.hub.publish(TOPIC_EPHEMERIS)
+        self.hub.publish(TOPIC_AZELEV)
+        self.hub.remove_listener(received.append)
+        self.hub.publish(TOPIC_FRAME)
+
+        # Verify
+        self.assertEqual(received, [TOPIC_EPHEMERIS])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,8 @@
 
 import unittest
 
+import numpy as np
+
 from galileo_reference_tree.transform import llh2ecef, ecef2enu, ecef2aer
 
 
@@ -37,6 +39,22 @@ class TestTransform(unittest.TestCase):
         self.assertAlmostEqual(found_elev, expected_elev)
         self.assertAlmostEqual(found_range, expected_r)
 
+    def test_ecef2aer_arrays(self):
+        # Prepare
+        x, y, z = llh2ecef(53.0, 5.0, 100.0)
+        x2, y2, z2 = llh2ecef(51.0, 3.0, 100.0)
+
+        # Execute
+        found_az, found_elev, found_range = ecef2aer(np.array([x, x2]), np.array([y, y2]), np.array([z, z2]),
+                                                     52.0, 4.0, 50.0)
+
+        # Verify (the same as converting the coordinates one by one)
+        for idx, coords in enumerate([(x, y, z), (x2, y2, z2)]):
+            az, elev, r = ecef2aer(*coords, 52.0, 4.0, 50.0)
+            self.assertAlmostEqual(found_az[idx], az)
+            self.assertAlmostEqual(found_elev[idx], elev)
+            self.assertAlmostEqual(found_range[idx], r)
+
     def test_ecef2enu(self):
         # Prepare
         ref_lat, ref_lon = 52.0, 4.0  # Reference point
@@ -3,12 +3,23 @@
 #  This software is licensed under the MIT License.
 #  For details, see the LICENSE file in the project root.
 
+import asyncio
+import hashlib
+import http.server
 import io
+import os
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
 
+import requests
+
+from galileo_reference_tree import constants
 from galileo_reference_tree.satephemeris import SatEphemeris
-from galileo_reference_tree.twolineelements import TwoLineElements
+from galileo_reference_tree.twolineelements import TwoLineElements, FALLBACK_GSAT_TO_SVID_MAP, TLE_FILENAME, \
+    load_tle_cache, load
 
 
 class TestTwoLineElements(unittest.TestCase):
@@ -31,14 +42,21 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
         # Ephemeris mock object
         self.mock_ephemeris = [SatEphemeris() for _ in range(2)]  # Placeholder for ephemeris list with empty dicts
 
+        # Keep the files written by the loader (e.g. the TLE cache) out of the working directory
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        directory_patcher = patch('galileo_reference_tree.twolineelements.load.directory', tmp_dir.name)
+        directory_patcher.start()
+        self.addCleanup(directory_patcher.stop)
+        self.tmp_dir = tmp_dir.name
+
     @patch('galileo_reference_tree.twolineelements.requests.get')
     @patch('galileo_reference_tree.twolineelements.load.open')
     @patch('galileo_reference_tree.twolineelements.load.exists')
-    @patch('galileo_reference_tree.twolineelements.load.download')
-    def test_initialization(self, mock_download, mock_exists, mock_open_file, mock_requests_get):
-        """Test that TLE data is fetched and parsed correctly during initialization."""
+    def test_initialization(self, mock_exists, mock_open_file, mock_requests_get):
+        """Test that TLE data is parsed correctly during initialization."""
         # Mock the file exists and its content
-        mock_exists.return_value = False  # Simulate file does not exist, so download is triggered
+        mock_exists.side_effect = lambda name: name == TLE_FILENAME
         mock_open_file.return_value = io.StringIO(self.mock_tle_csv)
 
         # Mock HTTP request for constellation info
@@ -49,12 +67,12 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
         tle = TwoLineElements()
 
         # Assertions
-        mock_download.assert_called_once()  # Ensure download was called
         self.assertEqual(len(tle.sats), 2)  # Two satellites parsed from CSV
         self.assertEqual(tle.sats[0].name, 'GSAT0101 (GALILEO-PFM)')  # First satellite name
         self.assertEqual(tle.sats[1].name, 'GSAT0102 (GALILEO-FM2)')  # Second satellite name
-        self.assertEqual(tle.gsat_to_svid_map['GSAT0101'], 1)  # SV ID mapping
-        self.assertEqual(tle.gsat_to_svid_map['GSAT0102'], 2)
+        mock_requests_get.assert_not_called()  # No network request for the SV ID mapping on startup
+        self.assertEqual(tle.gsat_to_svid_map, FALLBACK_GSAT_TO_SVID_MAP)  # Fallback SV ID mapping without a cache
+        self.assertTrue(tle.gsat_to_svid_map_stale)
 
     @patch('galileo_reference_tree.twolineelements.requests.get')
     def test_get_gsat_to_svid_map(self, mock_requests_get):
@@ -73,7 +91,8 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
 
     @patch('galileo_reference_tree.twolineelements.requests.get')
     @patch('galileo_reference_tree.twolineelements.load.open')
-    def test_set_tle(self, mock_open_file, mock_requests_get):
+    @patch('galileo_reference_tree.twolineelements.load.exists', side_effect=lambda name: name == TLE_FILENAME)
+    def test_set_tle(self, mock_exists, mock_open_file, mock_requests_get):
         """Test the set_tle method, ensuring TLEs are assigned correctly."""
         # Mock file content with TLE CSV
         mock_open_file.return_value = io.StringIO(self.mock_tle_csv)
@@ -83,6 +102,7 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
 
         # Initialize TLE class
         tle = TwoLineElements()
+        tle.get_gsat_to_svid_map()
 
         # Set TLEs to mock ephemeris
         tle.set_tle(self.mock_ephemeris)
@@ -93,7 +113,8 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
 
     @patch('galileo_reference_tree.twolineelements.requests.get')
     @patch('galileo_reference_tree.twolineelements.load.open')
-    def test_set_tle_with_unknown_satellite(self, mock_open_file, mock_requests_get):
+    @patch('galileo_reference_tree.twolineelements.load.exists', side_effect=lambda name: name == TLE_FILENAME)
+    def test_set_tle_with_unknown_satellite(self, mock_exists, mock_open_file, mock_requests_get):
         """Test set_tle method when a satellite is not in the SV ID map."""
         # Mock file content with TLE CSV
         mock_open_file.return_value = io.StringIO(self.mock_tle_csv)
@@ -103,6 +124,7 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
 
         # Initialize TLE class
         tle = TwoLineElements()
+        tle.get_gsat_to_svid_map()
 
         # Modify SV ID map to exclude one satellite
         tle.gsat_to_svid_map.pop('GSAT0102', None)
@@ -114,6 +136,228 @@ GSAT0102 (GALILEO-FM2),2011-060B,2024-12-17T01:46:49.519200,1.70475232,.0004632,
         self.assertEqual(self.mock_ephemeris[0].tle.name, 'GSAT0101 (GALILEO-PFM)')  # Known satellite
         self.assertEqual(self.mock_ephemeris[1].tle, None)  # Unknown satellite skipped
 
+    @patch('galileo_reference_tree.twolineelements.requests.get')
+    def test_refresh_gsat_to_svid_map(self, mock_requests_get):
+        """Test that the SV ID mapping is refreshed, cached on disk and loaded from the cache on the next start."""
+        with tempfile.TemporaryDirectory() as tmp_dir, patch('galileo_reference_tree.twolineelements.load.directory',
+                                                            tmp_dir):
+            # Prepare
+            with open(os.path.join(tmp_dir, TLE_FILENAME), 'w') as f:
+                f.write(self.mock_tle_csv)
+            mock_requests_get.return_value.status_code = 200
+            mock_requests_get.return_value.text = self.mock_html
+            tle = TwoLineElements()
+
+            # Execute
+            tle.refresh_gsat_to_svid_map(self.mock_ephemeris)
+            tle_next_start = TwoLineElements()
+
+            # Verify
+            self.assertEqual(self.mock_ephemeris[0].tle.name, 'GSAT0101 (GALILEO-PFM)')
+            self.assertEqual(self.mock_ephemeris[1].tle.name, 'GSAT0102 (GALILEO-FM2)')
+            self.assertEqual(tle_next_start.gsat_to_svid_map, {'GSAT0101': 1, 'GSAT0102': 2})
+            self.assertFalse(tle_next_start.gsat_to_svid_map_stale)
+
+    @patch('galileo_reference_tree.twolineelements.requests.get')
+    @patch('galileo_reference_tree.twolineelements.load.exists')
+    def test_refresh_gsat_to_svid_map_offline(self, mock_exists, mock_requests_get):
+        """Test that the current SV ID mapping is kept when the GSC cannot be reached."""
+        # Prepare
+        mock_exists.return_value = False
+        mock_requests_get.side_effect = requests.ConnectionError("Offline")
+        tle = TwoLineElements()
+
+        # Execute
+        with self.assertWarns(UserWarning):
+            tle.refresh_gsat_to_svid_map(self.mock_ephemeris)
+
+        # Verify
+        self.assertEqual(tle.gsat_to_svid_map, FALLBACK_GSAT_TO_SVID_MAP)
+
+    @patch('galileo_reference_tree.twolineelements.time.monotonic')
+    @patch('galileo_reference_tree.twolineelements.requests.get')
+    @patch('galileo_reference_tree.twolineelements.load.exists', return_value=False)
+    def test_gsat_map_refresh_backoff(self, mock_exists, mock_requests_get, mock_monotonic):
+        """Test that a failing refresh of the SV ID mapping is retried with an increasing interval."""
+        # Prepare
+        mock_requests_get.side_effect = requests.ConnectionError("Offline")
+        mock_monotonic.return_value = 0.0
+        tle = TwoLineElements()
+
+        def due_after(elapsed):
+            mock_monotonic.return_value = attempt_time + elapsed
+            return tle.gsat_map_refresh_due()
+
+        # Execute
+        due_initially = tle.gsat_map_refresh_due()
+        due = []
+        for attempt_time in [0.0, 60.0, 180.0]:
+            mock_monotonic.return_value = attempt_time
+            with self.assertWarns(UserWarning):
+                tle.refresh_gsat_to_svid_map(self.mock_ephemeris)
+            due.append([due_after(59), due_after(60), due_after(120), due_after(240)])
+
+        # Verify (retried after one, two and four minutes)
+        self.assertTrue(due_initially)
+        self.assertEqual(due, [[False, True, True, True], [False, False, True, True], [False, False, False, True]])
+
+    def test_refresh_tle(self):
+        """Test the conditional TLE download and hot swap against a local HTTP stand-in for CelesTrak."""
+        with tempfile.TemporaryDirectory() as tmp_dir, patch('galileo_reference_tree.twolineelements.load.directory',
+                                                            tmp_dir):
+            # Prepare
+            server = CelesTrakStandIn(self.mock_tle_csv)
+            tle = TwoLineElements()
+            tle.gsat_to_svid_map = {'GSAT0101': 1, 'GSAT0102': 2}
+
+            # Execute
+            with patch('galileo_reference_tree.twolineelements.TLE_URL', server.url):
+                tle.refresh_tle(self.mock_ephemeris)  # No local file, so the data is downloaded
+                first_sat = self.mock_ephemeris[0].tle
+                tle.refresh_tle(self.mock_ephemeris)  # Unchanged data, so nothing is swapped
+                unchanged_sat = self.mock_ephemeris[0].tle
+                server.etag = '"v2"'
+                tle.refresh_tle(self.mock_ephemeris)  # Changed data, so the new element sets are swapped in
+            server.shutdown()
+
+            # Verify
+            self.assertEqual(server.statuses, [200, 304, 200])
+            self.assertEqual(server.request_etags, [None, '"v1"', '"v1"'])
+            self.assertEqual(first_sat.name, 'GSAT0101 (GALILEO-PFM)')
+            self.assertIs(unchanged_sat, first_sat)
+            self.assertIsNot(self.mock_ephemeris[0].tle, first_sat)
+            self.assertEqual(self.mock_ephemeris[1].tle.name, 'GSAT0102 (GALILEO-FM2)')
+
+    @patch('galileo_reference_tree.twolineelements.load.exists', return_value=False)
+    @patch('galileo_reference_tree.twolineelements.requests.get')
+    def test_refresh_tle_offline(self, mock_requests_get, mock_exists):
+        """Test that the current TLE data is kept when CelesTrak cannot be reached."""
+        # Prepare
+        mock_requests_get.side_effect = requests.ConnectionError("Offline")
+        tle = TwoLineElements()
+
+        # Execute
+        with self.assertWarns(UserWarning):
+            tle.refresh_tle(self.mock_ephemeris)
+
+        # Verify
+        self.assertEqual(tle.sats, [])
+        self.assertFalse(tle.tle_refresh_due())  # Not retried before the refresh interval
+
+    @patch('galileo_reference_tree.twolineelements.load.days_old', return_value=1)
+    @patch('galileo_reference_tree.twolineelements.load.exists', return_value=False)
+    def test_tle_refresh_due(self, mock_exists, mock_days_old):
+        """Test that the TLE data is checked on a missing or old file, and afterwards periodically."""
+        # Prepare
+        tle = TwoLineElements()
+
+        # Execute
+        due_missing = tle.tle_refresh_due()
+        mock_exists.return_value = True
+        due_recent = tle.tle_refresh_due()
+        tle.tle_checked_at = time.monotonic() - constants.TLE_REFRESH_INTERVAL
+        due_after_interval = tle.tle_refresh_due()
+
+        # Verify
+        self.assertTrue(due_missing)
+        self.assertFalse(due_recent)
+        self.assertTrue(due_after_interval)
+
+    @patch('galileo_reference_tree.twolineelements.asyncio.sleep', new_callable=AsyncMock)
+    @patch('galileo_reference_tree.twolineelements.TwoLineElements.refresh_tle')
+    @patch('galileo_reference_tree.twolineelements.TwoLineElements.refresh_gsat_to_svid_map')
+    @patch('galileo_reference_tree.twolineelements.load.exists', return_value=False)
+    def test_refresh_loop(self, mock_exists, mock_refresh_map, mock_refresh_tle, mock_sleep):
+        """Test that the refresh loop refreshes the stale mapping and the missing TLE data."""
+        # Prepare
+        tle = TwoLineElements()
+
+        # Execute
+        with patch("galileo_reference_tree.twolineelements.itertools") as mock_itertools:
+            mock_itertools.count.return_value = [1]
+            asyncio.run(tle.refresh_loop(self.mock_ephemeris))
+
+        # Verify
+        mock_refresh_map.assert_called_once_with(self.mock_ephemeris)
+        mock_refresh_tle.assert_called_once_with(self.mock_ephemeris)
+        mock_sleep.assert_called_once_with(constants.TLE_CHECK_INTERVAL)
+
+    def test_load_tle_cache(self):
+        """Test that the parsed element sets are cached and loaded again for the same TLE file only."""
+        # Prepare
+        with open(os.path.join(self.tmp_dir, TLE_FILENAME), 'w') as f:
+            f.write(self.mock_tle_csv)
+        ts = load.timescale()
+        parsed_sats = TwoLineElements.load_tle()  # Parses the file and creates the cache
+        digest = hashlib.sha256(self.mock_tle_csv.encode('utf-8')).digest()
+
+        # Execute
+        cached_sats = load_tle_cache(digest, ts)
+        other_file_sats = load_tle_cache(hashlib.sha256(b'other').digest(), ts)
+
+        # Verify
+        self.assertIsNone(other_file_sats)
+        self.assertEqual([sat.name for sat in cached_sats], [sat.name for sat in parsed_sats])
+        t = ts.utc(2024, 12, 20)
+        for cached_sat, parsed_sat in zip(cached_sats, parsed_sats):
+            self.assertEqual(cached_sat.model.satnum, parsed_sat.model.satnum)
+            for cached_coord, parsed_coord in zip(cached_sat.at(t).position.m, parsed_sat.at(t).position.m):
+                self.assertAlmostEqual(cached_coord, parsed_coord, delta=1e-3)
+
+    @patch('galileo_reference_tree.twolineelements.load_tle_cache')
+    def test_load_tle_uses_cache(self, mock_load_tle_cache):
+        """Test that the TLE file is not parsed when the cache matches."""
+        # Prepare
+        with open(os.path.join(self.tmp_dir, TLE_FILENAME), 'w') as f:
+            f.write(self.mock_tle_csv)
+        mock_load_tle_cache.return_value = ['cached']
+
+        # Execute
+        with patch('galileo_reference_tree.twolineelements.EarthSatellite.from_omm') as mock_from_omm:
+            sats = TwoLineElements.load_tle()
+
+        # Verify
+        self.assertEqual(sats, ['cached'])
+        mock_from_omm.assert_not_called()
+
+
+class CelesTrakStandIn(object):
+    """Local HTTP server serving TLE data with an ETag, answering conditional requests like CelesTrak."""
+
+    def __init__(self, tle_csv):
+        self.tle_csv = tle_csv
+        self.etag = '"v1"'
+        self.statuses = []
+        self.request_etags = []
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.request_etags.append(self.headers.get('If-None-Match'))
+                if self.headers.get('If-None-Match') == stand_in.etag:
+                    stand_in.statuses.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                stand_in.statuses.append(200)
+                body = stand_in.tle_csv.encode()
+                self.send_response(200)
+                self.send_header('ETag', stand_in.etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d/gp.php?GROUP=galileo&FORMAT=csv' % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 
 if __name__ == '__main__':
     unittest.main()